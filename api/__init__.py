@@ -2,6 +2,13 @@
 API vrstva
 """
 
-from .server import app
+__all__ = ['app']
 
-__all__ = ['app']
\ No newline at end of file
+
+def __getattr__(name):
+    # Lazy import - samostatny audio proces (python -m api.audio_server)
+    # nesmi inicializovat cely Flask server a sluzby
+    if name == 'app':
+        from .server import app
+        return app
+    raise AttributeError(name)
@@ -0,0 +1,165 @@
+"""
+Servirovani TTS audia (static/audio)
+- Strong ETag = content-addressed klic ze jmena souboru (tts_<sha256>.mp3)
+- Cache-Control: public, immutable (obsah pod danym klicem se nemeni)
+- Range requesty (206 Partial Content)
+- Zero-copy sendfile
+
+Bezi bud jako route /audio/<name> ve Flask serveru, nebo jako samostatny
+lehky proces, aby fetch audia nesoutezil s webhooky o vlakna:
+
+    python -m api.audio_server --port 5001
+    AUDIO_BASE_URL=https://audio.example.com python -m api.server
+"""
+
+import argparse
+import os
+import re
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import Config
+
+AUDIO_NAME_RE = re.compile(r'^tts_([0-9a-f]{16,64})\.(mp3|wav)$')
+
+MIME_TYPES = {
+    'mp3': 'audio/mpeg',
+    'wav': 'audio/wav',
+}
+
+
+def resolve_audio(name):
+    """
+    Overi jmeno souboru a vrati (cesta, etag, mimetype)
+    Jine nez content-addressed jmeno (napr. '../') se odmitne -> None
+    """
+    match = AUDIO_NAME_RE.match(name)
+    if not match:
+        return None
+    path = os.path.join(Config.AUDIO_CACHE_DIR, name)
+    if not os.path.isfile(path):
+        return None
+    key, extension = match.groups()
+    return path, f"{key}.{extension}", MIME_TYPES[extension]
+
+
+def cache_control_header():
+    return f"public, max-age={Config.AUDIO_MAX_AGE}, immutable"
+
+
+def parse_range(header, size):
+    """
+    Parsuje 'Range: bytes=...' (jen jeden rozsah)
+
+    Returns:
+        (start, end) vcetne, None = bez range, False = neplatny rozsah (416)
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        return None  # Vice rozsahu - posli cely soubor
+    start, _, end = spec.partition('-')
+    try:
+        if start == '':
+            # Suffix: posledních N bajtu
+            length = int(end)
+            if length <= 0:
+                return False
+            return max(0, size - length), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+class AudioRequestHandler(BaseHTTPRequestHandler):
+    """Lehky handler pro samostatny audio proces"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive pro Twilio fetch
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        name = self.path.split('?', 1)[0].rsplit('/', 1)[-1]
+        if not self.path.startswith('/audio/'):
+            self._send_empty(404)
+            return
+        resolved = resolve_audio(name)
+        if not resolved:
+            self._send_empty(404)
+            return
+        path, etag, mimetype = resolved
+        quoted_etag = f'"{etag}"'
+
+        if self.headers.get('If-None-Match') in (quoted_etag, '*'):
+            self._send_empty(304, {'ETag': quoted_etag, 'Cache-Control': cache_control_header()})
+            return
+
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            byte_range = parse_range(self.headers.get('Range'), size)
+
+            if byte_range is False:
+                self._send_empty(416, {'Content-Range': f"bytes */{size}"})
+                return
+
+            if byte_range:
+                start, end = byte_range
+                self.send_response(206)
+                self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+            else:
+                start, end = 0, size - 1
+                self.send_response(200)
+
+            length = end - start + 1
+            self.send_header('Content-Type', mimetype)
+            self.send_header('Content-Length', str(length))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', quoted_etag)
+            self.send_header('Cache-Control', cache_control_header())
+            self.end_headers()
+
+            if send_body and length > 0:
+                # Zero-copy: os.sendfile primo ze souboru do socketu
+                self.wfile.flush()
+                self.connection.sendfile(f, offset=start, count=length)
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass  # Twilio fetchuje kazdy klip - nezahlcuj log
+
+
+def run_audio_server(host=None, port=None):
+    """Spusti samostatny audio server (blokujici)"""
+    host = host or Config.SERVER_HOST
+    port = port or Config.AUDIO_SERVER_PORT
+    server = ThreadingHTTPServer((host, port), AudioRequestHandler)
+    server.daemon_threads = True
+    print(f"🔊 Audio server: http://{host}:{port}/audio/ ({Config.AUDIO_CACHE_DIR})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n\nUkonceno")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Samostatny server pro TTS audio')
+    parser.add_argument('--host', default=None)
+    parser.add_argument('--port', type=int, default=None)
+    args = parser.parse_args()
+    run_audio_server(args.host, args.port)
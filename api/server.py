@@ -9,6 +9,8 @@ from flask import (
     request,
     Response,
     send_from_directory,
+    send_file,
+    abort,
     render_template,
     redirect,
     url_for,
@@ -18,7 +20,7 @@ from flask import (
 )
 
 # Twilio
-from twilio.twiml.voice_response import VoiceResponse, Gather
+from twilio.twiml.voice_response import VoiceResponse, Gather, Connect
 
 # Standard library
 import os
@@ -30,9 +32,12 @@ from functools import wraps
 # Tvoje moduly
 from core import TTSEngine
 from services import ReceptionistService
+from services.call_reporter import CallReporter
 from config import Prompts, Config
 from database.cold_calling_db import ColdCallingDB
 from database.admin_db import AdminDB
+from database.kb_store import get_kb_registry, PROFILES, DEFAULT_TENANT
+from api.audio_server import resolve_audio
 
 # ============================================================
 # CESTY
@@ -76,13 +81,118 @@ app.secret_key = 'zmenit-na-silne-heslo-2025'  # ← ZMĚŇ TO!
 try:
     cold_db = ColdCallingDB()
     admin_db = AdminDB()
-    receptionist = ReceptionistService()
     tts = TTSEngine()
+    receptionist = ReceptionistService(tts=tts)  # ✅ Sdílený TTS (jeden pool spojení)
+    reporter = CallReporter()  # ✅ Jeden reporter na sdíleném LLM klientovi
     print("✅ Všechny služby inicializovány")
 except Exception as e:
     print(f"❌ Chyba při inicializaci: {e}")
     raise
 
+# ✅ KB z databáze - změny se projeví bez restartu
+try:
+    kb_registry = get_kb_registry()
+    kb_registry.start_polling()
+except Exception as e:
+    print(f"❌ KB registry chyba: {e}")
+    raise
+
+# ✅ Pevné hlášky (retry, rozloučení, chyby) předrenderuj lokálně - bez sítě
+try:
+    tts.prerender_canned()
+except Exception as e:
+    print(f"⚠️  Předrenderování hlášek selhalo: {e}")
+
+# ✅ Tokenizer pro rozpočet promptu načti hned (tiktoken jinak stahuje při prvním tahu)
+try:
+    from core.token_budget import preload as preload_tokenizer
+    preload_tokenizer()
+except Exception as e:
+    print(f"⚠️  Načtení tokenizeru selhalo: {e}")
+
+# ✅ Cache warmer - nejčastější odpovědi z hovorů + KB drží předrenderované
+if Config.TTS_WARMER_ENABLED:
+    try:
+        from services.tts_cache_warmer import TTSCacheWarmer
+        tts_warmer = TTSCacheWarmer(tts)
+        tts_warmer.start()
+    except Exception as e:
+        print(f"⚠️  TTS cache warmer nespuštěn: {e}")
+
+
+def build_sales_prompt(tenant):
+    """System prompt odchozího hovoru z KB tenanta (stejný pro všechny kontakty)"""
+    from database.knowledge_base import get_sales_prompt_with_kb
+    
+    # Vytvoř dummy product pro KB
+    product = {
+        'id': 1,
+        'name': 'Tvorba webů na míru',
+        'description': 'Profesionální weby od 8 000 Kč'
+    }
+    return get_sales_prompt_with_kb(product, tenant=tenant)
+
+
+# ✅ Předgenerovaný první tah odchozích hovorů - odpovědi + audio per KB kampaně
+first_turn = None
+if Config.FIRST_TURN_ENABLED:
+    try:
+        from services.first_turn import FirstTurnCache, set_first_turn_cache
+        first_turn = FirstTurnCache(receptionist.ai, tts, build_sales_prompt)
+        set_first_turn_cache(first_turn)
+        first_turn.prepare_async(DEFAULT_TENANT)
+    except Exception as e:
+        print(f"⚠️  Předgenerování prvního tahu nespuštěno: {e}")
+
+
+# ✅ Media Streams - hovor přes WebSocket, zákazník může AI přerušit (barge-in)
+sock = None
+if Config.MEDIA_STREAM_ENABLED:
+    try:
+        from flask_sock import Sock
+        from core.stt_backends import build_backend
+        from services.media_stream import MediaStreamCall
+        stream_stt = build_backend()  # ✅ Jeden STT backend (a klient) pro všechny hovory
+        sock = Sock(app)
+        
+        @sock.route('/media-stream')
+        def media_stream(ws):
+            """Twilio <Connect><Stream> - audio hovoru oběma směry"""
+            MediaStreamCall.serve(ws, receptionist, tts, backend=stream_stt)
+        
+        print("✅ Media Streams (barge-in) zapnuty: /media-stream")
+    except ImportError as e:
+        print(f"⚠️  Media Streams nespuštěny ({e}) - pip install flask-sock, hovory jedou přes <Gather>")
+    except Exception as e:
+        print(f"⚠️  Media Streams nespuštěny: {e} - hovory jedou přes <Gather>")
+
+
+def stream_response(greeting):
+    """TwiML: hovor do /media-stream, pozdrav zahraje stream (přerušitelný)"""
+    response = VoiceResponse()
+    connect = Connect()
+    stream = connect.stream(url=Config.MEDIA_STREAM_URL or f"wss://{request.host}/media-stream")
+    stream.parameter(name='greeting', value=greeting)
+    response.append(connect)
+    response.hangup()  # Server zavře stream (rozloučení) -> konec hovoru
+    return Response(str(response), mimetype='text/xml')
+
+
+# ✅ Průběžné přepisy řeči -> spekulativní odpověď ještě než zákazník domluví
+PARTIAL_RESULTS = (
+    {'partial_result_callback': '/partial', 'partial_result_callback_method': 'POST'}
+    if Config.SPECULATIVE_ENABLED else {}
+)
+
+
+def play_or_say(target, text):
+    """Přehraje TTS audio, když TTS selže použij Twilio <Say>"""
+    audio_url = tts.generate(text, use_cache=True)
+    if audio_url:
+        target.play(audio_url)
+    else:
+        target.say(text, language='cs-CZ', voice='woman')
+
 
 # ============================================================
 # MIDDLEWARE - PŘIHLÁŠENÍ
@@ -358,6 +468,8 @@ def admin_create_campaign():
     
     try:
         campaign_id = cold_db.create_campaign(name, description, user_id=user_id)  # ✅ POŠLI USER_ID
+        if first_turn:
+            first_turn.prepare_async(campaign_tenant(campaign_id))
         flash(f'Kampaň "{name}" vytvořena!', 'success')
         return redirect(f'/admin/campaign/{campaign_id}')
     except Exception as e:
@@ -483,12 +595,151 @@ def admin_delete_campaign(campaign_id):
 # TWILIO WEBHOOKS (bez změny)
 # ============================================================
 
+# ============================================================
+# KNOWLEDGE BASE - JSON API (verzované, per uživatel / kampaň)
+# ============================================================
+
+def _campaign_owner(campaign_id):
+    """user_id vlastníka kampaně (None = sdílená / neexistuje)"""
+    conn = sqlite3.connect(cold_db.db_path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_id FROM campaigns WHERE id = ?", (campaign_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def campaign_tenant(campaign_id, profile='sales'):
+    """KB pro kampaň: vlastní KB kampaně -> KB vlastníka -> výchozí"""
+    if not campaign_id:
+        return DEFAULT_TENANT
+    try:
+        owner = _campaign_owner(int(campaign_id))
+    except (ValueError, sqlite3.Error):
+        return DEFAULT_TENANT
+    return kb_registry.resolve(profile, f"campaign:{campaign_id}", f"user:{owner}" if owner else None)
+
+
+def _kb_request(profile, write=False):
+    """
+    Ověří profil a tenanta z ?tenant=... pro přihlášeného uživatele
+    Zapisovat smí jen do 'user:<své id>' a 'campaign:<své kampaně>'
+
+    Returns:
+        (tenant, None) nebo (None, chybová JSON odpověď)
+    """
+    if profile not in PROFILES:
+        return None, (jsonify({'error': f'Neznámý profil {profile}'}), 404)
+
+    user_id = session['user_id']
+    tenant = request.args.get('tenant') or f"user:{user_id}"
+
+    if tenant == DEFAULT_TENANT and not write:
+        return tenant, None
+    if tenant == f"user:{user_id}":
+        return tenant, None
+    if tenant.startswith('campaign:'):
+        try:
+            owner = _campaign_owner(int(tenant.split(':', 1)[1]))
+        except ValueError:
+            owner = None
+        if owner == user_id:
+            return tenant, None
+    return None, (jsonify({'error': 'Nemáte přístup k této KB'}), 403)
+
+
+@app.route('/admin/kb/<profile>', methods=['GET'])
+@login_required
+def admin_kb_get(profile):
+    """Aktuální KB tenanta (když nemá vlastní, vrátí výchozí)"""
+    tenant, error = _kb_request(profile)
+    if error:
+        return error
+    effective = kb_registry.resolve(profile, tenant)
+    entry = kb_registry.get(profile, effective)
+    return jsonify({
+        'tenant': tenant,
+        'effective_tenant': effective,
+        'profile': profile,
+        'version': entry['version'],
+        'nodes': len(entry['index'].docs),
+        'kb': entry['kb'],
+    })
+
+
+@app.route('/admin/kb/<profile>', methods=['PUT', 'POST'])
+@login_required
+def admin_kb_update(profile):
+    """Uloží novou verzi KB - platí okamžitě pro nové dotazy"""
+    tenant, error = _kb_request(profile, write=True)
+    if error:
+        return error
+    kb = request.get_json(silent=True)
+    try:
+        version = kb_registry.update(tenant, profile, kb, author=session.get('username'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'tenant': tenant, 'profile': profile, 'version': version})
+
+
+@app.route('/admin/kb/<profile>/versions', methods=['GET'])
+@login_required
+def admin_kb_versions(profile):
+    """Historie verzí KB tenanta"""
+    tenant, error = _kb_request(profile)
+    if error:
+        return error
+    return jsonify({
+        'tenant': tenant,
+        'profile': profile,
+        'versions': kb_registry.db.list_versions(tenant, profile),
+    })
+
+
+@app.route('/admin/kb/<profile>/rollback/<int:version>', methods=['POST'])
+@login_required
+def admin_kb_rollback(profile, version):
+    """Vrátí starou verzi (uloží se jako nová)"""
+    tenant, error = _kb_request(profile, write=True)
+    if error:
+        return error
+    new_version = kb_registry.db.rollback(tenant, profile, version, author=session.get('username'))
+    if new_version is None:
+        return jsonify({'error': f'Verze {version} neexistuje'}), 404
+    kb_registry.reload(tenant, profile)
+    return jsonify({'tenant': tenant, 'profile': profile, 'version': new_version})
+
+
 @app.route('/static/<path:filename>')
 def serve_static(filename):
     """Servuje staticke soubory"""
     return send_from_directory(str(STATIC_DIR), filename)
 
 
+@app.route('/audio/<name>')
+def serve_audio(name):
+    """
+    TTS audio - content-addressed jméno = strong ETag, immutable cache,
+    Range přes conditional=True, sendfile přes wsgi.file_wrapper
+    (pro izolaci od webhooků spusť python -m api.audio_server + AUDIO_BASE_URL)
+    """
+    resolved = resolve_audio(name)
+    if not resolved:
+        abort(404)
+    path, etag, mimetype = resolved
+    
+    response = send_file(
+        os.path.abspath(path),
+        mimetype=mimetype,
+        conditional=True,
+        etag=etag,
+        max_age=Config.AUDIO_MAX_AGE,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 @app.route("/voice", methods=['POST'])
 @app.route("/inbound", methods=['POST'])
 def inbound_call():
@@ -507,6 +758,9 @@ def inbound_call():
         del receptionist.ai.conversations[call_sid]
     
     greeting_text = receptionist.handle_call(call_sid, caller)
+    if sock is not None:
+        return stream_response(greeting_text)
+    
     response = VoiceResponse()
     
     try:
@@ -528,7 +782,8 @@ def inbound_call():
         speech_model='phone_call',
         profanity_filter=False,
         enhanced=True,
-        hints='dobrý den, objednání, termín, cena, otevřeno'
+        hints='dobrý den, objednání, termín, cena, otevřeno',
+        **PARTIAL_RESULTS
     )
     
     response.append(gather)
@@ -563,26 +818,25 @@ def outbound_call():
     
     print(f"  📝 Greeting: '{greeting}'")
     
+    # ✅ KB kampaně / jejího vlastníka (jinak výchozí)
+    tenant = campaign_tenant(campaign_id)
+    print(f"  📚 KB: {tenant}")
+    
     # ✅ POUŽIJ SALES PROMPT Z KNOWLEDGE BASE!
     try:
-        from database.knowledge_base import get_sales_prompt_with_kb
+        from database.knowledge_base import get_sales_call_context
         
-        # Vytvoř dummy product pro KB
-        product = {
-            'id': 1,
-            'name': 'Tvorba webů na míru',
-            'description': 'Profesionální weby od 8 000 Kč'
-        }
-        
-        sales_prompt = get_sales_prompt_with_kb(product, name)
+        sales_prompt = build_sales_prompt(tenant)
+        call_context = get_sales_call_context(name, company)
         print(f"  ✅ Použit SALES prompt z KB!")
         
     except Exception as e:
         print(f"  ⚠️  KB nedostupná: {e}")
-        sales_prompt = f"Jsi Pavel z MoravskéWeby. Voláš {name} ohledně tvorby webů."
+        sales_prompt = "Jsi Pavel z MoravskéWeby. Voláš ohledně tvorby webů."
+        call_context = f"[AKTUÁLNÍ HOVOR]: Voláš {name}."
     
     # Zahaj AI konverzaci
-    receptionist.ai.start_conversation(call_sid, sales_prompt)
+    receptionist.ai.start_conversation(call_sid, sales_prompt, tenant=tenant, call_context=call_context)
     
     # Přidej greeting do konverzace
     receptionist.ai.conversations[call_sid].append({
@@ -590,6 +844,16 @@ def outbound_call():
         'content': greeting
     })
     
+    # ✅ Odpovědi na typickou první reakci jsou připravené předem
+    if first_turn:
+        replies = first_turn.get(tenant)
+        if replies:
+            receptionist.ai.set_pregenerated(call_sid, replies)
+            print(f"  ⚡ První tah předgenerován ({len(replies)} variant)")
+    
+    if sock is not None:
+        return stream_response(greeting)
+    
     # TwiML response
     response = VoiceResponse()
     
@@ -610,7 +874,8 @@ def outbound_call():
         timeout=15,
         profanity_filter=False,
         enhanced=True,
-        hints='web, webové stránky, ano, ne, zájem'
+        hints='web, webové stránky, ano, ne, zájem',
+        **PARTIAL_RESULTS
     )
     
     response.append(gather)
@@ -634,60 +899,41 @@ def process_speech():
     # Timeout
     if call_time >= 300:
         print("  ⏰ TIMEOUT")
-        response.say("Musím ukončit hovor. Hezký den!", language='cs-CZ', voice='woman')
+        play_or_say(response, Prompts.GOODBYE_TIMEOUT)
         response.hangup()
         return Response(str(response), mimetype='text/xml')
     
     # Prázdný vstup
     if not user_input or len(user_input.strip()) < 2:
         if retry_count >= 2:
-            response.say("Omlouvám se, neslyším vás. Hezký den.", language='cs-CZ', voice='woman')
+            play_or_say(response, Prompts.GOODBYE_NO_INPUT)
             response.hangup()
             return Response(str(response), mimetype='text/xml')
         
         # ✅ Vyberi zprávu
         if retry_count == 0:
-            retry_message = "Slyšíte mě?"
+            retry_message = Prompts.RETRY_FIRST
         else:
-            retry_message = "Zopakujte prosím, neslyším vás dobře."
+            retry_message = Prompts.RETRY_AGAIN
         
         print(f"  ℹ️  Retry {retry_count + 1}: {retry_message}")
         
-        # ✅ NOVÉ: Vygeneruj audio přes TTS (nie Twilio voice!)
-        try:
-            audio_url = tts.generate(retry_message, use_cache=True)
-            
-            gather = Gather(
-                input='speech',
-                action=f'/process?retry={retry_count + 1}&call_time={call_time + 4}',
-                language='cs-CZ',
-                speech_timeout='auto',
-                timeout=6,
-                speech_model='phone_call',
-                profanity_filter=False,
-                enhanced=True
-            )
-            
-            # Přehraj audio (nikoliv Twilio say!)
-            gather.play(audio_url)
-            response.append(gather)
-            response.redirect(f'/process?retry={retry_count + 1}&call_time={call_time + 4}')
-            
-        except:
-            # Fallback: Použij Twilio voice jen když TTS selže
-            gather = Gather(
-                input='speech',
-                action=f'/process?retry={retry_count + 1}&call_time={call_time + 4}',
-                language='cs-CZ',
-                speech_timeout='auto',
-                timeout=6,
-                speech_model='phone_call',
-                profanity_filter=False,
-                enhanced=True
-            )
-            gather.say(retry_message, language='cs-CZ', voice='woman')
-            response.append(gather)
-            response.redirect(f'/process?retry={retry_count + 1}&call_time={call_time + 4}')
+        gather = Gather(
+            input='speech',
+            action=f'/process?retry={retry_count + 1}&call_time={call_time + 4}',
+            language='cs-CZ',
+            speech_timeout='auto',
+            timeout=6,
+            speech_model='phone_call',
+            profanity_filter=False,
+            enhanced=True,
+            **PARTIAL_RESULTS
+        )
+        
+        # ✅ Předrenderované audio (lokální TTS), Twilio voice jen když vše selže
+        play_or_say(gather, retry_message)
+        response.append(gather)
+        response.redirect(f'/process?retry={retry_count + 1}&call_time={call_time + 4}')
         
         return Response(str(response), mimetype='text/xml')
     
@@ -728,7 +974,8 @@ def process_speech():
             timeout=6,
             speech_model='phone_call',
             profanity_filter=False,
-            enhanced=True
+            enhanced=True,
+            **PARTIAL_RESULTS
         )
         
         if audio_url:
@@ -743,10 +990,29 @@ def process_speech():
         
     except Exception as e:
         print(f"  ❌ AI chyba: {e}")
-        response.say("Omlouvám se, nastala chyba.", language='cs-CZ', voice='woman')
+        play_or_say(response, Prompts.ERROR_MESSAGE)
         response.hangup()
         return Response(str(response), mimetype='text/xml')
 
+
+@app.route("/partial", methods=['POST'])
+def partial_speech():
+    """Průběžný přepis z <Gather partialResultCallback> - spustí spekulativní odpověď"""
+    call_sid = request.values.get('CallSid')
+    stable = request.values.get('StableSpeechResult', '').strip()
+    unstable = request.values.get('UnstableSpeechResult', '').strip()
+    
+    # Stabilní začátek + zatím nejistý zbytek hypotézy
+    partial = unstable if unstable.startswith(stable) else f"{stable} {unstable}".strip()
+    if call_sid and partial:
+        try:
+            receptionist.ai.speculate(call_sid, partial)
+        except Exception as e:
+            print(f"  ⚠️  Spekulace chyba: {e}")
+    
+    return Response('', status=204)
+
+
 # api/server.py - OPRAV CALL-STATUS
 # api/server.py - OPRAV CALL-STATUS
 
@@ -786,16 +1052,15 @@ def call_status():
         pass
     
     # ✅ AI REPORT - POUZE pokud je completed a má konverzaci
-    if status == 'completed' and duration >= 10 and len(conversation) > 2:
+    exchanged = sum(1 for msg in conversation if msg.get('role') != 'system')
+    if status == 'completed' and duration >= 10 and exchanged > 1:
         print(f"\n{'='*60}")
         print(f"🤖 SPOUŠTÍM AI VYHODNOCENÍ")
         print(f"{'='*60}")
         
         try:
-            from services.call_reporter import CallReporter
             from database.call_analytics import CallAnalytics
             
-            reporter = CallReporter()
             analytics = CallAnalytics()
             
             # ✅ AI REPORT
@@ -23,7 +23,7 @@ tts.generate(greeting)
 try:
     while True:
         # Poslouchat
-        user_input = stt.listen(duration=5)
+        user_input = stt.listen()  # Konci po tichu za replikou, ne po pevnych 5s
         
         if not user_input:
             continue
@@ -38,4 +38,6 @@ try:
         tts.generate(reply)
         
 except KeyboardInterrupt:
-    print("\n\nUkonceno")
\ No newline at end of file
+    print("\n\nUkonceno")
+finally:
+    stt.close()  # Mikrofon je otevreny po celou dobu chatu
\ No newline at end of file
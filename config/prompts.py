@@ -78,6 +78,35 @@ NEMĚJ:
 
 TONE: Přátelský, energický, normální chlap - NE robot"""
 
+    # Pevne hlasky serveru (retry, rozlouceni, chyby)
+    # Predrenderuji se lokalnim TTS - funguji i kdyz je ElevenLabs dole
+    RETRY_FIRST = "Slyšíte mě?"
+    RETRY_AGAIN = "Zopakujte prosím, neslyším vás dobře."
+    GOODBYE_NO_INPUT = "Omlouvám se, neslyším vás. Hezký den."
+    GOODBYE_TIMEOUT = "Musím ukončit hovor. Hezký den!"
+    ERROR_MESSAGE = "Omlouvám se, nastala chyba."
+    ERROR_MESSAGE_AI = "Omlouvam se, nastala chyba."  # ReceptionistService fallback
+
+    CANNED = [
+        RETRY_FIRST,
+        RETRY_AGAIN,
+        GOODBYE_NO_INPUT,
+        GOODBYE_TIMEOUT,
+        ERROR_MESSAGE,
+        ERROR_MESSAGE_AI,
+    ]
+
+    # Nejcastejsi prvni reakce na odchozi hovor (kanonicka fraze -> varianty)
+    # Odpoved AI i audio se predgeneruji pro kazdou KB kampane (services/first_turn.py)
+    FIRST_REPLIES = {
+        "Ano?": ["ano", "ano prosím", "prosím", "haló", "u telefonu", "ano u telefonu", "slyším"],
+        "Kdo volá?": ["kdo volá", "kdo je tam", "kdo jste", "odkud voláte", "s kým mluvím", "co jste zač"],
+        "O co jde?": ["o co jde", "co potřebujete", "co chcete", "o co se jedná"],
+        "Teď nemám čas.": ["nemám čas", "teď nemám čas", "teď nemůžu", "jsem v práci",
+                           "nehodí se mi to", "zavolejte později"],
+        "Nemáme zájem.": ["nemáme zájem", "nemám zájem", "nechci nic", "nic nechceme"],
+    }
+
     @staticmethod
     def get_sales_prompt(product_data, contact_name=""):
         """
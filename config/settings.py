@@ -16,10 +16,83 @@ class Config:
     # OpenAI
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
     OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', '')  # Fake server: http://127.0.0.1:8098/v1
+    
+    # LLM klient - sdileny pool spojeni
+    LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '6.0'))  # Deadline na tah hovoru (s) - Twilio webhook ma 15s, zbytek TTS
+    LLM_BACKGROUND_TIMEOUT = float(os.getenv('LLM_BACKGROUND_TIMEOUT', '30.0'))  # Report hovoru, shrnuti
+    LLM_CONNECT_TIMEOUT = 2.0
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))  # Max soubeznych requestu na OpenAI
+    LLM_POOL_SIZE = 32  # Keep-alive spojeni v poolu
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))  # Jen 429/5xx/spojeni a jen v ramci deadline
+    LLM_RETRY_BASE = 0.2  # Backoff = nahodne 0..base*2^pokus (s)
+    LLM_HEDGE_AFTER_MS = int(os.getenv('LLM_HEDGE_AFTER_MS', '0'))  # Bez prvniho tokenu do X ms -> duplikat (0 = vypnuto)
+    LLM_HEDGE_MODEL = os.getenv('LLM_HEDGE_MODEL', '')  # Model duplikatu (prazdne = stejny jako primarni)
+    LLM_LATENCY_WINDOW = 1000  # Poslednich N tahu pro p50/p95/p99
+    
+    # Spekulativni odpoved z prubeznych prepisu Twilio (partialResultCallback -> /partial)
+    SPECULATIVE_ENABLED = os.getenv('SPECULATIVE_ENABLED', '0') == '1'
+    SPECULATIVE_DEBOUNCE_MS = int(os.getenv('SPECULATIVE_DEBOUNCE_MS', '400'))  # Prepis beze zmeny X ms -> LLM
+    SPECULATIVE_MIN_WORDS = 2  # Kratsi prepis se jeste nevyplati
+    
+    # Media Streams (WebSocket, potrebuje flask-sock) misto <Gather> - barge-in: zakaznik muze AI prerusit
+    MEDIA_STREAM_ENABLED = os.getenv('MEDIA_STREAM_ENABLED', '0') == '1'
+    MEDIA_STREAM_URL = os.getenv('MEDIA_STREAM_URL', '')  # wss://.../media-stream (prazdne = host requestu)
+    MEDIA_STREAM_VAD_DB = -40  # Prah reci v prichozim audiu (dB)
+    BARGE_IN_ENABLED = os.getenv('BARGE_IN_ENABLED', '1') == '1'
+    BARGE_IN_THRESHOLD_DB = float(os.getenv('BARGE_IN_THRESHOLD_DB', '-30'))  # Hlasitejsi nez VAD - ozvena / hluk linky AI neprerusi
+    BARGE_IN_MIN_SPEECH = float(os.getenv('BARGE_IN_MIN_SPEECH', '0.08'))  # s souvisle reci -> stop prehravani (~100 ms i s odeslanim clear)
+    
+    # Predgenerovany prvni tah odchozich hovoru (odpovedi + audio per KB kampane)
+    FIRST_TURN_ENABLED = os.getenv('FIRST_TURN_ENABLED', '1') == '1'
+    FIRST_TURN_TOP_N = int(os.getenv('FIRST_TURN_TOP_N', '8'))  # Kolik ocekavanych reakci predgenerovat
+    FIRST_TURN_MAX_WORDS = 5  # Delsi prvni replika z hovoru neni "typicka reakce"
+    FIRST_TURN_MIN_COUNT = 2  # Min. vyskytu v call_analytics.db pro vytezenou reakci
     
     # ElevenLabs
     ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
     ELEVENLABS_VOICE_ID = os.getenv('ELEVENLABS_VOICE_ID', 'pFZP5JQG7iQjIQuC4Bku')
+    ELEVENLABS_MODEL_ID = os.getenv('ELEVENLABS_MODEL_ID', 'eleven_turbo_v2_5')  # Nejrychlejší model
+    ELEVENLABS_BASE_URL = os.getenv('ELEVENLABS_BASE_URL', 'https://api.elevenlabs.io')  # Fake server: http://127.0.0.1:8099
+    
+    # TTS klient - sdileny pool spojeni
+    TTS_TIMEOUT = float(os.getenv('TTS_TIMEOUT', '4.0'))  # Deadline na 1 request (s) - Twilio webhook ma 15s
+    TTS_CONNECT_TIMEOUT = 2.0
+    TTS_MAX_CONCURRENCY = int(os.getenv('TTS_MAX_CONCURRENCY', '8'))  # Max soubeznych requestu na ElevenLabs
+    TTS_POOL_SIZE = 16  # Keep-alive spojeni v poolu
+    
+    # TTS failover - poradi = priorita, twilio_say = robot jako posledni zachrana
+    TTS_PROVIDERS = os.getenv('TTS_PROVIDERS', 'elevenlabs,local,twilio_say').split(',')
+    TTS_HEDGE_AFTER_MS = int(os.getenv('TTS_HEDGE_AFTER_MS', '0'))  # 0 = hedging vypnut
+    TTS_PROVIDER_TIMEOUT = float(os.getenv('TTS_PROVIDER_TIMEOUT', '2.5'))  # Deadline 1 providera (< TTS_TIMEOUT, zbyde cas na failover)
+    TTS_BREAKER_FAILURES = 3  # Chyb po sobe -> circuit OPEN
+    TTS_BREAKER_RESET = 30.0  # Sekund nez zkusime provider znovu
+    
+    # Lokalni offline TTS (espeak-ng) - pevne hlasky + degradovany rezim
+    # Load test bez API kreditu: TTS_PROVIDERS=local
+    LOCAL_TTS_BINARY = os.getenv('LOCAL_TTS_BINARY', 'espeak-ng')
+    LOCAL_TTS_VOICE = os.getenv('LOCAL_TTS_VOICE', 'cs')
+    LOCAL_TTS_SPEED = int(os.getenv('LOCAL_TTS_SPEED', '160'))  # Slov za minutu
+    TTS_CANNED_PROVIDER = os.getenv('TTS_CANNED_PROVIDER', 'local')  # Kym predrenderovat Prompts.CANNED
+    
+    # STT - openai (Whisper API) | local (faster-whisper, offline CPU) | stand_in (load testy bez modelu)
+    STT_BACKEND = os.getenv('STT_BACKEND', 'openai')
+    STT_UPLOAD_FORMAT = os.getenv('STT_UPLOAD_FORMAT', 'flac')  # wav | flac | opus - upload z pameti (flac/opus potrebuje soundfile, jinak WAV)
+    STT_BATCH_CONCURRENCY = int(os.getenv('STT_BATCH_CONCURRENCY', '4'))  # Paralelnich prepisu v batchi
+    STT_STREAM_INTERVAL = 1.0  # s audia mezi prubeznymi prepisy (stream)
+    STT_MIN_SPEECH_PERCENT = 30  # VAD pred uploadem: min. podil reci v replice (jinak bez API volani)
+    STT_MIN_SPEECH_SECONDS = 0.3  # VAD pred uploadem: min. delka reci
+    STT_TEXT_FILTERS = os.getenv('STT_TEXT_FILTERS', 'too_short,english,known_hallucinations').split(',')  # Post-filtry prepisu
+    STT_PHONE_TEXT_FILTERS = os.getenv('STT_PHONE_TEXT_FILTERS', 'known_hallucinations').split(',')  # Telefon/nahravky: "Ano." / "No, ano." jsou platne odpovedi
+    LOCAL_STT_MODEL = os.getenv('LOCAL_STT_MODEL', 'small')  # Vicejazycny Whisper model (cestina), nebo cesta k CT2 modelu
+    LOCAL_STT_DEVICE = os.getenv('LOCAL_STT_DEVICE', 'cpu')
+    LOCAL_STT_COMPUTE_TYPE = os.getenv('LOCAL_STT_COMPUTE_TYPE', 'int8')
+    LOCAL_STT_BEAM_SIZE = int(os.getenv('LOCAL_STT_BEAM_SIZE', '1'))  # 1 = greedy, nejrychlejsi
+    RECORDINGS_DIR = os.getenv('RECORDINGS_DIR', 'data/recordings')  # Nahravky hovoru k offline prepisu
+    RECORDING_DECODE_PROCESSES = int(os.getenv('RECORDING_DECODE_PROCESSES', '2'))  # Procesu pro dekodovani + VAD
+    RECORDING_STT_WORKERS = int(os.getenv('RECORDING_STT_WORKERS', '4'))  # Paralelnich prepisu segmentu
+    CALL_AUDIO_SPEAKERS = os.getenv('CALL_AUDIO_SPEAKERS', 'customer,ai').split(',')  # Kanaly dual-channel nahravky (poradi jako u Twilia)
+    CALL_AUDIO_VAD_DB = -40  # Prah reci pro audio metriky hovoru (jako VAD STTEngine)
     
     # Twilio
     TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID')
@@ -33,11 +106,48 @@ class Config:
     AUDIO_CACHE_DIR = 'static/audio'
     CACHE_ENABLED = True  # Vymeni se cache pro 30 cisel
     
+    # Servirovani audia - prazdne = stejny server (/audio/...),
+    # jinak URL samostatneho procesu (python -m api.audio_server)
+    AUDIO_BASE_URL = os.getenv('AUDIO_BASE_URL', '')
+    AUDIO_SERVER_PORT = int(os.getenv('AUDIO_SERVER_PORT', '5001'))
+    AUDIO_MAX_AGE = 31536000  # 1 rok - obsah pod klicem se nemeni
+    AUDIO_CACHE_MAX_FILES = int(os.getenv('AUDIO_CACHE_MAX_FILES', '5000'))  # Nad limit maze nejstarsi (krome pinned)
+    AUDIO_PINNED_MANIFEST = 'static/audio/pinned.json'
+    
+    # TTS cache warmer - predrenderuje nejcastejsi odpovedi z call_analytics.db + KB
+    TTS_WARMER_ENABLED = os.getenv('TTS_WARMER_ENABLED', '1') == '1'
+    TTS_WARMER_INTERVAL = int(os.getenv('TTS_WARMER_INTERVAL', '3600'))  # s
+    TTS_WARMER_TOP_N = 50  # Kolik nejcastejsich odpovedi drzet pinned
+    TTS_WARMER_MIN_COUNT = 2  # Min. pocet vyskytu, aby se odpoved vyplatilo renderovat
+    
+    # Knowledge Base v DB - verzovana per tenant, hot-reload bez restartu
+    KB_DB_PATH = os.getenv('KB_DB_PATH', 'data/knowledge_base.db')
+    KB_RELOAD_INTERVAL = int(os.getenv('KB_RELOAD_INTERVAL', '5'))  # s - polling zmen z jinych procesu
+    RECEPTION_TENANT = os.getenv('RECEPTION_TENANT', 'default')  # Cí KB pouziva prichozi recepce
+    
+    # Prompt caching u providera - cela KB ve stabilnim prefixu (system + KB),
+    # promenne casti (hovor, intent, vyhledany kontext) az za nim
+    KB_IN_PREFIX = os.getenv('KB_IN_PREFIX', '1') == '1'
+    KB_PREFIX_MAX_SHARE = float(os.getenv('KB_PREFIX_MAX_SHARE', '0.4'))  # Max podil LLM_INPUT_BUDGET pro KB v prefixu, vetsi KB jen pres vyhledavani
+    
+    # Rozpocet promptu - drzi time-to-first-token stabilni i u dlouhych hovoru
+    LLM_INPUT_BUDGET = int(os.getenv('LLM_INPUT_BUDGET', '3000'))  # tokeny na jeden request
+    SUMMARY_TRIGGER_TOKENS = int(os.getenv('SUMMARY_TRIGGER_TOKENS', '800'))  # historie nad limit -> shrnuti
+    SUMMARY_KEEP_MESSAGES = 6  # Posledni zpravy vzdy doslovne
+    SUMMARY_MAX_TOKENS = 120
+    
     # Konverzace - KRATSI ODPOVEDI = RYCHLEJSI ZPRACOVANI
     MAX_HISTORY = 10
     MAX_TOKENS = 40  # Zkráceno z 60 na 40 - kratší odpovědi = rychlejší TTS
     TEMPERATURE = 0.7
     
+    # Fast path - předschválené odpovědi bez LLM (jistota intentu >= práh)
+    FAST_PATH_ENABLED = os.getenv('FAST_PATH_ENABLED', '1') == '1'
+    FAST_PATH_THRESHOLDS = {
+        'rejection': 0.9,  # Jen jasné "nemám zájem" -> rozloučení
+        'price': 0.9,      # Jen jasné "kolik to stojí" -> ceník
+    }
+    
     # Server
     SERVER_HOST = '0.0.0.0'
     SERVER_PORT = 5000
@@ -4,27 +4,176 @@ AI Engine s vylepšeným porozuměním češtině
 Rychlejší, přirozenější, inteligentní cleanup
 """
 
-import openai
 from config import Config
+from .async_loop import get_background_loop
+from .llm_client import get_llm_client, latency_percentiles
+from .czech_matcher import PhraseReplacer, IntentMatcher
+from .token_budget import (
+    count_message_tokens, count_messages_tokens, count_tokens, tokenizer_name, truncate_tokens
+)
+import asyncio
 import re
+import threading
+import time
+from collections import deque
 
 
 class AIEngine:
     """AI engine pro konverzace s Knowledge Base podporou"""
     
-    def __init__(self):
-        openai.api_key = Config.OPENAI_API_KEY
+    # ✅ INTENCE SLOVA-KLÍČE (co chce) s vahou = jistota, že fráze znamená daný intent
+    INTENT_KEYWORDS = {
+        'price': {'kolik to stojí': 0.95, 'kolik stojí': 0.95, 'za kolik': 0.9, 'jaká je cena': 0.95,
+                  'cena': 0.8, 'cenu': 0.8, 'ceník': 0.9, 'stojí': 0.6, 'náklady': 0.6,
+                  'kolik to': 0.6, 'kolik': 0.5},
+        'availability': {'kdy se můžeme sejít': 0.9, 'termín': 0.7, 'termin': 0.7, 'volno': 0.6,
+                         'volne': 0.6, 'kdy': 0.5},
+        'interest': {'mám zájem': 0.9, 'zajímá': 0.7, 'chci': 0.6, 'bylo by': 0.5, 'co kdyby': 0.5},
+        'rejection': {'nemám zájem': 0.95, 'nemáme zájem': 0.95, 'nezajímá': 0.9, 'nevolejte': 0.95,
+                      'nechci': 0.85, 'ne prosím': 0.8, 'nemám': 0.5, 'přesunout': 0.5,
+                      'nevím': 0.4, 'ne': 0.5},
+        'confirmation': {'jo dobře': 0.8, 'ano': 0.6, 'jo': 0.6, 'super': 0.6, 'ok': 0.6, 'je to': 0.3},
+        'question': {'jaký': 0.4, 'jak': 0.4, 'co': 0.4, 'proč': 0.4, 'kde': 0.4},
+    }
+    
+    # ✅ STT chyby a dialekty (klíč = celé slovo/fráze)
+    CZECH_REPLACEMENTS = {
+        # Duplicity
+        'slyšíme se dobrý den': 'dobrý den',
+        'dobry den dobry den': 'dobrý den',
+        'dobrý den dobrý den': 'dobrý den',
+        'jo jo': 'jo',
+        'ne ne': 'ne',
+        'tak tak': 'tak',
+        'já já': 'já',
+        'mám mám': 'mám',
+        'takhle takhle': 'takhle',
+        'uvažuji uvažuji': 'uvažuji',
+        'jó jó': 'jó',
+        
+        # Číslice vs. slova
+        'nula': '0',
+        'zero': '0',
+        'jeden': '1',
+        'dva': '2',
+        'tři': '3',
+        'čtyři': '4',
+        'pět': '5',
+        
+        # ✅ NOVÉ: Slang a dialekty
+        'jo': 'ano',
+        'jojo': 'ano',
+        'jó': 'ano',
+        'áno': 'ano',
+        'no': 'ano',  # moravské "no" = ano
+        'nee': 'ne',
+        'ne-ne': 'ne',
+        'ne prosím': 'ne',
+        'vůbec ne': 'ne',
+        
+        # ✅ NOVÉ: Chyby při vyslovování
+        'víte': 'víte',
+        'vite': 'víte',
+        'vidíte': 'vidíte',
+        'vidite': 'vidíte',
+        'jak se mate': 'jak se máte',
+        'jak se máte': 'jak se máte',
+        'nemam': 'nemám',
+        'nema': 'nemá',
+        'nemate': 'nemáte',
+        'nemáte': 'nemáte',
+        'mám zájem': 'mám zájem',
+        'mamzajem': 'mám zájem',
+        
+        # ✅ NOVÉ: Běžné spojnice
+        'a tak': 'a tak',
+        'podívej': 'poslechni',
+        'poslechni': 'poslechni',
+        'slyš': 'poslechni',
+        'počkej': 'chvíli',
+        'počkej chvíli': 'chvíli',
+        
+        # ✅ NOVÉ: Email a URL opravy
+        'at': 'at',  # @ symbol
+        'tečka': '.',
+        'lomítko': '/',
+        'dvě lomítka': '//',
+        
+        # ✅ NOVÉ: Mormální výrazy STT
+        'hmm': 'hmm',
+        'hm': 'hmm',
+        'ehm': 'hmm',
+        'aha': 'aha',
+        'áha': 'aha',
+        'jáha': 'aha',
+        'uh': 'hmm',
+        'ehm': 'hmm',
+        'ej': 'ej',
+        'hele': 'hele',
+    }
+    
+    # Intenty, které běžně doprovázejí jiné (nesnižují jistotu hlavního intentu)
+    GENERIC_INTENTS = {'question', 'confirmation'}
+    
+    # Úvodní vata první reakce ('haló, kdo volá' == 'kdo volá') pro předgenerované odpovědi
+    LEADING_FILLERS = ('dobrý den', 'haló', 'ano', 'no', 'prosím')
+    
+    def __init__(self, llm=None):
+        # ✅ Sdílený LLM klient (pool spojení, deadline, retry) pro celý proces
+        self.llm = llm or get_llm_client()
         self.conversations = {}
+        self.profiles = {}  # call_sid -> 'sales' | 'reception'
+        self.tenants = {}  # call_sid -> tenant KB ('default', 'user:1', 'campaign:3')
+        self.kb_digests = {}  # call_sid -> celá KB jako text (stabilní prefix)
+        self.prefix_lengths = {}  # call_sid -> počet úvodních system zpráv v historii
+        self.summaries = {}  # call_sid -> {'text': shrnutí, 'upto': index první nezkrácené zprávy}
+        self._summarizing = set()
         self.model = "gpt-4o-mini"  # ✅ Rychlejší než gpt-4
         
+        # ✅ Matchery zkompilované jednou při startu
+        self._replacer = PhraseReplacer(self.CZECH_REPLACEMENTS)
+        self._intent_matcher = IntentMatcher(self.INTENT_KEYWORDS)
+        self._leading_fillers = [self.utterance_key(filler) for filler in self.LEADING_FILLERS]
+        
+        # ✅ Statistika fast path (kolik LLM volání jsme ušetřili)
+        self.stats = {'turns': 0, 'llm_calls': 0, 'fast_path': {},
+                      'prompt_tokens': 0, 'cached_tokens': 0, 'hedged': 0, 'hedge_wins': 0,
+                      'speculative': {'started': 0, 'hits': 0, 'misses': 0, 'discarded': 0,
+                                      'wasted_tokens': 0},
+                      'pregenerated': 0}
+        self.call_stats = {}
+        
+        # ✅ Latence LLM tahů (p50/p95/p99) - s hedgingem i bez
+        self.hedge_after = Config.LLM_HEDGE_AFTER_MS / 1000.0 if Config.LLM_HEDGE_AFTER_MS else None
+        self.turn_latencies = deque(maxlen=Config.LLM_LATENCY_WINDOW)
+        
+        # ✅ Předgenerované odpovědi na první reakci (call_sid -> {klíč přepisu: odpověď})
+        self.pregenerated = {}
+        
+        # ✅ Spekulativní odpovědi z průběžného přepisu (call_sid -> spekulace)
+        self.speculations = {}
+        self._speculation_lock = threading.Lock()
+        
         # ✅ IMPORT KB
+        self.kb_retrievers = {}
+        self.fast_path_source = None
+        self.kb_digest_source = None
         try:
-            from database.knowledge_base import get_context_for_query
-            self.kb_retriever = get_context_for_query
+            from database.knowledge_base import (
+                get_context_for_query, get_reception_context, get_fast_path_responses,
+                get_kb_digest
+            )
+            self.kb_retrievers = {
+                'sales': get_context_for_query,
+                'reception': get_reception_context,
+            }
+            # Odpovědi se berou z aktuální verze KB tenanta (hot-reload)
+            self.fast_path_source = get_fast_path_responses
+            self.kb_digest_source = get_kb_digest
             print("  ✅ Knowledge Base načtena")
         except Exception as e:
             print(f"  ⚠️  KB import error: {e}")
-            self.kb_retriever = None
+        self.kb_retriever = self.kb_retrievers.get('sales')
     
     def _cleanup_czech_input(self, text):
         """
@@ -32,125 +181,117 @@ class AIEngine:
         Opraví časté chyby rozpoznávání a dialekty
         
         VYLEPŠENO: Rozumí více české slangům, dialektům a místním výrazům
+        Jeden průchod předkompilovaným matcherem, jen celá slova
         """
         # Lowercase pro porovnání
-        cleaned = text.lower().strip()
-        
-        # ✅ NOVÉ: Větší seznam STT chyb a dialektů
-        replacements = {
-            # Duplicity
-            'slyšíme se dobrý den': 'dobrý den',
-            'dobry den dobry den': 'dobrý den',
-            'dobrý den dobrý den': 'dobrý den',
-            'jo jo': 'jo',
-            'ne ne': 'ne',
-            'tak tak': 'tak',
-            'já já': 'já',
-            'mám mám': 'mám',
-            'takhle takhle': 'takhle',
-            'uvažuji uvažuji': 'uvažuji',
-            'jó jó': 'jó',
-            
-            # Číslice vs. slova
-            'nula': '0',
-            'zero': '0',
-            'jeden': '1',
-            'dva': '2',
-            'tři': '3',
-            'čtyři': '4',
-            'pět': '5',
-            
-            # ✅ NOVÉ: Slang a dialekty
-            'jo': 'ano',
-            'jojo': 'ano',
-            'jó': 'ano',
-            'áno': 'ano',
-            'no': 'ano',  # moravské "no" = ano
-            'nee': 'ne',
-            'ne-ne': 'ne',
-            'ne prosím': 'ne',
-            'vůbec ne': 'ne',
-            
-            # ✅ NOVÉ: Chyby při vyslovování
-            'víte': 'víte',
-            'vite': 'víte',
-            'vidíte': 'vidíte',
-            'vidite': 'vidíte',
-            'jak se mate': 'jak se máte',
-            'jak se máte': 'jak se máte',
-            'nemam': 'nemám',
-            'nema': 'nemá',
-            'nemate': 'nemáte',
-            'nemáte': 'nemáte',
-            'mám zájem': 'mám zájem',
-            'mamzajem': 'mám zájem',
-            
-            # ✅ NOVÉ: Běžné spojnice
-            'a tak': 'a tak',
-            'podívej': 'poslechni',
-            'poslechni': 'poslechni',
-            'slyš': 'poslechni',
-            'počkej': 'chvíli',
-            'počkej chvíli': 'chvíli',
-            
-            # ✅ NOVÉ: Email a URL opravy
-            'at': 'at',  # @ symbol
-            'tečka': '.',
-            'lomítko': '/',
-            'dvě lomítka': '//',
-            
-            # ✅ NOVÉ: Mormální výrazy STT
-            'hmm': 'hmm',
-            'hm': 'hmm',
-            'ehm': 'hmm',
-            'aha': 'aha',
-            'áha': 'aha',
-            'jáha': 'aha',
-            'uh': 'hmm',
-            'ehm': 'hmm',
-            'ej': 'ej',
-            'hele': 'hele',
-        }
-        
-        for wrong, correct in replacements.items():
-            if wrong in cleaned:
-                cleaned = cleaned.replace(wrong, correct)
+        cleaned = self._replacer.replace(text.lower().strip())
         
         # Odstraň vícenásobné mezery
         cleaned = re.sub(r'\s+', ' ', cleaned).strip()
         
         return cleaned
     
-    def start_conversation(self, call_sid, system_prompt):
-        """Zahájí novou konverzaci"""
-        self.conversations[call_sid] = [
-            {'role': 'system', 'content': system_prompt}
-        ]
-        print(f"[AIEngine] Konverzace {call_sid} zahájena")
+    def start_conversation(self, call_sid, system_prompt, profile='sales', tenant=None,
+                           call_context=None):
+        """
+        Zahájí novou konverzaci
+        profile: 'sales' (cold calling) nebo 'reception' - určuje KB a fast path odpovědi
+        tenant: čí KB použít (None = výchozí)
+        call_context: proměnné údaje hovoru (jméno kontaktu...) - až za stabilním prefixem
+        
+        Pořadí zpráv = od nejstabilnějšího po nejproměnlivější, aby provider
+        mohl cachovat prefix: system prompt -> celá KB -> hovor -> historie -> aktuální tah
+        """
+        messages = [{'role': 'system', 'content': system_prompt}]
+        if call_context:
+            messages.append({'role': 'system', 'content': call_context})
+        self.conversations[call_sid] = messages
+        self.prefix_lengths[call_sid] = len(messages)
+        self.summaries.pop(call_sid, None)
+        
+        # Celá KB se vkládá až do requestu (hned za system prompt) - historie
+        # pro reporty a learning ji tak neobsahuje
+        self.kb_digests[call_sid] = None
+        if Config.KB_IN_PREFIX and self.kb_digest_source:
+            try:
+                digest = self.kb_digest_source(profile, tenant)
+                # Velká KB by z prefixu vytlačila celou historii - pak jen vyhledaný kontext v tahu
+                limit = int(Config.LLM_INPUT_BUDGET * Config.KB_PREFIX_MAX_SHARE)
+                digest_tokens = count_tokens(digest)
+                if digest_tokens > limit:
+                    print(f"  ⚠️  KB digest {digest_tokens} tokenů > limit {limit} "
+                          f"({Config.KB_PREFIX_MAX_SHARE:.0%} rozpočtu) - KB jen přes vyhledávání")
+                else:
+                    self.kb_digests[call_sid] = digest
+            except Exception as e:
+                print(f"  ⚠️  KB digest error: {e}")
+        self.profiles[call_sid] = profile
+        self.tenants[call_sid] = tenant
+        self.call_stats[call_sid] = {'llm_calls': 0, 'fast_path': 0,
+                                     'prompt_tokens': 0, 'cached_tokens': 0}
+        print(f"[AIEngine] Konverzace {call_sid} zahájena ({profile})")
+    
+    def _score_intents(self, text):
+        """
+        Ohodnotí intenty - skóre = váha nejsilnější nalezené fráze
+        Fráze se hledají jako celá slova ('ne' nesmí chytit 'není')
+        """
+        return self._intent_matcher.score(text.lower())
     
     def _detect_intent(self, text):
         """
         ✅ NOVÉ: Detekuj INTENCI za slovy
         Pomáhá AI lépe rozumět co zákazník opravdu chce
         """
-        text_lower = text.lower()
-        
-        # ✅ INTENCE SLOVA-KLÍČE (co chce)
-        intents = {
-            'price': ['kolik', 'cena', 'stojí', 'cenu', 'náklady', 'kolik to'],
-            'availability': ['kdy', 'termin', 'volne', 'kdy se můžeme sejít'],
-            'interest': ['zajímá', 'chci', 'mám zájem', 'bylo by', 'co kdyby'],
-            'rejection': ['ne', 'nemám', 'nechci', 'nevím', 'přesunout', 'ne prosím'],
-            'confirmation': ['ano', 'jo', 'jo dobře', 'super', 'ok', 'je to'],
-            'question': ['jaký', 'jak', 'co', 'proč', 'kde'],
-        }
+        intent, _ = self._detect_intent_with_confidence(text)
+        return intent
+    
+    def _detect_intent_with_confidence(self, text):
+        """
+        Vrátí (intent, jistota 0-1)
+        Jistotu snižuje konkurenční (ne-generický) intent - "nechci, ale kolik to stojí?"
+        """
+        scores = self._score_intents(text)
+        if not scores:
+            return 'unknown', 0.0
+        
+        intent = max(scores, key=scores.get)
+        confidence = scores[intent]
+        
+        competing = [score for other, score in scores.items()
+                     if other != intent and other not in self.GENERIC_INTENTS]
+        if competing:
+            confidence -= max(competing)
+        
+        return intent, round(max(confidence, 0.0), 2)
+    
+    def _fast_path(self, call_sid, intent, confidence):
+        """
+        Předschválená odpověď bez LLM, pokud je intent dost jistý
+        Vrací text odpovědi nebo None (-> LLM)
+        """
+        if not Config.FAST_PATH_ENABLED:
+            return None
+        
+        if not self.fast_path_source:
+            return None
+        
+        profile = self.profiles.get(call_sid, 'sales')
+        try:
+            response = self.fast_path_source(profile, self.tenants.get(call_sid)).get(intent)
+        except Exception as e:
+            print(f"  ⚠️  Fast path KB error: {e}")
+            return None
+        threshold = Config.FAST_PATH_THRESHOLDS.get(intent)
+        
+        if not response or threshold is None:
+            return None
         
-        detected = []
-        for intent, keywords in intents.items():
-            if any(keyword in text_lower for keyword in keywords):
-                detected.append(intent)
+        if confidence < threshold:
+            print(f"  🧠 Fast path NE: {intent} jistota {confidence} < {threshold}")
+            return None
         
-        return detected[0] if detected else 'unknown'
+        return response
     
     def get_response(self, call_sid, user_message):
         """
@@ -165,47 +306,76 @@ class AIEngine:
         print(f"  🧹 Cleaned: '{cleaned_message}'")
         
         # ✅ NOVÉ: DETEKUJ INTENCI
-        intent = self._detect_intent(cleaned_message)
-        print(f"  🎯 Intent: {intent}")
+        intent, confidence = self._detect_intent_with_confidence(cleaned_message)
+        print(f"  🎯 Intent: {intent} ({confidence})")
         
-        # ✅ VYHLEDEJ KONTEXT Z KB (s vědomím INTENCE!)
-        kb_context = ""
-        if self.kb_retriever:
-            try:
-                kb_context = self.kb_retriever(cleaned_message)
-                if kb_context:
-                    print(f"  📚 KB context: {kb_context[:100]}...")
-            except Exception as e:
-                print(f"  ⚠️  KB retrieval error: {e}")
+        self.stats['turns'] += 1
+        call_stats = self.call_stats.setdefault(call_sid, {'llm_calls': 0, 'fast_path': 0,
+                                                           'prompt_tokens': 0, 'cached_tokens': 0})
         
-        # ✅ VYTVOŘ ZPRÁVU S KONTEXTEM + INTENCÍ
-        if kb_context:
-            enhanced_message = f"[INTENT: {intent}]\n{cleaned_message}\n\n[INFO Z DATABÁZE]:\n{kb_context}"
-        else:
-            enhanced_message = f"[INTENT: {intent}]\n{cleaned_message}"
+        # ✅ PŘEDGENEROVANÝ PRVNÍ TAH - odpověď i audio připravené před hovorem
+        pregenerated = self._pregenerated_reply(call_sid, cleaned_message)
+        if pregenerated:
+            self._drop_speculation(call_sid)
+            self.stats['pregenerated'] += 1
+            print(f"  ⚡ Předgenerovaný první tah - LLM přeskočeno")
+            
+            self.conversations[call_sid].append({
+                'role': 'user',
+                'content': cleaned_message
+            })
+            self.conversations[call_sid].append({
+                'role': 'assistant',
+                'content': pregenerated
+            })
+            return pregenerated
         
-        # Přidej do historie
-        self.conversations[call_sid].append({
-            'role': 'user',
-            'content': enhanced_message
-        })
+        # ✅ FAST PATH - předschválená (a předrenderovaná) odpověď bez LLM
+        fast_reply = self._fast_path(call_sid, intent, confidence)
+        if fast_reply:
+            self._drop_speculation(call_sid)
+            self.stats['fast_path'][intent] = self.stats['fast_path'].get(intent, 0) + 1
+            call_stats['fast_path'] += 1
+            print(f"  ⚡ Fast path: {intent} (jistota {confidence}) - LLM přeskočeno "
+                  f"[ušetřeno {sum(self.stats['fast_path'].values())}/{self.stats['turns']}]")
+            
+            self.conversations[call_sid].append({
+                'role': 'user',
+                'content': cleaned_message
+            })
+            self.conversations[call_sid].append({
+                'role': 'assistant',
+                'content': fast_reply
+            })
+            return fast_reply
         
-        # ✅ ZAVOLEJ OpenAI - SUPER RYCHLÉ PARAMETRY
+        # ✅ ZAVOLEJ OpenAI (nebo převezmi spekulaci z průběžného přepisu)
+        self.stats['llm_calls'] += 1
+        call_stats['llm_calls'] += 1
+        started = time.perf_counter()
         try:
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=self.conversations[call_sid],
-                temperature=0.80,  # ✅ JEŠTĚ méně náhodné (ostřejší porozumění)
-                max_tokens=45,     # ✅ JEŠTĚ KRATŠÍ = ostřejší odpovědi
-                presence_penalty=0.6,  # ✅ SILNĚJŠÍ zákaz opakování
-                frequency_penalty=0.6,  # ✅ SILNĚJŠÍ rozmanitost
-                top_p=0.85  # ✅ JEŠTĚ specifičtější výběr
-            )
+            result = self._take_speculation(call_sid, cleaned_message)
+            if result is None:
+                messages = self._turn_messages(call_sid, cleaned_message, intent)
+                result = get_background_loop().run(self._generate(messages),
+                                                   timeout=Config.LLM_TIMEOUT + 1.0)
             
-            ai_reply = response.choices[0].message.content.strip()
+            # Do historie jde jen čistá zpráva - historie je pak append-only
+            # a celá se při dalším tahu trefí do cache providera
+            self.conversations[call_sid].append({
+                'role': 'user',
+                'content': cleaned_message
+            })
+            
+            if result['hedged']:
+                self.stats['hedged'] += 1
+                if result['winner'] == 'hedge':
+                    self.stats['hedge_wins'] += 1
+            self.turn_latencies.append(time.perf_counter() - started)
+            self._record_usage(call_sid, result['usage'])
             
             # ✅ VYČISTI ODPOVĚĎ (odstraň markdown, emojis apod.)
-            ai_reply = self._cleanup_ai_response(ai_reply)
+            ai_reply = self._cleanup_ai_response(result['content'].strip())
             
             # Ulož odpověď
             self.conversations[call_sid].append({
@@ -213,12 +383,352 @@ class AIEngine:
                 'content': ai_reply
             })
             
+            # ✅ Dlouhý hovor -> starší tahy se shrnou na pozadí
+            self._maybe_summarize(call_sid)
+            
             return ai_reply
             
         except Exception as e:
             print(f"[AIEngine] OpenAI error: {e}")
             raise
     
+    def utterance_key(self, text):
+        """Normalizovaný přepis (vyčištěná slova bez interpunkce) pro porovnávání replik"""
+        return self._speculation_key(self._cleanup_czech_input(text))
+    
+    def set_pregenerated(self, call_sid, replies):
+        """
+        Předgenerované odpovědi pro první tah hovoru
+        replies: {utterance_key(první reakce): text odpovědi}
+        """
+        self.pregenerated[call_sid] = replies
+    
+    def _pregenerated_reply(self, call_sid, cleaned_message):
+        """Odpověď pro první reakci, pokud ji známe předem (platí jen jednou)"""
+        replies = self.pregenerated.pop(call_sid, None)
+        if not replies:
+            return None
+        
+        key = self._speculation_key(cleaned_message)
+        candidates = [key]
+        stripped = key
+        while True:
+            filler = next((f for f in self._leading_fillers if stripped.startswith(f + ' ')), None)
+            if filler is None:
+                break
+            stripped = stripped[len(filler) + 1:]
+            candidates.append(stripped)
+        
+        for candidate in candidates:
+            if candidate in replies:
+                return replies[candidate]
+        print(f"  🧠 První tah NE: '{key}' není mezi předgenerovanými")
+        return None
+    
+    def pregenerate_reply(self, call_sid, user_message):
+        """
+        Odpověď na repliku bez zápisu do historie a statistik
+        (předpočítání odpovědí před hovorem - stejný request jako v get_response)
+        """
+        cleaned_message = self._cleanup_czech_input(user_message)
+        intent, confidence = self._detect_intent_with_confidence(cleaned_message)
+        fast_reply = self._fast_path(call_sid, intent, confidence)
+        if fast_reply:
+            return fast_reply
+        
+        messages = self._turn_messages(call_sid, cleaned_message, intent)
+        result = get_background_loop().run(self._generate(messages), timeout=Config.LLM_TIMEOUT + 1.0)
+        return self._cleanup_ai_response(result['content'].strip())
+    
+    def _turn_messages(self, call_sid, cleaned_message, intent):
+        """Request pro tah: KB kontext (s vědomím INTENCE) + zpráva zákazníka na konci"""
+        kb_context = ""
+        kb_retriever = self.kb_retrievers.get(self.profiles.get(call_sid, 'sales'))
+        if kb_retriever:
+            try:
+                kb_context = kb_retriever(cleaned_message, tenant=self.tenants.get(call_sid))
+                if kb_context:
+                    print(f"  📚 KB context: {kb_context[:100]}...")
+            except Exception as e:
+                print(f"  ⚠️  KB retrieval error: {e}")
+        
+        # ✅ INTENCE + KONTEXT jen pro tento tah (na konci, mimo cachovaný prefix)
+        turn_context = f"[INTENT: {intent}]"
+        if kb_context:
+            turn_context += f"\n\n[INFO Z DATABÁZE]:\n{kb_context}"
+        return self._build_messages(call_sid, turn_context,
+                                    pending={'role': 'user', 'content': cleaned_message})
+    
+    async def _generate(self, messages):
+        """
+        LLM odpověď pro tah hovoru - SUPER RYCHLÉ PARAMETRY
+        Vrací {'content', 'usage', 'hedged', 'winner'}
+        """
+        params = dict(
+            model=self.model,
+            temperature=0.80,  # ✅ JEŠTĚ méně náhodné (ostřejší porozumění)
+            max_tokens=45,     # ✅ JEŠTĚ KRATŠÍ = ostřejší odpovědi
+            presence_penalty=0.6,  # ✅ SILNĚJŠÍ zákaz opakování
+            frequency_penalty=0.6,  # ✅ SILNĚJŠÍ rozmanitost
+            top_p=0.85  # ✅ JEŠTĚ specifičtější výběr
+        )
+        if self.hedge_after:
+            # ✅ HEDGING - pomalý první token -> duplikát, vyhraje rychlejší
+            return await self.llm.complete_hedged(
+                messages, self.hedge_after, hedge_model=Config.LLM_HEDGE_MODEL or None, **params
+            )
+        response = await self.llm.complete(messages, **params)
+        return {'content': response.choices[0].message.content or '', 'usage': response.usage,
+                'hedged': False, 'winner': 'primary'}
+    
+    def speculate(self, call_sid, partial_text):
+        """
+        Spekulativní odpověď z průběžného přepisu (Twilio partial result),
+        zatímco zákazník ještě mluví. LLM se spustí, až se přepis
+        Config.SPECULATIVE_DEBOUNCE_MS nezmění; get_response odpověď převezme,
+        jen když finální přepis obsahuje stejná slova
+        
+        Vrací True pokud byla spekulace naplánována
+        """
+        if not Config.SPECULATIVE_ENABLED or call_sid not in self.conversations:
+            return False
+        
+        cleaned = self._cleanup_czech_input(partial_text)
+        key = self._speculation_key(cleaned)
+        if len(key.split()) < Config.SPECULATIVE_MIN_WORDS:
+            return False
+        
+        current = self.speculations.get(call_sid)
+        if current and current['key'] == key:
+            return False
+        
+        # Fast path nepotřebuje LLM - spekulace by byla zbytečná
+        intent, confidence = self._detect_intent_with_confidence(cleaned)
+        if self._fast_path(call_sid, intent, confidence):
+            self._drop_speculation(call_sid)
+            return False
+        
+        spec = {
+            'key': key,
+            'base': len(self.conversations[call_sid]),  # spekulace platí jen pro tento tah
+            'messages': self._turn_messages(call_sid, cleaned, intent),
+            'started': False,
+        }
+        spec['future'] = get_background_loop().submit(self._speculative_generate(spec))
+        
+        with self._speculation_lock:
+            previous = self.speculations.get(call_sid)
+            self.speculations[call_sid] = spec
+        if previous:
+            self._discard_speculation(previous)
+        print(f"  🔮 Spekulace: '{key}'")
+        return True
+    
+    async def _speculative_generate(self, spec):
+        # Přepis se ještě mění -> nová spekulace tuhle zruší dřív, než něco stojí
+        await asyncio.sleep(Config.SPECULATIVE_DEBOUNCE_MS / 1000.0)
+        spec['started'] = True
+        self.stats['speculative']['started'] += 1
+        return await self._generate(spec['messages'])
+    
+    @staticmethod
+    def _speculation_key(cleaned):
+        """Slova přepisu bez interpunkce - 'kolik to stojí?' == 'kolik to stojí'"""
+        return ' '.join(re.findall(r'\w+', cleaned.lower()))
+    
+    def _take_speculation(self, call_sid, cleaned_message):
+        """Hotová (nebo běžící) spekulace pro finální přepis, None = generuj znovu"""
+        with self._speculation_lock:
+            spec = self.speculations.pop(call_sid, None)
+        if spec is None:
+            return None
+        
+        key = self._speculation_key(cleaned_message)
+        if spec['key'] != key or spec['base'] != len(self.conversations[call_sid]):
+            self.stats['speculative']['misses'] += 1
+            print(f"  🔮 Spekulace NE: '{spec['key']}' != '{key}'")
+            self._discard_speculation(spec)
+            return None
+        
+        # Ještě neběží (debounce) - zrušit nic nestojí, rovnou generuj
+        if not spec['started'] and spec['future'].cancel():
+            return None
+        
+        try:
+            result = spec['future'].result(timeout=Config.LLM_TIMEOUT)
+        except Exception as e:
+            print(f"  ⚠️  Spekulace selhala ({type(e).__name__}) - generuji znovu")
+            return None
+        
+        self.stats['speculative']['hits'] += 1
+        print(f"  🔮 Spekulace ANO - odpověď připravena z průběžného přepisu")
+        return result
+    
+    def _drop_speculation(self, call_sid):
+        with self._speculation_lock:
+            spec = self.speculations.pop(call_sid, None)
+        if spec:
+            self._discard_speculation(spec)
+    
+    def _discard_speculation(self, spec):
+        """Zruší spekulaci - pokud už LLM běželo, započítá promarněné prompt tokeny"""
+        future = spec['future']
+        if not future.done():
+            future.cancel()
+        if not spec['started']:
+            return
+        
+        self.stats['speculative']['discarded'] += 1
+        wasted = None
+        if future.done() and not future.cancelled() and future.exception() is None:
+            usage = future.result()['usage']
+            wasted = getattr(usage, 'prompt_tokens', None) if usage else None
+        if wasted is None:
+            # Zrušeno za běhu - prompt už provider zpracoval
+            wasted = count_messages_tokens(spec['messages'])
+        self.stats['speculative']['wasted_tokens'] += wasted
+    
+    def _build_messages(self, call_sid, turn_context, pending=None):
+        """
+        Request pro LLM: system prompt -> KB (stabilní, sdílené všemi hovory)
+        -> kontext hovoru -> shrnutí starších tahů -> poslední tahy -> kontext tohoto tahu
+        pending: zpráva zákazníka, která ještě není v historii (připojí se za ni)
+        
+        Hlídá rozpočet Config.LLM_INPUT_BUDGET včetně prefixu: nejdřív vynechá
+        nejstarší tahy (v historii pro reporty zůstávají), pak zkrátí shrnutí
+        a teprve nakonec zkrátí poslední tah
+        """
+        history = self.conversations[call_sid]
+        if pending:
+            history = history + [pending]
+        prefix_len = self.prefix_lengths.get(call_sid, 1)
+        
+        prefix = history[:1]
+        digest = self.kb_digests.get(call_sid)
+        if digest:
+            prefix = prefix + [{'role': 'system', 'content': digest}]
+        prefix = prefix + history[1:prefix_len]
+        
+        start = prefix_len
+        summary = self.summaries.get(call_sid)
+        summary_text = ''
+        if summary:
+            summary_text = summary['text']
+            start = max(start, summary['upto'])
+        
+        turns = history[start:]
+        tail = [{'role': 'system', 'content': turn_context}]
+        
+        budget = Config.LLM_INPUT_BUDGET
+        fixed_tokens = count_messages_tokens(prefix) + count_messages_tokens(tail)
+        summary_tokens = count_message_tokens(self._summary_message(summary_text)) if summary_text else 0
+        turn_tokens = count_messages_tokens(turns)
+        dropped = 0
+        while len(turns) > 1 and fixed_tokens + summary_tokens + turn_tokens > budget:
+            turn_tokens -= count_messages_tokens(turns[:1])
+            turns = turns[1:]
+            dropped += 1
+        
+        notes = []
+        if summary_text and fixed_tokens + summary_tokens + turn_tokens > budget:
+            room = budget - fixed_tokens - turn_tokens - count_message_tokens(self._summary_message(''))
+            summary_text = truncate_tokens(summary_text, room)
+            summary_tokens = count_message_tokens(self._summary_message(summary_text)) if summary_text else 0
+            notes.append("shrnutí zkráceno" if summary_text else "shrnutí vynecháno")
+        
+        over = fixed_tokens + summary_tokens + turn_tokens - budget
+        if over > 0 and turns and turn_tokens - over > count_message_tokens({'content': ''}):
+            # Poslední tah zkrátit zepředu - konec repliky je to, na co se odpovídá
+            last = turns[-1]
+            room = count_message_tokens(last) - over - count_message_tokens({'content': ''})
+            turns = turns[:-1] + [{**last, 'content': truncate_tokens(last['content'], room, keep_end=True)}]
+            turn_tokens = count_messages_tokens(turns)
+            notes.append("poslední tah zkrácen")
+        
+        if dropped:
+            notes.insert(0, f"vynecháno {dropped} nejstarších zpráv")
+        total = fixed_tokens + summary_tokens + turn_tokens
+        print(f"  🧮 Prompt: {total}/{budget} tokenů "
+              f"(pevná část {fixed_tokens}, shrnutí {summary_tokens}, historie {turn_tokens}, {tokenizer_name()})"
+              + (f" - {', '.join(notes)}" if notes else "")
+              + (" - ⚠️ nad rozpočtem" if total > budget else ""))
+        
+        messages = prefix
+        if summary_text:
+            messages = messages + [self._summary_message(summary_text)]
+        return messages + turns + tail
+    
+    @staticmethod
+    def _summary_message(text):
+        return {'role': 'system', 'content': f"[SHRNUTÍ DOSAVADNÍHO HOVORU]: {text}"}
+    
+    def _maybe_summarize(self, call_sid):
+        """
+        Když nezkrácená historie přeroste Config.SUMMARY_TRIGGER_TOKENS, starší
+        tahy se na pozadí shrnou (mimo kritickou cestu odpovědi)
+        """
+        if call_sid in self._summarizing:
+            return
+        
+        history = self.conversations.get(call_sid, [])
+        summary = self.summaries.get(call_sid)
+        start = max(self.prefix_lengths.get(call_sid, 1), summary['upto'] if summary else 0)
+        upto = len(history) - Config.SUMMARY_KEEP_MESSAGES
+        
+        if upto <= start or count_messages_tokens(history[start:]) <= Config.SUMMARY_TRIGGER_TOKENS:
+            return
+        
+        self._summarizing.add(call_sid)
+        get_background_loop().submit(
+            self._summarize(call_sid, summary['text'] if summary else '', history[start:upto], upto)
+        )
+    
+    async def _summarize(self, call_sid, previous, messages, upto):
+        """Složí předchozí shrnutí + starší tahy do krátkého shrnutí"""
+        try:
+            transcript = "\n".join(
+                f"{'Zákazník' if msg['role'] == 'user' else 'Ty'}: {msg['content']}"
+                for msg in messages if msg['role'] in ('user', 'assistant')
+            )
+            if previous:
+                transcript = f"Dosavadní shrnutí: {previous}\n\n{transcript}"
+            
+            response = await self.llm.complete(
+                [
+                    {'role': 'system', 'content': (
+                        "Shrň dosavadní telefonát do max 3 krátkých vět česky: co zákazník chce, "
+                        "co už víme (jméno, termín, námitky) a co bylo domluveno. Bez úvodu."
+                    )},
+                    {'role': 'user', 'content': transcript},
+                ],
+                timeout=Config.LLM_BACKGROUND_TIMEOUT,
+                model=self.model,
+                temperature=0.2,
+                max_tokens=Config.SUMMARY_MAX_TOKENS,
+            )
+            text = response.choices[0].message.content.strip()
+            self.summaries[call_sid] = {'text': text, 'upto': upto}
+            print(f"  📝 Shrnutí hovoru {call_sid} (do zprávy {upto}): {text[:80]}...")
+        except Exception as e:
+            # Bez shrnutí rozpočet stejně drží _build_messages (vynechá nejstarší tahy)
+            print(f"  ⚠️  Shrnutí hovoru selhalo: {e}")
+        finally:
+            self._summarizing.discard(call_sid)
+    
+    def _record_usage(self, call_sid, usage):
+        """Započítá prompt tokeny a kolik z nich provider vzal z cache"""
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cached_tokens = (getattr(details, 'cached_tokens', 0) or 0) if details else 0
+        
+        for stats in (self.stats, self.call_stats.get(call_sid, {})):
+            stats['prompt_tokens'] = stats.get('prompt_tokens', 0) + prompt_tokens
+            stats['cached_tokens'] = stats.get('cached_tokens', 0) + cached_tokens
+        
+        print(f"  💾 Prompt cache: {cached_tokens}/{prompt_tokens} tokenů")
+    
     def _cleanup_ai_response(self, text):
         """
         Vyčistí AI odpověď pro TTS
@@ -265,13 +775,55 @@ class AIEngine:
             return []
         
         history = self.conversations[call_sid].copy()
+        self._drop_speculation(call_sid)
+        self.pregenerated.pop(call_sid, None)
         
         # ⚠️ NESMAŽ JEŠTĚ! Learning system potřebuje přístup
         # del self.conversations[call_sid]
         
-        print(f"[AIEngine] Konverzace {call_sid} ukončena ({len(history)} zpráv)")
+        call_stats = self.call_stats.get(call_sid, {})
+        print(f"[AIEngine] Konverzace {call_sid} ukončena ({len(history)} zpráv, "
+              f"LLM: {call_stats.get('llm_calls', 0)}, fast path: {call_stats.get('fast_path', 0)}, "
+              f"cache: {call_stats.get('cached_tokens', 0)}/{call_stats.get('prompt_tokens', 0)} tokenů)")
         return history
     
+    def discard_conversation(self, call_sid):
+        """Zahodí konverzaci i všechen stav hovoru (pomocné konverzace, předpočítání)"""
+        self._drop_speculation(call_sid)
+        for state in (self.conversations, self.profiles, self.tenants, self.kb_digests,
+                      self.prefix_lengths, self.summaries, self.call_stats, self.pregenerated):
+            state.pop(call_sid, None)
+    
+    def get_call_stats(self, call_sid):
+        """Statistika jednoho hovoru (LLM volání, fast path, prompt cache)"""
+        call_stats = dict(self.call_stats.get(call_sid, {}))
+        prompt_tokens = call_stats.get('prompt_tokens', 0)
+        call_stats['cache_hit_rate'] = (
+            round(call_stats.get('cached_tokens', 0) / prompt_tokens * 100, 1) if prompt_tokens else 0.0
+        )
+        return call_stats
+    
+    def get_stats(self):
+        """Souhrnná statistika - kolik LLM volání ušetřil fast path"""
+        avoided = sum(self.stats['fast_path'].values())
+        turns = self.stats['turns']
+        prompt_tokens = self.stats['prompt_tokens']
+        speculative = self.stats['speculative']
+        decided = speculative['hits'] + speculative['misses']
+        return {
+            **self.stats,
+            'llm_calls_avoided': avoided,
+            'avoided_rate': round(avoided / turns * 100, 1) if turns else 0.0,
+            'cache_hit_rate': round(self.stats['cached_tokens'] / prompt_tokens * 100, 1) if prompt_tokens else 0.0,
+            'hedge_rate': round(self.stats['hedged'] / self.stats['llm_calls'] * 100, 1) if self.stats['llm_calls'] else 0.0,
+            'turn_latency_ms': latency_percentiles(self.turn_latencies),
+            'speculative_hit_rate': round(speculative['hits'] / decided * 100, 1) if decided else 0.0,
+            'speculative_waste_rate': (
+                round(speculative['wasted_tokens'] / (prompt_tokens + speculative['wasted_tokens']) * 100, 1)
+                if speculative['wasted_tokens'] else 0.0
+            ),
+        }
+    
     def get_conversation_history(self, call_sid):
         """Vrátí historii konverzace"""
         return self.conversations.get(call_sid, [])
\ No newline at end of file
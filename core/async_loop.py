@@ -0,0 +1,57 @@
+"""
+Sdilena asyncio smycka na pozadi
+Flask vlakna (synchronni) do ni posilaji korutiny a cekaji na vysledek,
+takze vsechny HTTP requesty bezi na jednom event loopu se sdilenym poolem spojeni
+"""
+
+import asyncio
+import threading
+
+
+class BackgroundLoop:
+    """Asyncio event loop bezici v samostatnem daemon vlakne"""
+
+    def __init__(self, name="async-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout=None):
+        """
+        Spusti korutinu na smycce a pocka na vysledek (blokujici volani)
+
+        Args:
+            coro: Korutina ke spusteni
+            timeout: Max doba cekani v sekundach (None = bez limitu)
+
+        Raises:
+            concurrent.futures.TimeoutError pokud vyprsi timeout
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def submit(self, coro):
+        """Spusti korutinu na smycce bez cekani - vraci concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_background_loop():
+    """Vrati sdilenou smycku pro cely proces (lazy init)"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                _loop = BackgroundLoop()
+    return _loop
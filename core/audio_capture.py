@@ -0,0 +1,306 @@
+"""
+Zachyt audia pro STT
+- Zdroje audia se spolecnym rozhranim (mikrofon, WAV soubor, framy ze site)
+- Lock-free ring buffer framu (1 producent = capture vlakno, 1 konzument = STT)
+- CaptureSession: zdroj otevreny po celou dobu behu, cte se na pozadi
+  -> listen() jen vybira dalsi repliku z bufferu, zadne otevirani zarizeni na kazdy tah
+"""
+
+import queue
+import threading
+import time
+import wave
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None  # Headless (testy, server) - mikrofon neni potreba
+
+
+class AudioSourceError(Exception):
+    """Zdroj audia nejde otevrit"""
+
+
+# ============================================================
+# ZDROJE
+# ============================================================
+
+class AudioSource:
+    """Zakladni rozhrani zdroje 16-bit mono PCM po framech (chunk vzorku)"""
+
+    name = 'base'
+    live = True  # Audio bezi v realnem case - session necha zahazovat nejstarsi framy, nebrzdi zdroj
+
+    def __init__(self, rate=16000, chunk=1024):
+        self.rate = rate
+        self.chunk = chunk
+
+    def open(self):
+        pass
+
+    def read(self):
+        """Dalsi frame (bytes), None = zdroj skoncil"""
+        raise NotImplementedError
+
+    def interrupt(self):
+        """Odblokuje cekajici read() pri zastaveni session"""
+        pass
+
+    def close(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """Mikrofon pres PyAudio - instance i stream se otevrou jednou na celou session"""
+
+    name = 'microphone'
+
+    def __init__(self, rate=16000, chunk=1024, device_index=None):
+        super().__init__(rate, chunk)
+        self.device_index = device_index
+        self._interface = None
+        self._stream = None
+
+    def open(self):
+        if pyaudio is None:
+            raise AudioSourceError("pyaudio neni nainstalovany - mikrofon nejde pouzit")
+        self._interface = pyaudio.PyAudio()
+        try:
+            self._stream = self._interface.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.rate,
+                input=True,
+                input_device_index=self.device_index,
+                frames_per_buffer=self.chunk
+            )
+        except Exception:
+            self._interface.terminate()
+            self._interface = None
+            raise
+
+    def read(self):
+        return self._stream.read(self.chunk, exception_on_overflow=False)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._interface is not None:
+            self._interface.terminate()
+            self._interface = None
+
+
+class WavFileSource(AudioSource):
+    """
+    WAV soubor (16-bit mono) jako zdroj - testy a benchmarky bez mikrofonu
+    realtime=True cte tempem skutecneho zarizeni (1 frame za chunk/rate s)
+    """
+
+    name = 'wav'
+
+    def __init__(self, path, chunk=1024, realtime=False):
+        with wave.open(str(path), 'rb') as wf:
+            if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+                raise AudioSourceError(f"{path}: ocekavan 16-bit mono WAV")
+            rate = wf.getframerate()
+        super().__init__(rate, chunk)
+        self.path = path
+        self.realtime = realtime
+        self.live = realtime  # Rychle cteni -> session brzdi cteni podle konzumenta
+        self._wave = None
+        self._next_at = 0.0
+
+    def open(self):
+        self._wave = wave.open(str(self.path), 'rb')
+        self._next_at = time.monotonic()
+
+    def read(self):
+        data = self._wave.readframes(self.chunk)
+        if not data:
+            return None
+        if self.realtime:
+            self._next_at += len(data) / (2.0 * self.rate)
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def close(self):
+        if self._wave is not None:
+            self._wave.close()
+            self._wave = None
+
+
+class FrameSource(AudioSource):
+    """
+    Framy dodavane zvenku (sitovy stream, media stream) - push() libovolne delky
+    Prebaluje na framy po chunk vzorcich; end() = konec streamu
+    """
+
+    name = 'frames'
+
+    def __init__(self, rate=16000, chunk=1024):
+        super().__init__(rate, chunk)
+        self._queue = queue.Queue()
+        self._pending = b''
+        self._lock = threading.Lock()
+
+    def push(self, pcm):
+        frame_bytes = self.chunk * 2
+        with self._lock:
+            self._pending += pcm
+            while len(self._pending) >= frame_bytes:
+                self._queue.put(self._pending[:frame_bytes])
+                self._pending = self._pending[frame_bytes:]
+
+    def end(self):
+        with self._lock:
+            if self._pending:
+                self._queue.put(self._pending)
+                self._pending = b''
+            self._queue.put(None)
+
+    def read(self):
+        return self._queue.get()
+
+    def interrupt(self):
+        self._queue.put(None)
+
+
+# ============================================================
+# RING BUFFER + SESSION
+# ============================================================
+
+class AudioRingBuffer:
+    """
+    Lock-free ring buffer framu pro 1 producenta a 1 konzumenta
+    Pozice jsou rostouci citace, slot = pozice % kapacita. Kazdou pozici meni jen
+    jedna strana a zapis slotu/citace je pod GIL atomicky - zadny zamek v ceste dat.
+    Plny buffer prepisuje nejstarsi framy; konzument, ktereho producent predbehne,
+    preskoci na nejstarsi platny frame (overruns).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._write_pos = 0
+        self._read_pos = 0
+        self._data_ready = threading.Event()  # Jen probuzeni konzumenta, data chranena nejsou
+        self.closed = False
+        self.overruns = 0
+
+    def write(self, frame):
+        """Producent: zapise frame (pri plnem bufferu prepise nejstarsi)"""
+        self._slots[self._write_pos % self.capacity] = frame
+        self._write_pos += 1
+        self._data_ready.set()
+
+    def close(self):
+        """Producent skoncil - konzument docte zbytek a pak dostane None"""
+        self.closed = True
+        self._data_ready.set()
+
+    def read(self, timeout=None):
+        """
+        Konzument: dalsi frame
+
+        Returns:
+            bytes, nebo None (timeout / producent skoncil a buffer je prazdny)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            write_pos = self._write_pos
+            if write_pos - self._read_pos > self.capacity:
+                # Producent nas predbehl - nejstarsi framy jsou prepsane
+                self.overruns += write_pos - self.capacity - self._read_pos
+                self._read_pos = write_pos - self.capacity
+
+            if self._read_pos < write_pos:
+                frame = self._slots[self._read_pos % self.capacity]
+                if self._write_pos - self._read_pos > self.capacity:
+                    continue  # Slot se prepsal behem cteni
+                self._read_pos += 1
+                return frame
+
+            if self.closed:
+                return None
+
+            self._data_ready.clear()
+            if self._write_pos > self._read_pos or self.closed:
+                continue  # Zapis mezi kontrolou a clear()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            self._data_ready.wait(remaining)
+
+    def flush(self):
+        """Konzument: zahodi vse, co jeste neprecetl"""
+        self._read_pos = self._write_pos
+
+    @property
+    def pending(self):
+        return min(self._write_pos - self._read_pos, self.capacity)
+
+
+class CaptureSession:
+    """
+    Dlouho zijici zachyt audia - zdroj otevreny jednou, capture vlakno plni ring buffer
+    STT si pak jen cte framy (read) - mezi tahy se zarizeni nezavira
+    """
+
+    def __init__(self, source, buffer_seconds=30.0):
+        self.source = source
+        self.buffer = AudioRingBuffer(max(1, int(buffer_seconds * source.rate / source.chunk)))
+        self.frames_captured = 0
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Otevre zdroj a spusti capture vlakno (opakovane volani nic nedela)"""
+        if self._thread is not None:
+            return self
+        self.source.open()
+        self._thread = threading.Thread(target=self._run, name=f'capture-{self.source.name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                frame = self.source.read()
+                if frame is None:
+                    break
+                # Soubor necteny v realnem case - cekej na konzumenta misto prepisovani
+                while not self.source.live and self.buffer.pending >= self.buffer.capacity and not self._stop.is_set():
+                    time.sleep(0.001)
+                self.buffer.write(frame)
+                self.frames_captured += 1
+        except Exception as e:
+            self.error = e
+            print(f"  ❌ Zachyt audia ({self.source.name}) selhal: {e}")
+        finally:
+            self.buffer.close()
+
+    def read(self, timeout=None):
+        """Dalsi frame z bufferu, None = zdroj skoncil (nebo timeout)"""
+        return self.buffer.read(timeout)
+
+    def flush(self):
+        """Zahodi nactene audio (napr. vlastni hlas AI behem prehravani)"""
+        self.buffer.flush()
+
+    def stop(self):
+        """Zastavi capture vlakno a zavre zdroj"""
+        self._stop.set()
+        self.source.interrupt()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.source.close()
+        self._thread = None
@@ -0,0 +1,111 @@
+"""
+Kodovani nahravek pro upload do prepisu - cele v pameti (BytesIO), bez docasnych souboru
+- wav: vzdy k dispozici (stdlib wave)
+- flac: bezztratovy, ~polovicni upload - potrebuje soundfile (libsndfile)
+- opus: ztratovy OGG/Opus, nejmensi upload - potrebuje soundfile s libsndfile >= 1.0.29
+Chybi-li soundfile (nebo format), pouzije se WAV
+
+G.711 mu-law (Twilio Media Streams, 8 kHz) - ulaw_decode / ulaw_encode, jen numpy
+"""
+
+import io
+import wave
+
+import numpy as np
+
+# format -> (pripona, content type, soundfile format, soundfile subtype)
+FORMATS = {
+    'wav': ('wav', 'audio/wav', None, None),
+    'flac': ('flac', 'audio/flac', 'FLAC', 'PCM_16'),
+    'opus': ('ogg', 'audio/ogg', 'OGG', 'OPUS'),
+}
+
+_soundfile = None
+_soundfile_loaded = False
+
+
+def _get_soundfile():
+    """soundfile modul, None kdyz neni nainstalovany"""
+    global _soundfile, _soundfile_loaded
+    if not _soundfile_loaded:
+        _soundfile_loaded = True
+        try:
+            import soundfile
+            _soundfile = soundfile
+        except Exception as e:
+            print(f"  ⚠️  soundfile nedostupny ({type(e).__name__}) - upload jen jako WAV")
+            _soundfile = None
+    return _soundfile
+
+
+def encode_wav(pcm, rate, channels=1):
+    """Raw 16-bit PCM -> WAV bytes (v pameti)"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def encode_audio(pcm, rate, audio_format='wav', channels=1):
+    """
+    Raw 16-bit PCM -> soubor pro upload (v pameti)
+
+    Args:
+        pcm: Raw 16-bit PCM
+        rate: Vzorkovaci frekvence
+        audio_format: 'wav' | 'flac' | 'opus'
+
+    Returns:
+        (filename, bytes, content_type) - primo jako file= pro OpenAI SDK
+    """
+    extension, content_type, sf_format, sf_subtype = FORMATS.get(audio_format, FORMATS['wav'])
+
+    if sf_format is not None:
+        soundfile = _get_soundfile()
+        if soundfile is not None:
+            try:
+                samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, channels)
+                buffer = io.BytesIO()
+                soundfile.write(buffer, samples, rate, format=sf_format, subtype=sf_subtype)
+                return f"speech.{extension}", buffer.getvalue(), content_type
+            except Exception as e:
+                print(f"  ⚠️  Kodovani {audio_format} selhalo ({e}) - posilam WAV")
+
+    return "speech.wav", encode_wav(pcm, rate, channels), 'audio/wav'
+
+
+# ============================================================
+# G.711 MU-LAW (telefonni audio Twilio Media Streams)
+# ============================================================
+
+ULAW_BIAS = 0x84
+
+
+def _build_ulaw_table():
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = (((codes & 0x0F) << 3) + ULAW_BIAS << exponent) - ULAW_BIAS
+    return np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+ULAW_TABLE = _build_ulaw_table()
+
+
+def ulaw_decode(data):
+    """mu-law bytes -> raw 16-bit PCM (lookup tabulka)"""
+    return ULAW_TABLE[np.frombuffer(data, dtype=np.uint8)].tobytes()
+
+
+def ulaw_encode(pcm):
+    """Raw 16-bit PCM -> mu-law bytes (14-bit G.711 jako audioop.lin2ulaw)"""
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.int32) >> 2
+    mask = np.where(samples < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(samples), 8159) + (ULAW_BIAS >> 2)
+    # Segment = pozice nejvyssiho bitu nad bitem 5 (0..7, 8 = orezano na maximum)
+    segment = np.floor(np.log2(magnitude)).astype(np.int32) - 5
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    code = np.where(segment > 7, 0x7F, code)
+    return (code ^ mask).astype(np.uint8).tobytes()
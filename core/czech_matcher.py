@@ -0,0 +1,94 @@
+"""
+Predkompilovany multi-pattern matcher pro cesky vstup
+- Vsechny fraze v jednom regexu (nejdelsi prvni), matchuji jen cela slova
+  ('no' neprepise 'ano' ani 'nosit')
+- Jeden pruchod textem misto smycky pres vsechny fraze
+- Implikovane shody: fraze obsazene v delsi nalezene frazi (jako vystupni
+  odkazy Aho-Corasick), takze intent detekce nic neztrati
+"""
+
+import re
+
+
+def _contains_phrase(phrase, other):
+    """Je 'other' obsazeno ve 'phrase' jako cela slova?"""
+    return re.search(r'(?<!\w)' + re.escape(other) + r'(?!\w)', phrase) is not None
+
+
+class PhraseMatcher:
+    """Najde vsechny fraze v textu jednim kompilovanym regexem"""
+
+    def __init__(self, phrases):
+        # Nejdelsi prvni -> leftmost-longest shoda
+        self.phrases = sorted({p.lower() for p in phrases if p}, key=len, reverse=True)
+        alternation = '|'.join(re.escape(p) for p in self.phrases) or r'(?!)'
+        self.pattern = re.compile(r'(?<!\w)(?:' + alternation + r')(?!\w)')
+
+        # Kratsi fraze uvnitr delsi - vraci se spolu s ni
+        self.implied = {
+            phrase: [other for other in self.phrases
+                     if len(other) < len(phrase) and _contains_phrase(phrase, other)]
+            for phrase in self.phrases
+        }
+
+    def find(self, text):
+        """Vrati mnozinu vsech nalezenych frazi (vcetne implikovanych)"""
+        found = set()
+        for match in self.pattern.finditer(text):
+            phrase = match.group(0)
+            found.add(phrase)
+            found.update(self.implied[phrase])
+        return found
+
+    def sub(self, replace, text):
+        """Nahradi nalezene fraze funkci replace(phrase) v jednom pruchodu"""
+        return self.pattern.sub(lambda match: replace(match.group(0)), text)
+
+
+class PhraseReplacer:
+    """
+    Nahrazovani frazi v jednom pruchodu
+    Cil nahrady se predem dopocita do uzaveru ('jo jo' -> 'jo' -> 'ano'),
+    aby vysledek odpovidal postupnemu nahrazovani
+    """
+
+    MAX_DEPTH = 5
+
+    def __init__(self, replacements):
+        # Identicke nahrady ('víte' -> 'víte') nemaji smysl matchovat
+        replacements = {k.lower(): v for k, v in replacements.items() if k.lower() != v}
+        self.matcher = PhraseMatcher(replacements)
+
+        self.table = {}
+        for wrong, correct in replacements.items():
+            for _ in range(self.MAX_DEPTH):
+                resolved = self.matcher.sub(replacements.get, correct)
+                if resolved == correct:
+                    break
+                correct = resolved
+            self.table[wrong] = correct
+
+    def replace(self, text):
+        return self.matcher.sub(self.table.get, text)
+
+
+class IntentMatcher:
+    """
+    Skorovani intentu jednim pruchodem
+    keywords: {intent: {fraze: vaha}} -> {intent: max vaha nalezenych frazi}
+    """
+
+    def __init__(self, keywords):
+        self.weights = {}
+        for intent, phrases in keywords.items():
+            for phrase, weight in phrases.items():
+                self.weights.setdefault(phrase.lower(), []).append((intent, weight))
+        self.matcher = PhraseMatcher(self.weights)
+
+    def score(self, text):
+        scores = {}
+        for phrase in self.matcher.find(text):
+            for intent, weight in self.weights[phrase]:
+                if weight > scores.get(intent, 0.0):
+                    scores[intent] = weight
+        return scores
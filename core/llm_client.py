@@ -0,0 +1,286 @@
+"""
+Sdileny asynchronni LLM klient (OpenAI chat completions)
+- Jeden AsyncOpenAI klient s poolem keep-alive spojeni pro cely proces
+  (AIEngine, shrnuti hovoru, CallReporter)
+- Deadline na kazde volani vcetne cekani ve fronte a retry
+  (tah hovoru musi stihnout Twilio webhook timeout 15s i s TTS)
+- Omezena paralelita pres semafor
+- Retry s exponencialnim backoffem a nahodnym jitterem jen na docasne chyby
+  (429, 5xx, spojeni) a jen dokud zbyva cas do deadline
+- Hedging: kdyz nedorazi prvni token do X ms, spusti se duplicitni request
+  (pripadne levnejsim modelem), vyhraje kdo prvni zacne odpovidat, druhy se hned
+  zrusi (spadly stream viteze -> jeden retry bez hedgingu)
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+
+import httpx
+import openai
+
+from config import Config
+from .async_loop import get_background_loop
+
+# Docasne chyby - ma smysl je zkusit znovu
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # vcetne APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMTimeoutError(Exception):
+    """LLM volani nestihlo deadline"""
+
+
+class LLMClient:
+    """Asynchronni klient pro OpenAI s pooled spojenimi"""
+
+    def __init__(self, api_key=None, base_url=None, model=None, timeout=None,
+                 max_concurrency=None, pool_size=None, max_retries=None):
+        self.api_key = api_key or Config.OPENAI_API_KEY
+        self.base_url = base_url or Config.OPENAI_BASE_URL or None
+        self.model = model or Config.OPENAI_MODEL
+        self.timeout = timeout or Config.LLM_TIMEOUT
+        self.max_concurrency = max_concurrency or Config.LLM_MAX_CONCURRENCY
+        self.pool_size = pool_size or Config.LLM_POOL_SIZE
+        self.max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+
+        self._loop = get_background_loop()
+        self._client = None
+        self._semaphore = None
+        self.stats = {'requests': 0, 'retries': 0, 'timeouts': 0, 'errors': 0,
+                      'hedged_calls': 0, 'hedges': 0, 'wins': {}}
+
+    def _ensure_client(self):
+        """Vytvori AsyncOpenAI klienta az uvnitr smycky (httpx pool se vaze na ni)"""
+        if self._client is None:
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key or 'missing',
+                base_url=self.base_url,
+                max_retries=0,  # Retry ridime sami (s ohledem na deadline)
+                http_client=httpx.AsyncClient(
+                    timeout=httpx.Timeout(self.timeout, connect=Config.LLM_CONNECT_TIMEOUT),
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size,
+                        keepalive_expiry=60.0,
+                    ),
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _backoff(self, attempt):
+        """Exponencialni backoff s plnym jitterem (retry z vice hovoru se nesesynchronizuji)"""
+        return random.uniform(0, Config.LLM_RETRY_BASE * (2 ** attempt))
+
+    async def _create(self, ends_at, params):
+        client = self._ensure_client()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    self.stats['requests'] += 1
+                    return await client.chat.completions.create(**params)
+            except RETRYABLE_ERRORS as e:
+                delay = self._backoff(attempt)
+                # Dalsi pokus jen kdyz po backoffu jeste zbyva rozumny cas
+                if attempt >= self.max_retries or time.monotonic() + delay + 0.5 > ends_at:
+                    raise
+                attempt += 1
+                self.stats['retries'] += 1
+                print(f"  🔁 LLM retry {attempt}/{self.max_retries} za {delay:.2f}s "
+                      f"({type(e).__name__})")
+                await asyncio.sleep(delay)
+
+    async def complete(self, messages, timeout=None, model=None, **params):
+        """
+        Chat completion (async) - vraci cely response objekt (choices, usage)
+
+        Raises:
+            LLMTimeoutError pokud volani (vcetne retry) nestihne deadline
+        """
+        deadline = timeout or self.timeout
+        params = {'model': model or self.model, 'messages': messages, **params}
+        try:
+            return await asyncio.wait_for(self._create(time.monotonic() + deadline, params), deadline)
+        except (asyncio.TimeoutError, openai.APITimeoutError):
+            self.stats['timeouts'] += 1
+            raise LLMTimeoutError(f"LLM deadline {deadline}s vyprsel")
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+
+    def complete_sync(self, messages, timeout=None, model=None, **params):
+        """Blokujici varianta pro Flask vlakna - bezi na sdilene smycce"""
+        deadline = timeout or self.timeout
+        return self._loop.run(
+            self.complete(messages, timeout=deadline, model=model, **params),
+            timeout=deadline + 1.0,
+        )
+
+    async def _stream_once(self, params, on_first_token):
+        """Jeden streamovany pokus - posklada odpoved, zavola on_first_token u prvniho tokenu"""
+        client = self._ensure_client()
+        async with self._semaphore:
+            self.stats['requests'] += 1
+            stream = await client.chat.completions.create(
+                **params, stream=True, stream_options={'include_usage': True}
+            )
+            parts = []
+            usage = None
+            try:
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if not parts:
+                            on_first_token()
+                        parts.append(chunk.choices[0].delta.content)
+            finally:
+                # Zruseny pokus zavre spojeni -> provider prestane generovat
+                await stream.close()
+        return {'content': ''.join(parts), 'usage': usage, 'model': params['model']}
+
+    async def _race(self, params, hedge_after, hedge_model):
+        """Primarni request + po hedge_after s bez prvniho tokenu duplicitni (hedge)"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = loop.create_future()  # label pokusu, ktery prvni zacal odpovidat
+        attempts = {}  # task -> label
+        hedged = False
+        last_error = None
+
+        def launch(label, attempt_params):
+            def on_first_token():
+                if not first.done():
+                    first.set_result((label, loop.time() - started))
+            task = asyncio.ensure_future(self._stream_once(attempt_params, on_first_token))
+            attempts[task] = label
+
+        def hedge():
+            self.stats['hedges'] += 1
+            launch('hedge', {**params, 'model': hedge_model or params['model']})
+
+        launch('primary', params)
+        try:
+            while True:
+                timeout = None if hedged else max(0.0, started + hedge_after - loop.time())
+                done, _ = await asyncio.wait([first, *attempts], timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if first.done():
+                    label, first_token = first.result()
+                    winner = next(task for task, name in attempts.items() if name == label)
+                    break
+
+                if not done:
+                    # Hedge - primarni request jeste nevratil prvni token
+                    hedged = True
+                    hedge()
+                    print(f"  🏁 LLM hedge po {hedge_after * 1000:.0f} ms"
+                          + (f" ({hedge_model})" if hedge_model else ""))
+                    continue
+
+                finished = [task for task in done if task is not first]
+                for task in finished:
+                    label = attempts.pop(task)
+                    if task.exception() is None:
+                        # Dokonceno bez jedineho tokenu (prazdna odpoved)
+                        winner, first_token = task, loop.time() - started
+                        attempts[task] = label
+                        break
+                    last_error = task.exception()
+                    print(f"  ⚠️  LLM {label} selhal: {type(last_error).__name__}")
+                else:
+                    if not attempts:
+                        if hedged:
+                            raise last_error
+                        # Primarni selhal driv nez vyprsel hedge - zkus hned duplikat
+                        hedged = True
+                        hedge()
+                    continue
+                break
+
+            # Ostatni pokusy zrusit hned po prvnim tokenu viteze (neplatit dvojite generovani)
+            for task in list(attempts):
+                if task is not winner:
+                    task.cancel()
+                    del attempts[task]
+
+            try:
+                result = await winner
+            except Exception as e:
+                label = attempts.pop(winner)
+                print(f"  ⚠️  LLM {label} selhal po prvnim tokenu: {type(e).__name__}")
+                # Jeden retry bez hedgingu (v ramci deadline)
+                winner = asyncio.ensure_future(self._stream_once(params, lambda: None))
+                attempts[winner] = 'retry'
+                result = await winner
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+        label = attempts[winner]
+        if hedged:
+            self.stats['hedged_calls'] += 1
+        self.stats['wins'][label] = self.stats['wins'].get(label, 0) + 1
+        return {**result, 'hedged': hedged, 'winner': label, 'first_token': first_token}
+
+    async def complete_hedged(self, messages, hedge_after, hedge_model=None, timeout=None,
+                              model=None, **params):
+        """
+        Streamovany chat completion s hedgingem (async)
+
+        Returns:
+            {'content', 'usage', 'model', 'hedged', 'winner': 'primary'|'hedge'|'retry',
+             'first_token': s}
+
+        Raises:
+            LLMTimeoutError pokud ani jeden pokus nestihne deadline
+        """
+        deadline = timeout or self.timeout
+        params = {'model': model or self.model, 'messages': messages, **params}
+        try:
+            return await asyncio.wait_for(self._race(params, hedge_after, hedge_model), deadline)
+        except (asyncio.TimeoutError, openai.APITimeoutError):
+            self.stats['timeouts'] += 1
+            raise LLMTimeoutError(f"LLM deadline {deadline}s vyprsel")
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+
+    async def aclose(self):
+        """Zavre pool spojeni"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+def latency_percentiles(samples):
+    """{'p50', 'p95', 'p99'} v ms (nearest-rank), prazdne vzorky -> nuly"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+    return {
+        f"p{p}": round(ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)] * 1000, 1)
+        for p in (50, 95, 99)
+    }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Vrati sdileneho LLM klienta pro cely proces"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient()
+    return _client
@@ -0,0 +1,198 @@
+"""
+STT backendy - spolecne rozhrani pro prepis reci
+- openai: Whisper API (whisper-1) - sit, plati se za minutu
+- local: faster-whisper na CPU (offline, cestina) - testy, load testy, archivy nahravek
+- stand_in: pevny text s nastavitelnou latenci - benchmarky pipeline bez modelu
+
+Kazdy backend umi:
+- transcribe(pcm, rate) - jedna replika
+- transcribe_batch([pcm, ...], rate) - vic replik najednou (paralelne)
+- stream(chunks, rate) - prubezny prepis po kouscich audia (partial -> final)
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import Config
+from .audio_encoding import encode_audio
+
+WHISPER_RATE = 16000
+
+
+class STTBackendError(Exception):
+    """Backend nejde pouzit (chybi model / knihovna)"""
+
+
+class STTBackend:
+    """Zakladni rozhrani STT backendu - audio = raw 16-bit mono PCM"""
+
+    name = 'base'
+
+    def __init__(self, batch_concurrency=None):
+        self.batch_concurrency = batch_concurrency or Config.STT_BATCH_CONCURRENCY
+
+    def transcribe(self, pcm, rate=WHISPER_RATE):
+        """Prepis jedne repliky -> text ('' kdyz nic)"""
+        raise NotImplementedError
+
+    def transcribe_batch(self, clips, rate=WHISPER_RATE):
+        """Prepis vice replik - paralelne po batch_concurrency, vysledky ve stejnem poradi"""
+        if not clips:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.batch_concurrency, len(clips))) as pool:
+            return list(pool.map(lambda pcm: self.transcribe(pcm, rate), clips))
+
+    def stream(self, chunks, rate=WHISPER_RATE, interval=None):
+        """
+        Prubezny prepis - audio prichazi po kouscich (capture, media stream)
+        Kazdych 'interval' sekund audia prepise vse dosud prijate
+
+        Yields:
+            (text, is_final) - posledni je vzdy final z celeho audia
+        """
+        interval = interval or Config.STT_STREAM_INTERVAL
+        interval_bytes = int(interval * rate) * 2
+        audio = bytearray()
+        since_partial = 0
+        text = ''
+        for chunk in chunks:
+            audio += chunk
+            since_partial += len(chunk)
+            if since_partial >= interval_bytes:
+                since_partial = 0
+                text = self.transcribe(bytes(audio), rate)
+                yield text, False
+        if since_partial or not audio:
+            text = self.transcribe(bytes(audio), rate) if audio else ''
+        yield text, True
+
+
+class OpenAIWhisperBackend(STTBackend):
+    """Whisper API - upload z pameti ve formatu Config.STT_UPLOAD_FORMAT"""
+
+    name = 'openai'
+
+    def __init__(self, client=None, model='whisper-1', **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.client = client
+        self.model = model
+
+    def transcribe(self, pcm, rate=WHISPER_RATE):
+        upload = encode_audio(pcm, rate, Config.STT_UPLOAD_FORMAT)
+        transcript = self.client.audio.transcriptions.create(
+            model=self.model,
+            file=upload,
+            language="cs",  # Czech!
+            temperature=0.0  # Presneji rozpoznavat
+        )
+        return transcript.text.strip()
+
+
+class LocalWhisperBackend(STTBackend):
+    """
+    Offline CPU prepis pres faster-whisper (CTranslate2, int8)
+    Model se nacte pri prvnim prepisu; num_workers = paralelni prepisy v transcribe_batch
+    """
+
+    name = 'local'
+
+    def __init__(self, model_size=None, device=None, compute_type=None, beam_size=None, **kwargs):
+        super().__init__(**kwargs)
+        self.model_size = model_size or Config.LOCAL_STT_MODEL
+        self.device = device or Config.LOCAL_STT_DEVICE
+        self.compute_type = compute_type or Config.LOCAL_STT_COMPUTE_TYPE
+        self.beam_size = beam_size or Config.LOCAL_STT_BEAM_SIZE
+        self._model = None
+
+    @classmethod
+    def is_available(cls):
+        try:
+            import faster_whisper  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _get_model(self):
+        if self._model is None:
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError:
+                raise STTBackendError("faster-whisper neni nainstalovany (pip install faster-whisper)")
+            print(f"[LocalWhisper] Nacitam model {self.model_size} ({self.device}, {self.compute_type})...")
+            started = time.perf_counter()
+            self._model = WhisperModel(
+                self.model_size,
+                device=self.device,
+                compute_type=self.compute_type,
+                num_workers=self.batch_concurrency,
+            )
+            print(f"  ✅ Model nacten za {time.perf_counter() - started:.1f}s")
+        return self._model
+
+    @staticmethod
+    def _to_float(pcm, rate):
+        """16-bit PCM -> float32 16 kHz (Whisper); jina frekvence se linearne prevzorkuje"""
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if rate != WHISPER_RATE and len(audio):
+            target = np.arange(int(len(audio) * WHISPER_RATE / rate)) * (rate / WHISPER_RATE)
+            audio = np.interp(target, np.arange(len(audio)), audio).astype(np.float32)
+        return audio
+
+    def transcribe(self, pcm, rate=WHISPER_RATE):
+        audio = self._to_float(pcm, rate)
+        if not len(audio):
+            return ''
+        segments, _ = self._get_model().transcribe(
+            audio,
+            language="cs",
+            beam_size=self.beam_size,
+            temperature=0.0,
+            condition_on_previous_text=False,  # Kratke repliky - mene halucinaci
+        )
+        return ''.join(segment.text for segment in segments).strip()
+
+    def transcribe_batch(self, clips, rate=WHISPER_RATE):
+        self._get_model()  # Nacist jednou pred spustenim vlaken
+        return super().transcribe_batch(clips, rate)
+
+
+class StandInBackend(STTBackend):
+    """
+    Lokalni nahrada prepisu pro testy a load testy pipeline
+    Vraci pevny text po latenci 'delay' + 'per_second' za kazdou sekundu audia
+    """
+
+    def __init__(self, name='stand_in', text='Dobrý den, o co jde?', delay=0.0, per_second=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.text = text
+        self.delay = delay
+        self.per_second = per_second
+        self.calls = 0
+
+    def transcribe(self, pcm, rate=WHISPER_RATE):
+        self.calls += 1
+        time.sleep(self.delay + self.per_second * len(pcm) / (2.0 * rate))
+        return self.text if pcm else ''
+
+
+BACKEND_CLASSES = {
+    'openai': OpenAIWhisperBackend,
+    'local': LocalWhisperBackend,
+    'stand_in': StandInBackend,
+}
+
+
+def build_backend(name=None):
+    """Vytvori STT backend podle jmena (default Config.STT_BACKEND)"""
+    name = (name or Config.STT_BACKEND).strip()
+    if name not in BACKEND_CLASSES:
+        raise STTBackendError(f"Neznamy STT backend '{name}' ({', '.join(BACKEND_CLASSES)})")
+    if name == 'local' and not LocalWhisperBackend.is_available():
+        raise STTBackendError("Lokalni STT potrebuje faster-whisper (pip install faster-whisper)")
+    return BACKEND_CLASSES[name]()
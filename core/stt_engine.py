@@ -4,23 +4,147 @@ Prevadi rec na text pomoci OpenAI Whisper
 VYLEPŠENO: Voice Activity Detection, Noise Gate, Audio Enhancement
 """
 
-import tempfile
-import wave
-import pyaudio
+from collections import deque
 import numpy as np
-from openai import OpenAI
-from config import Config
-import struct
+from .audio_capture import CaptureSession, MicrophoneSource
+from .stt_backends import build_backend
+from .stt_filters import apply_text_filters, gate_utterance
+
+
+class SpeechEndpointer:
+    """
+    Endpointing po framech - nahravka zacina nastupem reci a konci po tichu
+    Nezavisle na zdroji audia (mikrofon, media stream) - frame je 16-bit PCM
+
+    Stavy: WAITING (ceka na rec) -> SPEECH (nahrava) -> DONE (predat k prepisu)
+    """
+
+    WAITING = 'waiting'
+    SPEECH = 'speech'
+    DONE = 'done'
+
+    def __init__(self, rate=16000, min_speech=0.3, trailing_silence=0.5,
+                 pre_roll=0.3, max_duration=None, max_wait=None):
+        """
+        Args:
+            min_speech: Souvisla rec (s) nutna pro nastup - kratsi lusknuti se ignoruje
+            trailing_silence: Ticho (s) po reci = konec repliky
+            pre_roll: Audio (s) pred nastupem, ktere se prida na zacatek (neorezat 1. slabiku)
+            max_duration: Max delka repliky (s), None = bez limitu
+            max_wait: Max cekani na nastup reci (s), None = bez limitu
+        """
+        self.rate = rate
+        self.min_speech = min_speech
+        self.trailing_silence = trailing_silence
+        self.pre_roll = pre_roll
+        self.max_duration = max_duration
+        self.max_wait = max_wait
+        self.reset()
+
+    def reset(self):
+        self.state = self.WAITING
+        self.frames = []
+        self._pending = deque()  # (frame, delka) pred nastupem
+        self._pending_duration = 0.0
+        self._speech_run = 0.0  # Souvisla rec pred nastupem (s)
+        self._silence_run = 0.0  # Ticho od posledni reci (s)
+        self.waited = 0.0
+        self.consumed = 0.0  # Vsechno audio predane do feed() (s)
+        self.duration = 0.0
+        self.lead_in = 0.0  # Pre-roll na zacatku nahravky pred nastupem reci (s)
+        self.speech_duration = 0.0
+        self.voiced_span = 0.0  # Od nastupu po posledni rec (bez pre-roll a koncoveho ticha)
+        self.timed_out = False
+
+    def feed(self, frame, is_speech):
+        """
+        Zpracuje 1 frame
+
+        Args:
+            frame: Raw 16-bit PCM
+            is_speech: Vysledek VAD pro frame
+
+        Returns:
+            str: Aktualni stav (DONE = replika hotova / vyprsel cas)
+        """
+        if self.state == self.DONE:
+            return self.state
+
+        frame_duration = len(frame) / (2.0 * self.rate)
+        self.consumed += frame_duration
+
+        if self.state == self.WAITING:
+            self.waited += frame_duration
+            self._pending.append((frame, frame_duration))
+            self._pending_duration += frame_duration
+            self._speech_run = self._speech_run + frame_duration if is_speech else 0.0
+
+            if self._speech_run >= self.min_speech:
+                # Nastup reci - pre-roll + souvisly usek reci
+                self.state = self.SPEECH
+                self.frames = [f for f, _ in self._pending]
+                self.duration = self._pending_duration
+                self.lead_in = self._pending_duration - self._speech_run
+                self.speech_duration = self._speech_run
+                self.voiced_span = self._speech_run
+                self._pending.clear()
+                return self.state
+
+            # Drz jen pre-roll + rozbehnuty usek reci
+            while self._pending and self._pending_duration - self._pending[0][1] >= self.pre_roll + self._speech_run:
+                self._pending_duration -= self._pending.popleft()[1]
+
+            if self.max_wait is not None and self.waited >= self.max_wait:
+                self.state = self.DONE
+                self.timed_out = True
+            return self.state
+
+        # SPEECH
+        self.frames.append(frame)
+        self.duration += frame_duration
+        if is_speech:
+            self.speech_duration += frame_duration
+            self.voiced_span += self._silence_run + frame_duration
+            self._silence_run = 0.0
+        else:
+            self._silence_run += frame_duration
+
+        if self._silence_run >= self.trailing_silence:
+            self.state = self.DONE
+        elif self.max_duration is not None and self.duration >= self.max_duration:
+            self.state = self.DONE
+        return self.state
+
+    @property
+    def has_speech(self):
+        return bool(self.frames)
+
+    @property
+    def audio(self):
+        return b''.join(self.frames)
+
+    @property
+    def speech_percentage(self):
+        """Podil reci v useku od nastupu po posledni rec (pauzy mezi slovy)"""
+        if self.voiced_span <= 0:
+            return 0.0
+        return min(100.0, self.speech_duration / self.voiced_span * 100)
 
 
 class STTEngine:
     """Engine pro rozpoznavani reci s audio procesovani"""
     
-    def __init__(self):
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
-        self.rate = 16000
-        self.chunk = 1024
-        self.format = pyaudio.paInt16
+    def __init__(self, source=None, backend=None):
+        """
+        source: AudioSource (mikrofon, WAV soubor, sitove framy) - None = mikrofon
+        Zdroj se otevre pri prvnim listen() a drzi se otevreny (close() ho zavre)
+        backend: STTBackend (Whisper API, lokalni faster-whisper) - None = Config.STT_BACKEND
+        """
+        self.backend = backend or build_backend()
+        self.source = source
+        self.session = None
+        self.rate = source.rate if source else 16000
+        self.chunk = source.chunk if source else 1024
         self.channels = 1
         
         # Audio processing parameters
@@ -28,6 +152,21 @@ class STTEngine:
         self.vad_sensitivity = 0.3  # 0-1 (0.3 = citlivy)
         self.min_speech_duration = 0.3  # sec (min doba reci)
         self.silence_threshold = 0.5  # sec (ticho = konec)
+        self.pre_roll = 0.3  # sec (audio pred nastupem reci - neorezat 1. slabiku)
+        self.gain_attack = 0.01  # sec (pokles zesileni - rychle, at hlasity nastup neclipuje)
+        self.gain_release = 0.15  # sec (narust zesileni - pomalu, bez "pumpovani")
+        self.read_timeout = 2.0  # sec (zadny frame ze zdroje -> konec cteni)
+        self.show_progress = True  # Tecky/pomlcky behem nahravani repliky
+        self.stats = {'utterances': 0, 'gated': 0, 'transcribed': 0, 'filtered': 0}
+        
+        # Spektralni potlaceni sumu (STFT) - profil sumu z uvodu nahravky, adaptivne v pauzach
+        self.noise_suppression = True
+        self.stft_size = 512  # vzorku (32 ms), hop = polovina
+        self.noise_init_time = 0.25  # sec (uvodni framy bez reci -> pocatecni profil sumu)
+        self.noise_adapt_time = 0.5  # sec (casova konstanta aktualizace profilu)
+        self.noise_speech_ratio = 2.0  # Frame s energii > 2x sum = rec, profil se neaktualizuje
+        self.noise_oversubtract = 2.0  # Nadmerne odecteni (mene zbytkoveho sumu)
+        self.noise_floor = 0.1  # Min. zesileni binu (-20 dB) - proti "hudebnimu sumu"
     
     def _bytes_to_np(self, audio_bytes):
         """Konvertuj raw bytes na numpy array (16-bit audio)"""
@@ -87,10 +226,9 @@ class STTEngine:
     
     def _apply_noise_reduction(self, audio_bytes):
         """
-        Jednoducha sumu redukce:
-        - Detekuj tisty sumu
-        - Odecti ho z signalu
-        (Spectral Subtraction light version)
+        Jednoducha sumu redukce po framech:
+        - Tichy frame (RMS < 0.1) ztlum na 50 %
+        (skutecne spektralni odecitani sumu je _suppress_noise)
         """
         audio = self._bytes_to_np(audio_bytes)
         
@@ -149,126 +287,288 @@ class STTEngine:
         
         return enhanced
     
-    def listen(self, duration=5):
+    def _frame_rms(self, audio):
         """
-        Nahraje audio a prevede na text
-        VYLEPŠENO: Voice Activity Detection, Noise Processing
-        
+        RMS po framech (self.chunk) pres strided view - bez kopie celeho bufferu
+        Posledni neuplny frame se pocita zvlast
+        """
+        n_full = len(audio) // self.chunk
+        frames = np.lib.stride_tricks.as_strided(
+            audio, shape=(n_full, self.chunk),
+            strides=(audio.strides[0] * self.chunk, audio.strides[0]),
+            writeable=False,
+        )
+        rms = np.sqrt(np.einsum('ij,ij->i', frames, frames) / self.chunk)
+        tail = audio[n_full * self.chunk:]
+        if len(tail):
+            rms = np.append(rms, np.sqrt(np.mean(tail ** 2)))
+        return rms
+
+    def _smooth_gain(self, gain):
+        """Obalka zesileni po framech - rychly pokles (attack), pomaly narust (release)"""
+        frame_duration = self.chunk / self.rate
+        attack = 1 - np.exp(-frame_duration / self.gain_attack)
+        release = 1 - np.exp(-frame_duration / self.gain_release)
+
+        smoothed = np.empty_like(gain)
+        current = gain[0]
+        for i, target in enumerate(gain):
+            coef = attack if target < current else release
+            current += coef * (target - current)
+            smoothed[i] = current
+        return smoothed
+
+    def _track_noise(self, power):
+        """
+        Odhad vykonoveho spektra sumu pro kazdy STFT frame
+        Start: median uvodnich framu (pre-roll pred nastupem reci), shora omezeny
+        nejtissimi framy nahravky (kdyby nahravka zacinala rovnou reci).
+        Dal se profil aktualizuje jen z framu, ktere vypadaji jako sum.
+        """
+        hop = self.stft_size // 2
+        init = max(1, int(self.noise_init_time * self.rate / hop))
+        total = power.sum(axis=1)
+        quietest = np.argsort(total)[:max(1, len(total) // 10)]
+        noise = np.minimum(np.median(power[:init], axis=0), power[quietest].mean(axis=0))
+
+        # Aktualizace po blocich (noise_init_time) - smycka ~4x za sekundu audia, ne pro kazdy frame
+        alpha = np.exp(-hop / self.rate / self.noise_adapt_time)
+        estimate = np.empty_like(power)
+        for start in range(0, len(power), init):
+            block = slice(start, start + init)
+            is_noise = total[block] < noise.sum() * self.noise_speech_ratio
+            count = int(is_noise.sum())
+            if count:
+                # Ekvivalent 'count' kroku noise = alpha * noise + (1 - alpha) * frame (s prumerem bloku)
+                weight = 1 - alpha ** count
+                noise = noise * (1 - weight) + weight * power[block][is_noise].mean(axis=0)
+            estimate[block] = noise
+        return estimate
+
+    def _suppress_noise(self, audio):
+        """
+        Spektralni odecitani sumu (STFT + overlap-add) - in-place nad float32 polem
+        sqrt-Hann okno, 50% prekryv; FFT vsech framu najednou (strided view)
+
         Args:
-            duration: Delka nahravani v sekundach
-            
+            audio: float32 pole (-1..1), prepise se
+
+        Returns:
+            audio
+        """
+        size = self.stft_size
+        hop = size // 2
+        if len(audio) < size:
+            return audio
+
+        window = np.sqrt(np.hanning(size + 1)[:-1]).astype(np.float32)  # Periodicke - analyza i synteza
+        n_frames = -(-len(audio) // hop) + 1
+        padded = np.zeros((n_frames + 1) * hop, dtype=np.float32)
+        padded[hop:hop + len(audio)] = audio
+        frames = np.lib.stride_tricks.as_strided(
+            padded, shape=(n_frames, size),
+            strides=(padded.strides[0] * hop, padded.strides[0]),
+            writeable=False,
+        )
+
+        spectrum = np.fft.rfft(frames * window, axis=1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        noise = self._track_noise(power)
+
+        # Zesileni binu: sqrt(1 - k * sum/signal), min noise_floor
+        gain = noise
+        gain *= -self.noise_oversubtract
+        gain /= power + 1e-12
+        gain += 1.0
+        np.maximum(gain, self.noise_floor ** 2, out=gain)
+        np.sqrt(gain, out=gain)
+        # Vyhlazeni v case (1-2-1) - mene "hudebniho sumu"
+        gain[1:-1] = (gain[:-2] + 2 * gain[1:-1] + gain[2:]) / 4
+
+        spectrum *= gain
+        output = np.fft.irfft(spectrum, n=size, axis=1).astype(np.float32)
+        output *= window
+
+        # Overlap-add: prvni polovina framu do radku i, druha do i+1
+        result = np.zeros_like(padded).reshape(-1, hop)
+        result[:-1] += output[:, :hop]
+        result[1:] += output[:, hop:]
+        audio[:] = result.ravel()[hop:hop + len(audio)]
+        return audio
+
+    def _enhance_buffer(self, audio_bytes, target_db=-20):
+        """
+        Enhancement cele nahravky najednou (misto _enhance_audio po framech)
+        Kroky - spektralni potlaceni sumu, noise gate, amplifikace:
+        - 1 konverze int16 -> float32 -> int16 pro cely buffer
+        - RMS po framech jednou (strided view), gainy kroku se jen nasobi
+        - vyhlazena obalka zesileni interpolovana na vzorky (bez skoku mezi framy)
+        - operace in-place na jednom poli
+
+        Args:
+            audio_bytes: Raw 16-bit PCM (libovolna delka)
+            target_db: Cilova hlasitost v dB
+
+        Returns:
+            bytes: Upravene 16-bit PCM
+        """
+        audio = self._bytes_to_np(audio_bytes)
+        if not len(audio):
+            return audio_bytes
+
+        # 0. Spektralni potlaceni sumu - pred merenim urovni, gate rozhoduje nad cistsim signalem
+        if self.noise_suppression:
+            self._suppress_noise(audio)
+
+        rms = self._frame_rms(audio)
+        with np.errstate(divide='ignore'):
+            level_db = np.where(rms > 0, 20 * np.log10(rms), -100.0)
+
+        # 1. Noise gate - frame pod prahem na 10 %
+        gain = np.where(level_db < self.noise_gate_threshold, 0.1, 1.0)
+
+        # 2. Noise reduction bez spektralniho potlaceni - tichy frame (po gate) na 50 %
+        if not self.noise_suppression:
+            gain *= np.where(rms * gain < 0.1, 0.5, 1.0)
+
+        # 3. Amplifikace na target_db (0.5x - 4x) z urovne po krocich 1 a 2
+        with np.errstate(divide='ignore'):
+            gated_db = np.where(rms > 0, 20 * np.log10(rms * gain), -100.0)
+        gain *= np.clip(10 ** ((target_db - gated_db) / 20.0), 0.5, 4.0)
+
+        # Vyhlazena obalka -> zesileni pro kazdy vzorek (linearni interpolace mezi stredy framu)
+        # (stredy framu jsou ekvidistantni -> usek mezi sousednimi stredy = 1 radek rampy, bez np.interp)
+        gain = self._smooth_gain(gain).astype(np.float32)
+        half = self.chunk // 2
+        ramp = np.arange(self.chunk, dtype=np.float32) / self.chunk
+        segments = np.diff(gain)[:, None] * ramp
+        segments += gain[:-1, None]
+
+        sample_gain = np.empty(len(audio), dtype=np.float32)
+        sample_gain[:half] = gain[0]
+        body = sample_gain[half:half + segments.size]
+        body[:] = segments.ravel()[:len(body)]
+        sample_gain[half + segments.size:] = gain[-1]
+
+        audio *= sample_gain
+        np.clip(audio, -1.0, 1.0, out=audio)
+        audio *= 32767.0
+        return audio.astype(np.int16).tobytes()
+
+    def _get_session(self):
+        """Capture session - otevre zdroj jen poprve, dal se cte z ring bufferu"""
+        if self.session is None:
+            source = self.source or MicrophoneSource(self.rate, self.chunk)
+            self.session = CaptureSession(source).start()
+        return self.session
+
+    def close(self):
+        """Zavre zdroj audia (mikrofon)"""
+        if self.session is not None:
+            self.session.stop()
+            self.session = None
+
+    def record_utterance(self, max_duration=15, max_wait=10, flush=False):
+        """
+        Precte jednu repliku z capture session s endpointingem
+        Zacne nastupem reci, skonci po silence_threshold ticha - audio se predava hned
+
+        Args:
+            max_duration: Max delka repliky (s)
+            max_wait: Max cekani na nastup reci (s)
+            flush: Zahodit audio zachycene pred volanim (napr. prehravana odpoved AI)
+
+        Returns:
+            SpeechEndpointer (frames, duration, speech_percentage, timed_out)
+        """
+        endpointer = SpeechEndpointer(
+            rate=self.rate,
+            min_speech=self.min_speech_duration,
+            trailing_silence=self.silence_threshold,
+            pre_roll=self.pre_roll,
+            max_duration=max_duration,
+            max_wait=max_wait,
+        )
+
+        session = self._get_session()
+        if flush:
+            session.flush()
+
+        while endpointer.state != SpeechEndpointer.DONE:
+            data = session.read(timeout=self.read_timeout)
+            if data is None:
+                break  # Zdroj skoncil (konec souboru / streamu) nebo se zasekl
+            is_speech = self._detect_voice_activity(data)
+            state = endpointer.feed(data, is_speech)
+
+            if state == SpeechEndpointer.SPEECH and self.show_progress:
+                print("." if is_speech else "-", end="", flush=True)
+
+        return endpointer
+
+    def transcribe(self, pcm):
+        """
+        Prepis nahravky pres STT backend (Whisper API / lokalni model)
+
+        Args:
+            pcm: Raw 16-bit PCM (self.rate, mono)
+
+        Returns:
+            str: Rozpoznany text ('' kdyz nic)
+        """
+        print(f"Processing with {self.backend.name} STT (Czech, {len(pcm) / 2 / self.rate:.1f}s)...")
+        return self.backend.transcribe(pcm, self.rate)
+
+    def transcribe_many(self, clips):
+        """Prepis vice nahravek najednou (batch backendu) - vysledky ve stejnem poradi"""
+        return self.backend.transcribe_batch(clips, self.rate)
+
+    def listen(self, duration=15, max_wait=10, flush=None):
+        """
+        Nahraje repliku a prevede na text
+        VYLEPŠENO: Endpointing (nastup reci -> ticho), Noise Processing,
+        VAD gating pred uploadem + textove post-filtry
+
+        Args:
+            duration: Max delka repliky v sekundach (konci driv, jakmile mluvci domluvi)
+            max_wait: Max cekani na nastup reci v sekundach
+            flush: Zahodit audio pred volanim - None = jen u mikrofonu (ozvena vlastni odpovedi)
+
         Returns:
             str: Rozpoznany text
         """
-        print(f"Listening {duration}s (with noise processing)...")
-        
-        audio_interface = pyaudio.PyAudio()
-        
+        if flush is None:
+            flush = self.source is None or isinstance(self.source, MicrophoneSource)
+        print(f"Listening (max {duration}s, end after {self.silence_threshold}s silence)...")
+
         try:
-            # Nahravani
-            stream = audio_interface.open(
-                format=self.format,
-                channels=self.channels,
-                rate=self.rate,
-                input=True,
-                frames_per_buffer=self.chunk
-            )
-            
-            frames = []
-            speech_detected_frames = 0
-            max_frames = int(self.rate / self.chunk * duration)
-            
-            for i in range(0, max_frames):
-                data = stream.read(self.chunk, exception_on_overflow=False)
-                frames.append(data)
-                
-                # VAD - detekuj kdy je rec
-                is_speech = self._detect_voice_activity(data)
-                
-                if is_speech:
-                    speech_detected_frames += 1
-                    print(".", end="", flush=True)
-                else:
-                    print("-", end="", flush=True)
-            
-            print(" OK")
-            
-            stream.stop_stream()
-            stream.close()
-            
-            # Ulozeni do docasneho souboru (s audio enhancement)
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp:
-                temp_path = temp.name
-                
-                wf = wave.open(temp_path, 'wb')
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(audio_interface.get_sample_size(self.format))
-                wf.setframerate(self.rate)
-                
-                # Aplikuj audio enhancement na kazdy frame
-                enhanced_frames = []
-                for frame in frames:
-                    enhanced = self._enhance_audio(frame)
-                    enhanced_frames.append(enhanced)
-                
-                wf.writeframes(b''.join(enhanced_frames))
-                wf.close()
-            
-            # Prepis pomoci Whisper
-            print("Processing with Whisper (Czech, no translation)...")
-            
-            with open(temp_path, 'rb') as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="cs",  # Czech!
-                    temperature=0.0  # Presneji rozpoznavat
-                )
-            
-            # Smazani docasneho souboru
-            import os
-            os.unlink(temp_path)
-            
-            text = transcript.text.strip()
-            
-            # Info o detekci
-            speech_percentage = (speech_detected_frames / max_frames) * 100
-            print(f"Speech detected: {speech_percentage:.1f}%")
-            print(f"Recognized: '{text}'")
-            
-            # ✅ NOVÉ: Agresivní halucinace prevence
-            
-            # 1. Pokud je málo řeči (<30%), vrátit None
-            if speech_percentage < 30:
-                print(f"  ⚠️  Málo řeči ({speech_percentage:.1f}%) - ignoruji")
+            endpointer = self.record_utterance(max_duration=duration, max_wait=max_wait, flush=flush)
+
+            self.stats['utterances'] += 1
+            if endpointer.has_speech:
+                print(f" OK ({endpointer.duration:.1f}s, speech {endpointer.speech_percentage:.1f}%)")
+
+            # ✅ Levné filtry PŘED uploadem - málo řeči = žádné API volání
+            reason = gate_utterance(endpointer)
+            if reason:
+                self.stats['gated'] += 1
+                print(f"  ⚠️  {reason} - ignoruji (bez přepisu)")
                 return None
-            
-            # 2. Pokud je výstup nesmyslný - detekuj halucinaci
-            # Halucinace znaky: krátký text, anglické slova bez diakritiky
-            if text and len(text) < 5:
-                # Příliš krátko - pravděpodobně halucinace
-                print(f"  ⚠️  Text příliš krátký '{text}' - ignoruji")
+
+            # Audio enhancement + prepis (v pameti, bez docasneho souboru)
+            self.stats['transcribed'] += 1
+            text = self.transcribe(self._enhance_buffer(endpointer.audio))
+            print(f"Recognized: '{text}'")
+
+            # Post-filtry textu (halucinace) - Config.STT_TEXT_FILTERS
+            text, reason = apply_text_filters(text)
+            if reason:
+                self.stats['filtered'] += 1
+                print(f"  ⚠️  {reason} - ignoruji")
                 return None
-            
-            # 3. Detekuj anglické halucinace (slova bez diakritiky v českém kontextu)
-            czech_chars = set('áčďéěíľňóôřšťůúýž')
-            english_keywords = ['hello', 'thank', 'ok', 'yes', 'no', 'bye', 'call', 'please']
-            
-            if text:
-                text_lower = text.lower()
-                # Pokud obsahuje anglické slovo + žádné české znaky = halucinace
-                has_czech = any(c in text_lower for c in czech_chars)
-                has_english = any(keyword in text_lower for keyword in english_keywords)
-                
-                if has_english and not has_czech and len(text) < 20:
-                    print(f"  ⚠️  Anglická halucinace '{text}' - ignoruji")
-                    return None
-            
-            return text if text else None
+
+            return text
             
         except Exception as e:
             print(f"ERROR STT: {e}")
-            return None
-            
-        finally:
-            audio_interface.terminate()
\ No newline at end of file
+            return None
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Filtry STT - levne kontroly pred a po prepisu
+- gate_utterance: PRED uploadem, jen z VAD endpointeru - malo reci = zadne API volani
+- textove post-filtry: PO prepisu, zapinaji se jmeny v Config.STT_TEXT_FILTERS
+  (halucinace Whisperu na sumu: kratky text, anglicka slova, "titulky")
+"""
+
+import re
+
+from config import Config
+
+CZECH_CHARS = set('áčďéěíľňóôřšťůúýž')
+ENGLISH_KEYWORDS = ['hello', 'thank', 'ok', 'yes', 'no', 'bye', 'call', 'please']
+
+# Typicke halucinace Whisperu na tichu/sumu (podpisy titulku z trenovacich dat)
+# Cela replika, ne podretezec - "Máme web www.firma.cz" je platna odpoved
+KNOWN_HALLUCINATIONS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'titulky vytvořil\b.*',
+        r'(titulky|subtitles)\b.*\bamara\.org\b.*',
+        r'(www\.)?amara\.org\b.*',
+        r'subtitles by\b.*',
+    )
+]
+
+
+def gate_utterance(endpointer, min_speech_percent=None, min_speech_seconds=None):
+    """
+    Rozhodnuti pred uploadem - stoji za to repliku prepisovat?
+
+    Returns:
+        str: Duvod zamitnuti, None = prepsat
+    """
+    min_speech_percent = Config.STT_MIN_SPEECH_PERCENT if min_speech_percent is None else min_speech_percent
+    min_speech_seconds = Config.STT_MIN_SPEECH_SECONDS if min_speech_seconds is None else min_speech_seconds
+
+    if not endpointer.has_speech:
+        return "Žádná řeč"
+    if endpointer.speech_duration < min_speech_seconds:
+        return f"Málo řeči ({endpointer.speech_duration:.2f}s)"
+    if endpointer.speech_percentage < min_speech_percent:
+        return f"Málo řeči ({endpointer.speech_percentage:.1f}%)"
+    return None
+
+
+def filter_too_short(text):
+    """Příliš krátký text - pravděpodobně halucinace"""
+    if len(text) < 5:
+        return f"Text příliš krátký '{text}'"
+    return None
+
+
+def filter_english(text):
+    """Anglické slovo + žádné české znaky v krátkém textu = halucinace"""
+    text_lower = text.lower()
+    has_czech = any(c in text_lower for c in CZECH_CHARS)
+    has_english = any(keyword in text_lower for keyword in ENGLISH_KEYWORDS)
+    if has_english and not has_czech and len(text) < 20:
+        return f"Anglická halucinace '{text}'"
+    return None
+
+
+def filter_known_hallucinations(text):
+    """Známé fráze, které Whisper 'slyší' v tichu (celá replika)"""
+    stripped = text.strip(' \t\n.,!?…"\'')
+    for pattern in KNOWN_HALLUCINATIONS:
+        if pattern.fullmatch(stripped):
+            return f"Známá halucinace '{text}'"
+    return None
+
+
+TEXT_FILTERS = {
+    'too_short': filter_too_short,
+    'english': filter_english,
+    'known_hallucinations': filter_known_hallucinations,
+}
+
+
+def apply_text_filters(text, names=None):
+    """
+    Post-filtry prepisu v poradi z konfigurace
+
+    Returns:
+        (text nebo None, duvod zamitnuti nebo None)
+    """
+    if not text:
+        return None, "Prázdný přepis"
+    for name in names if names is not None else Config.STT_TEXT_FILTERS:
+        name = name.strip()
+        check = TEXT_FILTERS.get(name)
+        if check is None:
+            continue
+        reason = check(text)
+        if reason:
+            return None, reason
+    return text, None
@@ -0,0 +1,85 @@
+"""
+Pocitani tokenu pro rozpocet promptu
+- tiktoken (lokalni tokenizer modelu) pokud je nainstalovany a ma encoding
+- jinak odhad podle delky textu (cestina ~3 znaky na token)
+"""
+
+import math
+from functools import lru_cache
+
+from config import Config
+
+# Rezie jedne zpravy v chat formatu (role, oddelovace)
+MESSAGE_OVERHEAD = 4
+CHARS_PER_TOKEN = 3.0
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """tiktoken encoding pro model, None kdyz neni k dispozici (nainstalovany / stazeny)"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            try:
+                _encoding = tiktoken.encoding_for_model(Config.OPENAI_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding('o200k_base')
+        except Exception as e:
+            print(f"  ⚠️  tiktoken nedostupny ({type(e).__name__}: {e}) - "
+                  f"tokeny odhaduji ({CHARS_PER_TOKEN:.0f} znaky na token)")
+            _encoding = None
+    return _encoding
+
+
+def preload():
+    """
+    Nacte tokenizer pri startu serveru - tiktoken pri prvnim pouziti stahuje
+    BPE soubor, coz by jinak zdrzelo prvni tah hovoru
+    Returns: jmeno tokenizeru ('odhad' pri fallbacku)
+    """
+    name = tokenizer_name()
+    if name != 'odhad':
+        print(f"  ✅ Tokenizer {name} nacten")
+    return name
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text):
+    """Pocet tokenu textu (vysledek se cachuje - historie se pocita opakovane)"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_tokens(text, max_tokens, keep_end=False):
+    """Zkrati text na max_tokens tokenu (keep_end = zachovat konec misto zacatku)"""
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        return encoding.decode(tokens[-max_tokens:] if keep_end else tokens[:max_tokens])
+    chars = int(max_tokens * CHARS_PER_TOKEN)
+    return text[-chars:] if keep_end else text[:chars]
+
+
+def count_message_tokens(message):
+    return count_tokens(message.get('content') or '') + MESSAGE_OVERHEAD
+
+
+def count_messages_tokens(messages):
+    return sum(count_message_tokens(message) for message in messages)
+
+
+def tokenizer_name():
+    encoding = _get_encoding()
+    return encoding.name if encoding is not None else 'odhad'
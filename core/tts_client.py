@@ -0,0 +1,133 @@
+"""
+Sdileny asynchronni TTS klient pro ElevenLabs REST API
+- Jeden pool keep-alive spojeni pro cely proces
+- Deadline na kazdy request (vcetne cekani ve fronte)
+- Omezena paralelita pres semafor
+"""
+
+import asyncio
+import threading
+
+import httpx
+
+from config import Config
+from .async_loop import get_background_loop
+
+
+class TTSTimeoutError(Exception):
+    """TTS request nestihl deadline"""
+
+
+class TTSClient:
+    """Asynchronni klient pro ElevenLabs s pooled spojenimi"""
+
+    def __init__(self, api_key=None, base_url=None, voice_id=None, model_id=None,
+                 timeout=None, max_concurrency=None, pool_size=None):
+        self.api_key = api_key or Config.ELEVENLABS_API_KEY
+        self.base_url = (base_url or Config.ELEVENLABS_BASE_URL).rstrip('/')
+        self.voice_id = voice_id or Config.ELEVENLABS_VOICE_ID
+        self.model_id = model_id or Config.ELEVENLABS_MODEL_ID
+        self.timeout = timeout or Config.TTS_TIMEOUT
+        self.max_concurrency = max_concurrency or Config.TTS_MAX_CONCURRENCY
+        self.pool_size = pool_size or Config.TTS_POOL_SIZE
+
+        self._loop = get_background_loop()
+        self._client = None
+        self._semaphore = None
+
+    def _ensure_client(self):
+        """Vytvori httpx klienta az uvnitr smycky (vaze se na ni)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={'xi-api-key': self.api_key or ''},
+                timeout=httpx.Timeout(self.timeout, connect=Config.TTS_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _payload(self, text):
+        """Telo requestu - nastaveni optimalizovana na nizkou latenci"""
+        return {
+            'text': text,
+            'model_id': self.model_id,
+            'voice_settings': {
+                'stability': 0.3,  # Nižší = méně detailů = rychlejší
+                'similarity_boost': 0.7,
+                'style': 0.0,
+                'use_speaker_boost': False,  # Vypnuto = rychlejší
+            },
+        }
+
+    async def stream(self, text, output_format='mp3_44100_128'):
+        """
+        Streamuje audio po chuncich (async generator)
+        Prvni chunk = prvni byte od providera
+        """
+        client = self._ensure_client()
+        async with self._semaphore:
+            async with client.stream(
+                'POST',
+                f"/v1/text-to-speech/{self.voice_id}/stream",
+                params={
+                    'optimize_streaming_latency': '2',
+                    'output_format': output_format,
+                },
+                json=self._payload(text),
+            ) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    if chunk:
+                        yield chunk
+
+    async def _collect(self, text, output_format):
+        chunks = []
+        async for chunk in self.stream(text, output_format=output_format):
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def synthesize(self, text, timeout=None, output_format='mp3_44100_128'):
+        """
+        Vygeneruje cele audio (async)
+
+        Raises:
+            TTSTimeoutError pokud request nestihne deadline
+        """
+        deadline = timeout or self.timeout
+        try:
+            return await asyncio.wait_for(self._collect(text, output_format), deadline)
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            raise TTSTimeoutError(f"TTS deadline {deadline}s vyprsel")
+
+    def synthesize_sync(self, text, timeout=None, output_format='mp3_44100_128'):
+        """Blokujici varianta pro Flask vlakna - bezi na sdilene smycce"""
+        deadline = timeout or self.timeout
+        return self._loop.run(
+            self.synthesize(text, timeout=deadline, output_format=output_format),
+            timeout=deadline + 1.0,
+        )
+
+    async def aclose(self):
+        """Zavre pool spojeni"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_tts_client():
+    """Vrati sdileneho TTS klienta pro cely proces"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = TTSClient()
+    return _client
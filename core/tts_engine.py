@@ -1,22 +1,47 @@
 """
 Text-to-Speech engine
 Prevadi text na rec pomoci ElevenLabs s podporou ceskeho jazyka
+Provideri za failoverem (circuit breaker + hedging), viz core/tts_providers.py
 """
 
+import asyncio
+import hashlib
+import json
 import os
 import re
-from elevenlabs.client import ElevenLabs
-from elevenlabs import VoiceSettings
-from config import Config
+import tempfile
+from config import Config, Prompts
+from .async_loop import get_background_loop
+from .tts_client import get_tts_client
+from .tts_providers import (
+    FailoverTTS, ElevenLabsProvider, LocalTTSProvider, CircuitBreaker, build_providers
+)
 
 
 class TTSEngine:
     """Engine pro generovani reci z textu"""
     
-    def __init__(self):
+    def __init__(self, client=None, providers=None, hedge_after_ms=None):
         print("Inicializuji TTSEngine...")
         try:
-            self.client = ElevenLabs(api_key=Config.ELEVENLABS_API_KEY)
+            # Sdileny klient = jeden pool spojeni pro cely proces
+            self.client = client or get_tts_client()
+            
+            # Provideri podle priority (posledni = Twilio <Say>)
+            if providers is None:
+                providers = build_providers(Config.TTS_PROVIDERS)
+                providers = [ElevenLabsProvider(self.client) if p.name == 'elevenlabs' else p
+                             for p in providers]
+            self.failover = FailoverTTS(
+                providers,
+                hedge_after_ms=Config.TTS_HEDGE_AFTER_MS if hedge_after_ms is None else hedge_after_ms,
+            )
+            self.extensions = {p.name: p.file_extension for p in providers}
+            print(f"  Providers: {', '.join(p.name for p in providers)}")
+            
+            # Pevne hlasky (retry, rozlouceni, chyby) - smi se brat z lokalniho renderu
+            self.canned = {self._normalize_czech_text(t) for t in Prompts.CANNED}
+            self.stats = {'cache_hits': 0, 'cache_misses': 0}
             self._ensure_cache_dir()
             print("  OK: TTSEngine initialized")
         except Exception as e:
@@ -95,7 +120,18 @@ class TTSEngine:
             return str(num)  # Fallback pro větší čísla
     
     def generate(self, text, use_cache=True):
-        """Vygeneruje audio z textu"""
+        """Vygeneruje audio z textu (blokujici - pro Flask vlakna)"""
+        try:
+            return get_background_loop().run(
+                self.agenerate(text, use_cache=use_cache),
+                timeout=Config.TTS_TIMEOUT + 1.0,
+            )
+        except Exception as e:
+            print(f"  ERROR: TTS: {e}")
+            return None
+    
+    async def agenerate(self, text, use_cache=True):
+        """Vygeneruje audio z textu (async)"""
         print(f"\n[TTSEngine] generate('{text[:50]}...')")
         
         try:
@@ -103,32 +139,32 @@ class TTSEngine:
             normalized_text = self._normalize_czech_text(text)
             print(f"  Normalized: '{normalized_text[:60]}...'")
             
-            cache_file = self._get_cache_path(normalized_text)
+            cached = self._find_cached(normalized_text) if use_cache else None
+            if cached:
+                self.stats['cache_hits'] += 1
+                print(f"  Cache hit: {cached}")
+                return self._get_url_from_path(cached)
             
-            if use_cache and os.path.exists(cache_file):
-                print(f"  Cache hit: {cache_file}")
-                return self._get_url_from_path(cache_file)
+            self.stats['cache_misses'] += 1
             
             print("  Generating audio...")
             
-            # OPTIMALIZACE: Nizsi latence + streaming
-            audio_gen = self.client.text_to_speech.convert(
-                voice_id=Config.ELEVENLABS_VOICE_ID,
-                optimize_streaming_latency="2",  # Nejrychlejší streaming (1-3, nižší = rychlejší)
-                text=normalized_text,
-                model_id="eleven_turbo_v2_5",  # Nejrychlejší model
-                voice_settings=VoiceSettings(
-                    stability=0.3,  # Nižší = méně detailů = rychlejší
-                    similarity_boost=0.7,
-                    style=0.0,
-                    use_speaker_boost=False,  # Vypnuto = rychlejší
-                ),
+            # OPTIMALIZACE: Failover + deadline (nezablokuje vlakno, padly provider = fast-fail)
+            provider, audio_bytes = await asyncio.wait_for(
+                self.failover.synthesize(normalized_text),
+                Config.TTS_TIMEOUT,
             )
             
-            audio_bytes = b"".join(audio_gen)
+            if audio_bytes is None:
+                # Vyhral provider bez audia -> volajici pouzije Twilio <Say>
+                print(f"  Fallback: {provider} (bez audia)")
+                return None
             
-            with open(cache_file, 'wb') as f:
-                f.write(audio_bytes)
+            if provider != self.failover.providers[0].name:
+                print(f"  Degraded: audio z providera {provider}")
+            
+            cache_file = self._get_cache_path(normalized_text, self.extensions.get(provider, 'mp3'))
+            await asyncio.to_thread(self._write_cache, cache_file, audio_bytes)  # Disk I/O mimo sdilenou smycku
             
             print(f"  OK: Audio saved: {cache_file} ({len(audio_bytes)} bytes)")
             
@@ -136,33 +172,170 @@ class TTSEngine:
             print(f"  URL: {url}")
             return url
         
+        except asyncio.TimeoutError:
+            print(f"  TIMEOUT: TTS deadline {Config.TTS_TIMEOUT}s vyprsel")
+            return None
+        
         except Exception as e:
             print(f"  ERROR: TTS: {e}")
             return None
     
+    async def agenerate_many(self, texts, use_cache=True):
+        """Vygeneruje vice textu soubezne (omezeno semaforem klienta)"""
+        return await asyncio.gather(*(self.agenerate(t, use_cache=use_cache) for t in texts))
+    
+    def generate_many(self, texts, use_cache=True):
+        """Blokujici varianta agenerate_many - vrati list URL (None pri chybe)"""
+        return get_background_loop().run(self.agenerate_many(texts, use_cache=use_cache))
+    
+    async def aprerender_canned(self, texts=None):
+        """
+        Predrenderuje pevne hlasky (Prompts.CANNED) - defaultne lokalnim TTS bez site
+        Vrati pocet nove vyrenderovanych souboru
+        """
+        texts = texts or Prompts.CANNED
+        provider = None
+        if Config.TTS_CANNED_PROVIDER == 'local' and LocalTTSProvider.is_available():
+            provider = LocalTTSProvider()
+        
+        rendered = 0
+        for text in texts:
+            normalized_text = self._normalize_czech_text(text)
+            self.canned.add(normalized_text)
+            if self._find_cached(normalized_text):
+                continue
+            
+            if provider is None:
+                # Lokalni TTS neni - pouzij bezny retezec provideru
+                if await self.agenerate(text):
+                    rendered += 1
+                continue
+            
+            try:
+                chunks = [chunk async for chunk in provider.stream(normalized_text)]
+                cache_file = self._get_cache_path(normalized_text, provider.file_extension)
+                await asyncio.to_thread(self._write_cache, cache_file, b"".join(chunks))
+                rendered += 1
+            except Exception as e:
+                print(f"  ERROR: Prerender '{text}': {e}")
+        
+        print(f"[TTSEngine] Predrenderovano {rendered}/{len(texts)} pevnych hlasek")
+        return rendered
+    
+    def prerender_canned(self, texts=None):
+        """Blokujici varianta aprerender_canned"""
+        return get_background_loop().run(self.aprerender_canned(texts))
+    
+    def cache_filename(self, text):
+        """Jmeno souboru v cache pro text (None pokud jeste neni vyrenderovany)"""
+        cached = self._find_cached(self._normalize_czech_text(text))
+        return os.path.basename(cached) if cached else None
+    
+    def hit_rate(self):
+        """Podil cache hitu v procentech"""
+        total = self.stats['cache_hits'] + self.stats['cache_misses']
+        return round(self.stats['cache_hits'] / total * 100, 1) if total else 0.0
+    
+    def load_pinned(self):
+        """Pinned soubory (cache warmer) - prune_cache je nikdy nesmaze"""
+        try:
+            with open(Config.AUDIO_PINNED_MANIFEST, encoding='utf-8') as f:
+                return set(json.load(f))
+        except (OSError, ValueError):
+            return set()
+    
+    def save_pinned(self, filenames):
+        """Atomicky prepise manifest pinned souboru"""
+        payload = json.dumps(sorted(filenames), ensure_ascii=False, indent=2).encode('utf-8')
+        self._write_cache(Config.AUDIO_PINNED_MANIFEST, payload)
+    
+    def prune_cache(self, max_files=None):
+        """
+        Smaze nejstarsi audio nad limit, pinned soubory nechava
+        Limit plati jen pro nepinned soubory (pinned se do nej nepocitaji)
+        Vrati pocet smazanych souboru
+        """
+        max_files = max_files or Config.AUDIO_CACHE_MAX_FILES
+        pinned = self.load_pinned()
+        entries = []
+        for entry in os.scandir(Config.AUDIO_CACHE_DIR):
+            if (entry.name.startswith('tts_') and entry.name.endswith(('.mp3', '.wav'))
+                    and entry.name not in pinned):
+                entries.append((entry.stat().st_mtime, entry.name))
+        
+        if len(entries) <= max_files:
+            return 0
+        
+        removed = 0
+        entries.sort()
+        for _, name in entries[:len(entries) - max_files]:
+            try:
+                os.remove(os.path.join(Config.AUDIO_CACHE_DIR, name))
+                removed += 1
+            except OSError:
+                pass
+        print(f"[TTSEngine] Prune cache: smazano {removed} souboru")
+        return removed
+    
     def _ensure_cache_dir(self):
         """Vytvori slozku pro cache"""
         os.makedirs(Config.AUDIO_CACHE_DIR, exist_ok=True)
         print(f"  Cache dir: {Config.AUDIO_CACHE_DIR}")
     
-    def _get_cache_path(self, text):
-        """Vrati cestu k cache souboru"""
-        filename = f"tts_{abs(hash(text))}.mp3"
+    def _get_cache_path(self, text, extension='mp3'):
+        """
+        Vrati cestu k cache souboru
+        Content-addressed klic (hlas + model + text) - slouzi i jako ETag pri servirovani
+        """
+        content = f"{Config.ELEVENLABS_VOICE_ID}|{Config.ELEVENLABS_MODEL_ID}|{text}"
+        key = hashlib.sha256(content.encode('utf-8')).hexdigest()[:32]
+        filename = f"tts_{key}.{extension}"
         return os.path.join(Config.AUDIO_CACHE_DIR, filename)
     
-    def _get_url_from_path(self, path):
-        """Prevede filepath na URL"""
-        # OPRAV: Normalizuj cestu pro URL (pouzij forward slash)
-        # Odeber prvni "static/" a pridej zpet s forward slash
-        path_parts = path.replace(os.sep, '/').split('/')
-        
-        # Najdi 'static' a vezmi vse za nim
-        if 'static' in path_parts:
-            static_index = path_parts.index('static')
-            relative_path = '/'.join(path_parts[static_index+1:])
-            url = f"/static/{relative_path}"
-        else:
-            # Fallback
-            url = f"/{path.replace(os.sep, '/')}"
+    def _write_cache(self, path, audio_bytes):
+        """
+        Atomicky zapis - audio server nikdy neuvidi rozepsany soubor
+        Docasny soubor je unikatni i mezi vlakny (stejny text muze psat vic hovoru naraz)
+        """
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                         prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio_bytes)
+            os.chmod(temp_path, 0o644)  # mkstemp vytvori 0600 - audio server musi soubor cist
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    
+    def _find_cached(self, text):
+        """
+        Najde audio v cache
+        Lokalni (degradovany) render se pouzije jen pro pevne hlasky
+        nebo dokud je primarni provider mimo provoz
+        """
+        mp3_file = self._get_cache_path(text, 'mp3')
+        if os.path.exists(mp3_file):
+            return mp3_file
+        
+        wav_file = self._get_cache_path(text, 'wav')
+        if os.path.exists(wav_file):
+            primary = self.failover.providers[0].name
+            if (text in self.canned
+                    or self.extensions.get(primary) == 'wav'
+                    or self.failover.breakers[primary].state != CircuitBreaker.CLOSED):
+                return wav_file
         
-        return url
\ No newline at end of file
+        return None
+    
+    def _get_url_from_path(self, path):
+        """
+        Prevede filepath na URL
+        Audio jde pres dedikovanou /audio/ cestu (ETag, immutable cache, range),
+        s AUDIO_BASE_URL muze mirit na samostatny audio proces
+        """
+        filename = os.path.basename(path)
+        return f"{Config.AUDIO_BASE_URL.rstrip('/')}/audio/{filename}"
@@ -0,0 +1,345 @@
+"""
+TTS provideri + failover
+- Spolecne rozhrani pro vsechny TTS backendy (ElevenLabs, lokalni espeak-ng, Twilio <Say>, stand-in)
+- Circuit breaker na kazdy provider (fast-fail kdyz provider opakovane pada)
+- Hedging: kdyz primarni provider nevrati prvni byte do X ms, spusti se sekundarni
+"""
+
+import asyncio
+import shutil
+import struct
+import threading
+import time
+
+from config import Config
+from .tts_client import get_tts_client
+
+
+class TTSProviderError(Exception):
+    """Zadny provider nevratil audio"""
+
+
+class CircuitBreaker:
+    """
+    Jednoduchy circuit breaker
+    CLOSED -> (N chyb po sobe) -> OPEN -> (po reset_timeout) -> HALF_OPEN -> 1 zkusebni request
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Smi se provider zavolat? (OPEN = fast-fail)"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            # HALF_OPEN - pust jen jeden zkusebni request
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Request byl zrusen (prohral hedge) - neni to uspech ani chyba"""
+        with self._lock:
+            self._trial_running = False
+
+
+# ============================================================
+# PROVIDERI
+# ============================================================
+
+class TTSProvider:
+    """Zakladni rozhrani TTS providera"""
+
+    name = 'base'
+    produces_audio = True  # False = audio nevznika (napr. Twilio <Say>)
+    file_extension = 'mp3'
+
+    async def stream(self, text):
+        """Async generator chunku audia"""
+        raise NotImplementedError
+        yield b''
+
+
+class ElevenLabsProvider(TTSProvider):
+    """ElevenLabs pres sdileny pooled klient"""
+
+    name = 'elevenlabs'
+
+    def __init__(self, client=None):
+        self.client = client or get_tts_client()
+
+    async def stream(self, text):
+        async for chunk in self.client.stream(text):
+            yield chunk
+
+
+class TwilioSayProvider(TTSProvider):
+    """
+    Posledni zachrana - zadne audio, server pouzije Twilio <Say>
+    Vzdy uspeje okamzite, takze jako hedge = "po X ms mluv robotem"
+    """
+
+    name = 'twilio_say'
+    produces_audio = False
+
+    async def stream(self, text):
+        return
+        yield b''
+
+
+class StandInProvider(TTSProvider):
+    """
+    Lokalni nahrada providera pro testy a benchmarky
+    Nastavitelna latence prvniho bytu a chybovost
+    """
+
+    def __init__(self, name='stand_in', first_byte_delay=0.0, fail=False, audio=b'\xff\xfb\x90\x64' * 64):
+        self.name = name
+        self.first_byte_delay = first_byte_delay
+        self.fail = fail
+        self.audio = audio
+        self.calls = 0
+
+    async def stream(self, text):
+        self.calls += 1
+        await asyncio.sleep(self.first_byte_delay)
+        if self.fail:
+            raise TTSProviderError(f"{self.name}: simulovana chyba")
+        yield self.audio
+
+
+class LocalTTSProvider(TTSProvider):
+    """
+    Offline CPU TTS pres espeak-ng (cestina: -v cs)
+    Nulova sit - pro predrenderovane hlasky, degradovany rezim a load testy
+    """
+
+    name = 'local'
+    file_extension = 'wav'
+
+    def __init__(self, binary=None, voice=None, speed=None):
+        self.binary = shutil.which(binary or Config.LOCAL_TTS_BINARY)
+        self.voice = voice or Config.LOCAL_TTS_VOICE
+        self.speed = speed or Config.LOCAL_TTS_SPEED
+
+    @classmethod
+    def is_available(cls):
+        return shutil.which(Config.LOCAL_TTS_BINARY) is not None
+
+    async def stream(self, text):
+        if not self.binary:
+            raise TTSProviderError(f"{Config.LOCAL_TTS_BINARY} neni nainstalovany")
+
+        process = await asyncio.create_subprocess_exec(
+            self.binary, '-v', self.voice, '-s', str(self.speed), '--stdout', text,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            audio, error = await process.communicate()
+        finally:
+            if process.returncode is None:
+                process.kill()
+
+        if process.returncode != 0 or not audio:
+            raise TTSProviderError(f"local: {error.decode(errors='ignore').strip()}")
+        yield self._fix_wav_header(audio)
+
+    @staticmethod
+    def _fix_wav_header(audio):
+        """
+        Pri zapisu na stdout nezna espeak delku dat a necha v hlavicce placeholder
+        Dopocita velikost RIFF a data chunku, aby WAV prehral i Twilio
+        """
+        if audio[:4] != b'RIFF' or audio[8:12] != b'WAVE':
+            return audio
+        audio = bytearray(audio)
+        struct.pack_into('<I', audio, 4, len(audio) - 8)
+        offset = 12
+        while offset + 8 <= len(audio):
+            chunk_id = bytes(audio[offset:offset + 4])
+            if chunk_id == b'data':
+                struct.pack_into('<I', audio, offset + 4, len(audio) - offset - 8)
+                break
+            chunk_size = struct.unpack_from('<I', audio, offset + 4)[0]
+            offset += 8 + chunk_size + (chunk_size & 1)
+        return bytes(audio)
+
+
+PROVIDER_CLASSES = {
+    'elevenlabs': ElevenLabsProvider,
+    'local': LocalTTSProvider,
+    'twilio_say': TwilioSayProvider,
+}
+
+
+def build_providers(names):
+    """Vytvori providery podle jmen z konfigurace (poradi = priorita)"""
+    providers = []
+    for name in names:
+        name = name.strip()
+        if name not in PROVIDER_CLASSES:
+            print(f"  ⚠️  Neznamy TTS provider '{name}' - preskakuji")
+            continue
+        if name == 'local' and not LocalTTSProvider.is_available():
+            print(f"  ⚠️  Lokalni TTS ({Config.LOCAL_TTS_BINARY}) neni nainstalovany - preskakuji")
+            continue
+        providers.append(PROVIDER_CLASSES[name]())
+    return providers
+
+
+# ============================================================
+# FAILOVER + HEDGING
+# ============================================================
+
+class FailoverTTS:
+    """Zkousi providery podle priority, s circuit breakerem a volitelnym hedgingem"""
+
+    def __init__(self, providers, hedge_after_ms=None, failure_threshold=None, reset_timeout=None,
+                 provider_timeout=None):
+        if not providers:
+            raise ValueError("FailoverTTS potrebuje aspon jednoho providera")
+        self.providers = providers
+        self.hedge_after = hedge_after_ms / 1000.0 if hedge_after_ms else None
+        # Kratsi nez TTS_TIMEOUT - zaseknuty provider se zapocita jako chyba a zbyde cas na dalsiho
+        self.provider_timeout = provider_timeout or Config.TTS_PROVIDER_TIMEOUT
+        self.breakers = {
+            p.name: CircuitBreaker(
+                failure_threshold or Config.TTS_BREAKER_FAILURES,
+                reset_timeout or Config.TTS_BREAKER_RESET,
+            )
+            for p in providers
+        }
+        self.stats = {'requests': 0, 'hedges': 0, 'fast_fails': 0, 'failures': 0, 'wins': {}}
+
+    async def _collect(self, provider, text, first_byte):
+        chunks = []
+        async for chunk in provider.stream(text):
+            first_byte.set()
+            chunks.append(chunk)
+        first_byte.set()
+        if provider.produces_audio and not chunks:
+            raise TTSProviderError(f"{provider.name}: prazdne audio")
+        return b"".join(chunks) if provider.produces_audio else None
+
+    async def _run(self, provider, text, first_byte, lost):
+        """
+        Jeden pokus u providera - vysledek se zapocita do jeho breakeru
+        Timeout providera = chyba; zruseni je neutralni jen pro prohrany hedge (lost)
+        """
+        breaker = self.breakers[provider.name]
+        try:
+            audio = await asyncio.wait_for(self._collect(provider, text, first_byte), self.provider_timeout)
+        except asyncio.CancelledError:
+            if lost.is_set():
+                breaker.release()
+            else:
+                breaker.record_failure()  # Vyprsel celkovy deadline volajiciho
+            raise
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            raise TTSProviderError(f"{provider.name}: timeout {self.provider_timeout}s")
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return audio
+
+    async def synthesize(self, text):
+        """
+        Vrati (provider, audio_bytes)
+        audio_bytes je None pokud vyhral provider bez audia (Twilio <Say>)
+
+        Raises:
+            TTSProviderError pokud selzou vsichni provideri
+        """
+        self.stats['requests'] += 1
+        queue = list(self.providers)
+        pending = {}
+        last_error = None
+        hedged = False
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+
+        def launch():
+            # Preskoc providery s otevrenym breakerem (fast-fail)
+            while queue:
+                provider = queue.pop(0)
+                if self.breakers[provider.name].allow_request():
+                    first_byte = asyncio.Event()
+                    lost = asyncio.Event()
+                    task = asyncio.ensure_future(self._run(provider, text, first_byte, lost))
+                    pending[task] = (provider, first_byte, lost)
+                    return True
+                self.stats['fast_fails'] += 1
+                print(f"  ⚡ TTS {provider.name}: circuit OPEN - preskakuji")
+            return False
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge_after is not None and not hedged and queue:
+                    timeout = max(0.0, started + self.hedge_after - loop.time())
+
+                done, _ = await asyncio.wait(pending.keys(), timeout=timeout,
+                                             return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Hedge - primarni provider jeste nevratil prvni byte
+                    hedged = True
+                    if not any(fb.is_set() for _, fb, _ in pending.values()) and launch():
+                        self.stats['hedges'] += 1
+                        print(f"  🏁 TTS hedge po {self.hedge_after * 1000:.0f} ms")
+                    continue
+
+                for task in done:
+                    provider, _, _ = pending.pop(task)
+                    if task.exception() is None:
+                        self.stats['wins'][provider.name] = self.stats['wins'].get(provider.name, 0) + 1
+                        for _, _, lost in pending.values():
+                            lost.set()  # Zbytek prohral hedge - breaker neovlivni
+                        return provider.name, task.result()
+                    last_error = task.exception()
+                    self.stats['failures'] += 1
+                    print(f"  ⚠️  TTS {provider.name} selhal: {last_error}")
+
+                # Sekvencni failover - dalsi provider v poradi
+                if not pending:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise TTSProviderError(f"Vsichni TTS provideri selhali: {last_error}")
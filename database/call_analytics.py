@@ -37,6 +37,64 @@ class CallAnalytics:
         )
         """)
         
+        # Offline přepisy nahrávek (services/recording_transcriber.py)
+        # recordings = stav zpracování souboru (resumable), recording_turns = repliky s časy
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recordings (
+            path TEXT PRIMARY KEY,
+            call_sid TEXT,
+            fingerprint TEXT,
+            status TEXT,
+            duration REAL DEFAULT 0,
+            turns INTEGER DEFAULT 0,
+            backend TEXT,
+            error TEXT,
+            processed_at TIMESTAMP
+        )
+        """)
+        
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS recording_turns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recording_path TEXT NOT NULL,
+            call_sid TEXT,
+            turn_index INTEGER,
+            channel INTEGER,
+            start_time REAL,
+            end_time REAL,
+            text TEXT
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_recording_turns_call ON recording_turns(call_sid)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_recording_turns_path ON recording_turns(recording_path)")
+        
+        # Audio metriky nahrávek (services/call_audio_analyzer.py) - hovor může mít víc nahrávek
+        # Hlavní čísla ve sloupcích (korelace s outcome v SQL), vše ostatní ve features (JSON)
+        cursor.execute("PRAGMA table_info(call_audio_features)")
+        if any(col[1] == 'call_sid' and col[5] for col in cursor.fetchall()):
+            # Starší schéma s klíčem call_sid - metriky se z nahrávek spočítají znovu
+            cursor.execute("DROP TABLE call_audio_features")
+            print("  ✅ call_audio_features převedena na klíč recording_path")
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS call_audio_features (
+            recording_path TEXT PRIMARY KEY,
+            call_sid TEXT,
+            fingerprint TEXT,
+            duration REAL DEFAULT 0,
+            ai_talk_time REAL,
+            customer_talk_time REAL,
+            customer_talk_ratio REAL,
+            longest_silence REAL,
+            response_gap_p50 REAL,
+            response_gap_p90 REAL,
+            response_gap_max REAL,
+            overlap_time REAL,
+            features TEXT,
+            analyzed_at TIMESTAMP
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_audio_features_call ON call_audio_features(call_sid)")
+        
         conn.commit()
         conn.close()
         print(f"✅ Call Analytics DB inicializována: {self.db_path}")
@@ -234,4 +292,167 @@ class CallAnalytics:
         conn.commit()
         conn.close()
         
-        print(f"✅ Hovor {call_sid} smazán")
\ No newline at end of file
+        print(f"✅ Hovor {call_sid} smazán")
+    
+    def get_recording(self, path):
+        """Stav zpracování nahrávky (None = ještě nezpracovaná)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM recordings WHERE path = ?", (str(path),))
+        row = cursor.fetchone()
+        conn.close()
+        
+        return dict(row) if row else None
+    
+    def save_recording_transcript(self, path, call_sid, fingerprint, duration, turns, backend):
+        """
+        Ulož přepis nahrávky - idempotentně (staré repliky téhle nahrávky se nahradí)
+        
+        Args:
+            turns (list): [{'channel', 'start', 'end', 'text'}] seřazené podle času
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:  # Jedna transakce - při pádu zůstane předchozí stav
+                conn.execute("DELETE FROM recording_turns WHERE recording_path = ?", (str(path),))
+                conn.executemany("""
+                    INSERT INTO recording_turns (
+                        recording_path, call_sid, turn_index, channel,
+                        start_time, end_time, text
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [
+                    (str(path), call_sid, i, turn.get('channel'), turn['start'], turn['end'], turn['text'])
+                    for i, turn in enumerate(turns)
+                ])
+                conn.execute("""
+                    INSERT OR REPLACE INTO recordings (
+                        path, call_sid, fingerprint, status, duration,
+                        turns, backend, error, processed_at
+                    ) VALUES (?, ?, ?, 'done', ?, ?, ?, NULL, ?)
+                """, (str(path), call_sid, fingerprint, duration, len(turns), backend, datetime.now().isoformat()))
+        finally:
+            conn.close()
+    
+    def save_recording_failure(self, path, call_sid, fingerprint, error):
+        """Nahrávku se nepodařilo zpracovat - další běh ji zkusí znovu"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT INTO recordings (path, call_sid, fingerprint, status, error, processed_at)
+                    VALUES (?, ?, ?, 'failed', ?, ?)
+                    ON CONFLICT(path) DO UPDATE SET
+                        status = 'failed', error = excluded.error, processed_at = excluded.processed_at
+                """, (str(path), call_sid, fingerprint, str(error)[:500], datetime.now().isoformat()))
+        finally:
+            conn.close()
+    
+    def get_recording_turns(self, call_sid):
+        """Repliky z offline přepisu nahrávek hovoru (podle času)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT recording_path, turn_index, channel, start_time, end_time, text
+            FROM recording_turns
+            WHERE call_sid = ?
+            ORDER BY recording_path, start_time
+        """, (call_sid,))
+        turns = [dict(row) for row in cursor.fetchall()]
+        
+        conn.close()
+        return turns
+    
+    def save_audio_features(self, call_sid, path, fingerprint, features):
+        """Ulož audio metriky nahrávky hovoru (přepíše předchozí analýzu téže nahrávky)"""
+        speakers = features.get('speakers', {})
+        ai = speakers.get('ai', {})
+        customer = speakers.get('customer', {})
+        response = features.get('turn_gaps', {}).get('customer->ai', {})
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO call_audio_features (
+                        recording_path, call_sid, fingerprint, duration,
+                        ai_talk_time, customer_talk_time, customer_talk_ratio,
+                        longest_silence, response_gap_p50, response_gap_p90,
+                        response_gap_max, overlap_time, features, analyzed_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    str(path), call_sid, fingerprint, features.get('duration', 0),
+                    ai.get('talk_time'), customer.get('talk_time'), customer.get('talk_ratio'),
+                    features.get('silence', {}).get('longest'),
+                    response.get('p50'), response.get('p90'), response.get('max'),
+                    features.get('overlap_time'),
+                    json.dumps(features, ensure_ascii=False), datetime.now().isoformat()
+                ))
+        finally:
+            conn.close()
+    
+    def get_recording_audio_features(self, path):
+        """Audio metriky jedné nahrávky (None = ještě neanalyzovaná)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT * FROM call_audio_features WHERE recording_path = ?", (str(path),))
+        row = cursor.fetchone()
+        conn.close()
+        
+        if not row:
+            return None
+        row = dict(row)
+        row['features'] = json.loads(row['features'] or '{}')
+        return row
+    
+    def get_audio_features(self, call_sid):
+        """Audio metriky všech nahrávek hovoru (prázdný list = ještě neanalyzován)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT * FROM call_audio_features WHERE call_sid = ? ORDER BY recording_path
+        """, (call_sid,))
+        rows = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        for row in rows:
+            row['features'] = json.loads(row['features'] or '{}')
+        return rows
+    
+    def get_audio_features_with_outcomes(self):
+        """
+        Hlavní audio metriky po hovorech + výsledek hovoru z AI reportu (hovory bez reportu mají outcome None)
+
+        Hovor může mít víc nahrávek - metriky se sečtou za hovor (podíl mluvení z časů,
+        mezery a ticho jako maximum, p50 průměrem), aby se outcome počítal jen jednou.
+        Nahrávky bez call_sid jsou každá samostatný hovor.
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT f.call_sid, COUNT(*) AS recordings, SUM(f.duration) AS duration,
+                   SUM(f.ai_talk_time) AS ai_talk_time, SUM(f.customer_talk_time) AS customer_talk_time,
+                   SUM(f.customer_talk_time) / NULLIF(SUM(f.ai_talk_time) + SUM(f.customer_talk_time), 0)
+                       AS customer_talk_ratio,
+                   MAX(f.longest_silence) AS longest_silence, AVG(f.response_gap_p50) AS response_gap_p50,
+                   MAX(f.response_gap_p90) AS response_gap_p90, MAX(f.response_gap_max) AS response_gap_max,
+                   SUM(f.overlap_time) AS overlap_time,
+                   c.outcome, c.sales_score
+            FROM call_audio_features f
+            LEFT JOIN calls c ON c.call_sid = f.call_sid
+            GROUP BY COALESCE(f.call_sid, f.recording_path)
+            ORDER BY MAX(f.analyzed_at) DESC
+        """)
+        rows = [dict(row) for row in cursor.fetchall()]
+        
+        conn.close()
+        return rows
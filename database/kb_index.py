@@ -0,0 +1,287 @@
+# database/kb_index.py
+"""
+Indexované vyhledávání v Knowledge Base (BM25)
+- Index se staví jednou při načtení KB nad KAŽDÝM uzlem (služba, ceník, námitka, FAQ...)
+- Čeština: odstranění diakritiky + lehký stemmer (cena/ceny/cenu -> cen)
+- Nový záznam v KB = nový dokument v indexu, bez úprav kódu
+- Speciální značky (příležitost, hard rejection) se berou z pole 'typ' uzlu
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+# Pole, která popisují "na co se zákazník ptá" -> vyšší váha
+QUERY_FIELDS = {'trigger': 3, 'namitka': 3, 'otazka': 3, 'nazev': 2}
+
+# Pole, která se neindexují (interní metadata)
+SKIP_FIELDS = {'typ', 'success_rate', 'action', 'included'}
+
+# Časté české slovo -> nic neříká o tématu
+STOPWORDS = {
+    'a', 'i', 'o', 'u', 'v', 'z', 'k', 's', 've', 'ze', 'na', 'do', 'od', 'po', 'za', 'pro',
+    'je', 'to', 'se', 'si', 'ten', 'ta', 'ale', 'by', 'bych', 'jsem', 'jste', 'jsme', 'mi',
+    'me', 'mne', 'vam', 'vas', 'nam', 'nas', 'tak', 'uz', 'jen', 'ano', 'no', 'jo', 'tu',
+    'tam', 'dobry', 'den', 'prosim', 'dekuji', 'hmm', 'aha', 'nebo', 'jako',
+    # Tázací slova a 'máte' - téma určí zbytek dotazu ('jaké máte služby' != 'jak dlouho')
+    'jak', 'co', 'kdy', 'jaky', 'jake', 'jaka', 'jakou', 'jaci', 'ktery', 'ktera', 'ktere', 'mate',
+}
+
+# Rozšíření dotazu (slovo -> témata), hlavně otázky na cenu
+# Klíče i hodnoty se při načtení převedou na stemy (viz _SYNONYM_STEMS)
+QUERY_SYNONYMS = {
+    'kolik': ['cena'],
+    'stojí': ['cena'],
+    'platit': ['cena'],
+    'zaplatit': ['cena'],
+    'ceník': ['cena'],
+    'otevřeno': ['otevírací'],
+    'otevíráte': ['otevírací'],
+    'kde': ['adresa'],
+    'najdu': ['adresa'],
+    'nabízíte': ['služby'],
+    'děláte': ['služby'],
+}
+
+# Koncovky pro lehký stemmer (bez diakritiky, nejdelší první)
+SUFFIXES = sorted([
+    'atech', 'atum', 'etem',
+    'ech', 'ich', 'eho', 'emi', 'emu', 'ete', 'eti', 'iho', 'imi', 'imu', 'ach', 'ata',
+    'aty', 'ych', 'ama', 'ami', 'ove', 'ovi', 'ymi', 'ame', 'ate', 'ime', 'ite',
+    'em', 'es', 'im', 'um', 'at', 'am', 'os', 'us', 'ym', 'mi', 'ou',
+    'a', 'e', 'i', 'o', 'u', 'y',
+], key=len, reverse=True)
+
+MIN_STEM = 3
+
+# Hlavičky sekcí v kontextu pro AI
+SECTION_LABELS = {
+    'firma': 'FIRMA',
+    'sluzby': 'SLUŽBY',
+    'cenik': 'CENÍK',
+    'namitky_a_reseni': 'NÁMITKA',
+    'faq': 'FAQ',
+    'typicke_dotazy': 'ODPOVĚĎ',
+    'rezervace': 'REZERVACE',
+    'dny_v_tydnu': 'OTEVÍRACÍ DOBA',
+    'realizace': 'REALIZACE',
+}
+
+# Pole s hotovou odpovědí (v pořadí priority)
+ANSWER_FIELDS = ('best_response', 'odpoved')
+
+
+def fold(text):
+    """Malá písmena bez diakritiky ('Stříhání' -> 'strihani')"""
+    decomposed = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def stem(token):
+    """Lehký český stemmer - odřízne jednu pádovou/slovesnou koncovku"""
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+_SYNONYM_STEMS = {
+    stem(fold(word)): [stem(fold(synonym)) for synonym in synonyms]
+    for word, synonyms in QUERY_SYNONYMS.items()
+}
+
+
+def tokenize(text):
+    """
+    Text -> stemy bez stopslov + dvojice sousedních stemů
+    Dvojice drží frázi pohromadě ('nemáme web' != 'nemám čas' + 'web')
+    """
+    stems = [stem(token) for token in re.findall(r'\w+', fold(text)) if token not in STOPWORDS]
+    return stems + [f"{a}_{b}" for a, b in zip(stems, stems[1:])]
+
+
+def _strings(value):
+    """Všechny řetězce z hodnoty (i z vnořených seznamů a slovníků)"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+
+
+def _humanize(key):
+    return key.replace('_', ' ')
+
+
+class KBIndex:
+    """
+    BM25 index nad uzly Knowledge Base
+    Dokument = každý slovník, který má aspoň jednu ne-slovníkovou hodnotu
+    """
+
+    def __init__(self, kb, k1=1.2, b=0.75):
+        self.docs = []
+        self._digest = None
+        self.postings = {}  # term -> [(doc_id, BM25 váha)]
+
+        self._collect(kb, ())
+        counts = [Counter(self._doc_terms(doc)) for doc in self.docs]
+        lengths = [sum(c.values()) for c in counts]
+        avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+        frequencies = defaultdict(list)
+        for doc_id, counter in enumerate(counts):
+            for term, tf in counter.items():
+                frequencies[term].append((doc_id, tf))
+
+        # Váhy se počítají předem - dotaz je pak jen součet přes postings
+        total = len(self.docs)
+        for term, posting in frequencies.items():
+            idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+            self.postings[term] = [
+                (doc_id, idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[doc_id] / avg_length)))
+                for doc_id, tf in posting
+            ]
+
+    def _collect(self, node, path):
+        """Projde strom KB a z uzlů s hodnotami udělá dokumenty"""
+        fields = {k: v for k, v in node.items() if not isinstance(v, dict)}
+        if fields and path:
+            self.docs.append({'path': path, 'section': path[0], 'fields': fields})
+        for key, value in node.items():
+            if isinstance(value, dict):
+                self._collect(value, path + (key,))
+
+    def _doc_terms(self, doc):
+        """Termy dokumentu - cesta v KB, jména polí a texty (dotazová pole s vyšší vahou)"""
+        terms = tokenize(_humanize(doc['path'][-1]))
+        for key in doc['path']:
+            terms += tokenize(_humanize(key))
+        for field, value in doc['fields'].items():
+            if field in SKIP_FIELDS:
+                continue
+            terms += tokenize(_humanize(field))
+            weight = QUERY_FIELDS.get(field, 1)
+            for text in _strings(value):
+                terms += tokenize(text) * weight
+        return terms
+
+    def search(self, query, top_k=4, min_ratio=0.5):
+        """
+        Vrátí [(skóre, dokument)] seřazené sestupně
+        min_ratio: dokumenty pod zlomkem nejlepšího skóre se zahodí
+        """
+        terms = tokenize(query)
+        terms += [synonym for term in terms for synonym in _SYNONYM_STEMS.get(term, [])]
+
+        scores = defaultdict(float)
+        for term in set(terms):
+            for doc_id, weight in self.postings.get(term, ()):
+                scores[doc_id] += weight
+
+        if not scores:
+            return []
+        best = max(scores.values())
+        ranked = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(score, self.docs[doc_id]) for doc_id, score in ranked
+                if score >= best * min_ratio]
+
+    def context(self, query, top_k=4):
+        """Kontext pro AI - nalezené uzly zformátované po sekcích"""
+        return self._format(doc for _, doc in self.search(query, top_k=top_k))
+
+    def digest(self):
+        """
+        Celá KB jako text - stabilní část promptu (stejná pro všechny hovory
+        dané verze KB), počítá se jednou pro index
+        """
+        if self._digest is None:
+            self._digest = self._format(self.docs, with_question=True)
+        return self._digest
+
+    def _format(self, docs, with_question=False):
+        """
+        Uzly -> řádky kontextu seskupené po sekcích
+        with_question: u odpovědí uvést i na co odpovídají (pro celou KB v promptu)
+        """
+        lines = []
+        answers = set()
+        items = {}  # sekce -> řádky seznamu (vypíší se pod jednou hlavičkou)
+        for doc in docs:
+            label = SECTION_LABELS.get(doc['section'], _humanize(doc['section']).upper())
+            for kind, text in render(doc):
+                if kind == 'answer':
+                    # Stejná odpověď z FAQ i typických dotazů jen jednou
+                    if text not in answers:
+                        answers.add(text)
+                        question = _question(doc) if with_question else None
+                        lines.append(f"{label} ({question}): {text}" if question else f"{label}: {text}")
+                elif kind == 'marker':
+                    lines.append(text)
+                else:
+                    items.setdefault(label, []).append(f"- {text}")
+
+        for label, rows in items.items():
+            lines.append(f"{label}:")
+            lines += rows
+        return "\n".join(lines)
+
+
+def _question(doc):
+    """Na co uzel odpovídá (námitka, otázka FAQ, spouštěče)"""
+    fields = doc['fields']
+    if fields.get('namitka') or fields.get('otazka'):
+        return fields.get('namitka') or fields.get('otazka')
+    if fields.get('trigger'):
+        return ' / '.join(_strings(fields['trigger']))
+    return None
+
+
+def render(doc):
+    """
+    Jeden uzel KB -> [(druh, text)]
+    druh: 'answer' (hotová odpověď), 'marker' (značka pro AI), 'item' (řádek seznamu)
+    """
+    fields = doc['fields']
+    typ = fields.get('typ')
+
+    # Speciální značky podle typu uzlu
+    if typ == 'hard_rejection':
+        if fields.get('namitka'):
+            return [('marker', f"HARD REJECTION ({fields['namitka']}) → Rozluč se!")]
+        return [('marker', "HARD REJECTION → Rozluč se!")]
+
+    for field in ANSWER_FIELDS:
+        if fields.get(field):
+            rows = [('answer', fields[field])]
+            if typ == 'opportunity':
+                rows.append(('marker', f"🎯 PŘÍLEŽITOST! {fields.get('namitka', '')}".strip()))
+                if fields.get('follow_up'):
+                    rows.append(('marker', f"AKCE: {fields['follow_up']}"))
+            return rows
+
+    if 'polozky' in fields:
+        return [('item', f"{item.get('sluzba', '')}: {item.get('cena', '')}") for item in fields['polozky']]
+
+    if 'cena' in fields:
+        text = f"{fields.get('nazev', _humanize(doc['path'][-1]))}: {fields['cena']}"
+        if fields.get('trvani'):
+            text += f" ({fields['trvani']})"
+        return [('item', text)]
+
+    if fields.get('popis'):
+        return [('item', f"{fields.get('nazev', _humanize(doc['path'][-1]))}: {fields['popis']}")]
+
+    rows = []
+    for field, value in fields.items():
+        if field in SKIP_FIELDS or field == 'trigger':
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ', '.join(_strings(value))
+        rows.append(('item', f"{_humanize(field)}: {value}"))
+    return rows
@@ -0,0 +1,277 @@
+# database/kb_store.py
+"""
+Knowledge Base v databázi - verzovaná, per tenant (uživatel / kampaň)
+- Každá změna = nová verze (starší zůstávají pro rollback)
+- KBRegistry drží v paměti index každé KB, při změně postaví nový
+  a vymění referenci (copy-on-write) - webhooky nikdy nečekají na zámek
+- Změny z jiného procesu se načtou pollingem (Config.KB_RELOAD_INTERVAL)
+
+Tenant klíče: 'default', 'user:<id>', 'campaign:<id>'
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from config import Config
+from .kb_index import KBIndex
+
+DEFAULT_TENANT = 'default'
+PROFILES = ('sales', 'reception')
+
+
+# Uzly, které prompty a pozdrav čtou napřímo (get_receptionist_prompt, ReceptionistService)
+REQUIRED_FIELDS = {
+    'reception': [('firma', 'nazev'), ('firma', 'kontakt', 'telefon'), ('firma', 'kontakt', 'adresa')],
+    'sales': [],
+}
+
+
+def validate_kb(kb, profile=None):
+    """
+    KB musí být slovník sekcí (slovníků), mít uzly potřebné pro prompt profilu
+    a musí jít zaindexovat
+    """
+    if not isinstance(kb, dict) or not kb:
+        raise ValueError("KB musí být neprázdný JSON objekt")
+    for section, value in kb.items():
+        if not isinstance(value, dict):
+            raise ValueError(f"Sekce '{section}' musí být objekt")
+    for path in REQUIRED_FIELDS.get(profile, []):
+        node = kb
+        for key in path:
+            if not isinstance(node, dict) or key not in node:
+                raise ValueError(f"Chybí povinný údaj '{'.'.join(path)}'")
+            node = node[key]
+        if not isinstance(node, str) or not node.strip():
+            raise ValueError(f"Údaj '{'.'.join(path)}' musí být neprázdný text")
+    return KBIndex(kb)
+
+
+class KnowledgeBaseDB:
+    """Verzované KB v SQLite"""
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or Config.KB_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        """Inicializuj databázi"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS kb_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tenant TEXT NOT NULL,
+            profile TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            author TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (tenant, profile, version)
+        )
+        """)
+
+        conn.commit()
+        conn.close()
+
+    def save(self, tenant, profile, kb, author=None):
+        """
+        Uloží KB jako novou verzi
+
+        Raises:
+            ValueError pokud KB není platná
+        """
+        validate_kb(kb, profile)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("""
+                SELECT COALESCE(MAX(version), 0) FROM kb_versions
+                WHERE tenant = ? AND profile = ?
+            """, (tenant, profile))
+            version = cursor.fetchone()[0] + 1
+            cursor.execute("""
+                INSERT INTO kb_versions (tenant, profile, version, data, author)
+                VALUES (?, ?, ?, ?, ?)
+            """, (tenant, profile, version, json.dumps(kb, ensure_ascii=False), author))
+            conn.commit()
+        finally:
+            conn.close()
+
+        print(f"✅ KB {tenant}/{profile} uložena jako verze {version}")
+        return version
+
+    def get(self, tenant, profile, version=None):
+        """Vrátí (verze, kb) - poslední nebo konkrétní verzi, None pokud neexistuje"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        if version is None:
+            cursor.execute("""
+                SELECT version, data FROM kb_versions
+                WHERE tenant = ? AND profile = ?
+                ORDER BY version DESC LIMIT 1
+            """, (tenant, profile))
+        else:
+            cursor.execute("""
+                SELECT version, data FROM kb_versions
+                WHERE tenant = ? AND profile = ? AND version = ?
+            """, (tenant, profile, version))
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row:
+            return None
+        return row[0], json.loads(row[1])
+
+    def list_versions(self, tenant, profile):
+        """Historie verzí (bez dat)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT version, author, created_at FROM kb_versions
+            WHERE tenant = ? AND profile = ?
+            ORDER BY version DESC
+        """, (tenant, profile))
+        versions = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return versions
+
+    def latest_versions(self):
+        """{(tenant, profile): poslední verze} - levný dotaz pro polling"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT tenant, profile, MAX(version) FROM kb_versions
+            GROUP BY tenant, profile
+        """)
+        latest = {(tenant, profile): version for tenant, profile, version in cursor.fetchall()}
+        conn.close()
+        return latest
+
+    def rollback(self, tenant, profile, version, author=None):
+        """Obnoví starou verzi - uloží ji jako novou (historie se nepřepisuje)"""
+        found = self.get(tenant, profile, version)
+        if not found:
+            return None
+        return self.save(tenant, profile, found[1], author=author)
+
+
+class KBRegistry:
+    """
+    Indexy všech KB v paměti
+    Čtení = jedno načtení reference na slovník (bez zámku),
+    změna = nový slovník s novým indexem a výměna reference
+    """
+
+    def __init__(self, db=None):
+        self.db = db or KnowledgeBaseDB()
+        self._entries = {}  # (tenant, profile) -> {'version', 'kb', 'index'}
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._seed_defaults()
+        self.refresh()
+
+    def _seed_defaults(self):
+        """Výchozí KB ze zdrojáku (knowledge_base.py) se uloží jako verze 1"""
+        from .knowledge_base import KNOWLEDGE_BASE, RECEPTION_KB
+
+        latest = self.db.latest_versions()
+        for profile, kb in (('sales', KNOWLEDGE_BASE), ('reception', RECEPTION_KB)):
+            if (DEFAULT_TENANT, profile) not in latest:
+                self.db.save(DEFAULT_TENANT, profile, kb, author='seed')
+
+    def refresh(self):
+        """Načte verze změněné od posledního načtení (i z jiných procesů)"""
+        changed = 0
+        for (tenant, profile), version in self.db.latest_versions().items():
+            entry = self._entries.get((tenant, profile))
+            if entry is None or entry['version'] != version:
+                self.reload(tenant, profile)
+                changed += 1
+        return changed
+
+    def reload(self, tenant, profile):
+        """Postaví nový index mimo zámek a vymění referenci"""
+        found = self.db.get(tenant, profile)
+        if not found:
+            return None
+        version, kb = found
+        index = KBIndex(kb)
+
+        with self._write_lock:
+            current = self._entries.get((tenant, profile))
+            if current is not None and current['version'] >= version:
+                # Souběžný reload už nasadil stejnou nebo novější verzi
+                return current['version']
+            entries = dict(self._entries)
+            entries[(tenant, profile)] = {'version': version, 'kb': kb, 'index': index}
+            self._entries = entries
+
+        print(f"  🔄 KB {tenant}/{profile} v{version} načtena ({len(index.docs)} uzlů)")
+        return version
+
+    def resolve(self, profile, *tenants):
+        """První tenant s vlastní KB pro profil, jinak 'default'"""
+        entries = self._entries
+        for tenant in tenants:
+            if tenant and (tenant, profile) in entries:
+                return tenant
+        return DEFAULT_TENANT
+
+    def keys(self):
+        """Načtené KB jako [(tenant, profile)]"""
+        return sorted(self._entries)
+
+    def get(self, profile, tenant=None):
+        """Vrátí {'version', 'kb', 'index'} pro tenant (nebo výchozí)"""
+        entries = self._entries
+        return entries.get((tenant or DEFAULT_TENANT, profile)) or entries[(DEFAULT_TENANT, profile)]
+
+    def update(self, tenant, profile, kb, author=None):
+        """Uloží novou verzi a hned ji nasadí v tomto procesu"""
+        version = self.db.save(tenant, profile, kb, author=author)
+        self.reload(tenant, profile)
+        return version
+
+    def _loop(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"  ❌ KB reload chyba: {e}")
+
+    def start_polling(self, interval=None):
+        """Na pozadí hlídá změny KB v databázi"""
+        if self._thread and self._thread.is_alive():
+            return
+        interval = interval or Config.KB_RELOAD_INTERVAL
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval,),
+                                        name='kb-reload', daemon=True)
+        self._thread.start()
+        print(f"  ✓ KB hot-reload běží (každých {interval}s)")
+
+    def stop(self):
+        self._stop.set()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_kb_registry():
+    """Vrátí sdílený registr KB pro celý proces"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = KBRegistry()
+    return _registry
@@ -3,8 +3,15 @@
 Knowledge Base pro AI calling systém
 - SALES KB: Pro cold calling (odchozí hovory)
 - RECEPTION KB: Pro recepci (příchozí hovory)
+
+Slovníky níže jsou VÝCHOZÍ obsah - při prvním startu se uloží do DB
+(database/kb_store.py) jako verze 1 tenanta 'default'. Další změny
+(ceny, služby, KB pro konkrétního uživatele / kampaň) přes /admin/kb
+bez restartu.
 """
 
+import re
+
 # ============================================================
 # SALES KNOWLEDGE BASE (pro cold calling)
 # ============================================================
@@ -23,6 +30,7 @@ KNOWLEDGE_BASE = {
     "sluzby": {
         "webove_stranky_na_miru": {
             "popis": "Originální webové prezentace tvořené podle požadavků bez použití šablon",
+            "trigger": ["co nabízíte", "co děláte", "jaké služby"],
             "technologie": ["HTML", "CSS", "JavaScript", "Mobile-first"],
             "vyhody": [
                 "Ruční kódování bez šablon",
@@ -34,6 +42,7 @@ KNOWLEDGE_BASE = {
         },
         "seo_optimalizace": {
             "popis": "Optimalizace pro vyhledávače zajistí lepší viditelnost a přivede více klientů",
+            "trigger": ["co nabízíte", "co děláte", "jaké služby"],
             "vyhody": [
                 "Lepší pozice ve vyhledávačích",
                 "Více organického trafficu",
@@ -42,6 +51,7 @@ KNOWLEDGE_BASE = {
         },
         "rychlost_a_vykon": {
             "popis": "Rychlé načítání stránek pro lepší uživatelský zážitek",
+            "trigger": ["co nabízíte", "co děláte", "jaké služby"],
             "vyhody": [
                 "Lepší uživatelský zážitek",
                 "Lepší SEO výsledky",
@@ -54,21 +64,32 @@ KNOWLEDGE_BASE = {
         }
     },
     
+    "realizace": {
+        "doba": {
+            "nazev": "Doba realizace",
+            "popis": "2-4 týdny",
+            "trigger": ["jak dlouho", "kdy", "trvá", "termín"]
+        }
+    },
+    
     "cenik": {
         "onepage": {
             "nazev": "One-page web",
+            "trigger": ["kolik to stojí", "za kolik", "cena", "platit"],
             "cena": "8 000 Kč",
             "popis": "Jednoduchý web na jedné stránce, ideální pro vizitku nebo landing page",
             "vhodne_pro": ["vizitka", "landing page", "portfolio", "prezentace služby"]
         },
         "vicestranky": {
             "nazev": "Vícestránkový web",
+            "trigger": ["kolik to stojí", "za kolik", "cena", "platit"],
             "cena": "12 000 Kč",
             "popis": "Komplexní web s více podstránkami",
             "vhodne_pro": ["firemní prezentace", "portfolio", "kompletní služby"]
         },
         "personalizovane": {
             "nazev": "Personalizované řešení",
+            "trigger": ["kolik to stojí", "za kolik", "cena", "platit"],
             "cena": "dle požadavků (od 12 000 Kč)",
             "popis": "Web přesně na míru s pokročilými funkcemi",
             "vhodne_pro": ["e-shopy", "rezervační systémy", "pokročilé funkce", "komplexní projekty"]
@@ -78,6 +99,7 @@ KNOWLEDGE_BASE = {
     "namitky_a_reseni": {
         "nema_cas": {
             "namitka": "Nemám čas / nemám minutku",
+            "trigger": ["teď ne", "spěchám"],
             "typ": "soft_rejection",
             "best_response": "Chápu, že jste vytížený. Stačí jen 2 minuty - ptám se, jestli máte moderní web? Bez něj většina lidí najde konkurenci...",
             "success_rate": 55,
@@ -85,6 +107,7 @@ KNOWLEDGE_BASE = {
         },
         "je_to_drahe": {
             "namitka": "To je drahé / nemám peníze",
+            "trigger": ["drahé", "moc peněz"],
             "typ": "objection",
             "best_response": "Chápu. Web od 8 tisíc je ale investice, která se vrátí už prvními zákazníky. Kolik zákazníků teď ztrácíte, když vás na netu nenajdou?",
             "success_rate": 40,
@@ -99,6 +122,7 @@ KNOWLEDGE_BASE = {
         },
         "nemame_web": {
             "namitka": "Nemáme web / nemáme stránky",
+            "trigger": ["nemám web", "nemáme web"],
             "typ": "opportunity",
             "best_response": "To je přesně důvod, proč volám! Dnes bez webu přicházíte o zákazníky každý den. Konkurence vás předbíhá...",
             "success_rate": 75,
@@ -106,6 +130,7 @@ KNOWLEDGE_BASE = {
         },
         "stary_web": {
             "namitka": "Máme starý web / nefunguje dobře",
+            "trigger": ["starý web", "zastaralý", "nefunguje"],
             "typ": "opportunity",
             "best_response": "Presne! Starý web vás může stát zákazníky. Moderní, rychlý web od 12 tisíc vám přinese víc obchodů...",
             "success_rate": 70,
@@ -113,6 +138,7 @@ KNOWLEDGE_BASE = {
         },
         "nema_zajem": {
             "namitka": "Nemám zájem / nechci",
+            "trigger": ["nemám zájem", "nechci", "nezajímá"],
             "typ": "hard_rejection",
             "best_response": "Rozumím, díky za čas. Hezký den.",
             "success_rate": 5,
@@ -304,81 +330,119 @@ RECEPTION_KB = {
 }
 
 
+# ============================================================
+# INDEX (BM25 nad všemi uzly KB, hot-reload z DB)
+# ============================================================
+
+def get_index(profile='sales', tenant=None):
+    """Vrátí vyhledávací index pro daný profil ('sales' / 'reception') a tenanta"""
+    from .kb_store import get_kb_registry
+    return get_kb_registry().get(profile, tenant)['index']
+
+
+def get_kb(profile='sales', tenant=None):
+    """Aktuální verze KB (slovník) pro profil a tenanta"""
+    from .kb_store import get_kb_registry
+    return get_kb_registry().get(profile, tenant)['kb']
+
+
 # ============================================================
 # FUNKCE PRO SALES (cold calling)
 # ============================================================
 
-def get_context_for_query(user_message):
+def get_context_for_query(user_message, tenant=None):
     """
     Vyhledá relevantní kontext z SALES KB pro cold calling
     """
-    context_parts = []
     msg_lower = user_message.lower().strip()
     
     # Skip krátké zprávy a pozdravy
     if len(msg_lower) < 10 or msg_lower in ['dobrý den', 'ahoj', 'dobry den', 'slyšíme se']:
         return ""
     
-    # Detekce ceny
-    price_keywords = ['kolik stojí', 'cena', 'kolik to', 'za kolik', 'platit']
-    if any(keyword in msg_lower for keyword in price_keywords):
-        context_parts.append("CENÍK:")
-        context_parts.append("- One-page web: 8 000 Kč")
-        context_parts.append("- Vícestránkový web: 12 000 Kč")
-        context_parts.append("- Personalizované: od 12 000 Kč")
-    
-    # Detekce času
-    time_keywords = ['jak dlouho', 'kdy', 'trvá', 'termín']
-    if any(keyword in msg_lower for keyword in time_keywords):
-        context_parts.append("REALIZACE: 2-4 týdny")
-    
-    # Detekce služeb
-    service_keywords = ['co nabízíte', 'co děláte', 'jaké služby']
-    if any(keyword in msg_lower for keyword in service_keywords):
-        context_parts.append("SLUŽBY:")
-        context_parts.append("- Weby na míru (ruční kódování)")
-        context_parts.append("- SEO optimalizace")
-        context_parts.append("- Rychlost a výkon")
-    
-    # Příležitost
-    opportunity_phrases = ['nemáme web', 'nemám web', 'starý web', 'zastaralý', 'nefunguje']
-    if any(phrase in msg_lower for phrase in opportunity_phrases):
-        context_parts.append("🎯 PŘÍLEŽITOST! Nemá/špatný web!")
-        context_parts.append("AKCE: Push na schůzku!")
-    
-    # Námitky
-    kb = KNOWLEDGE_BASE['namitky_a_reseni']
-    
-    if any(word in msg_lower for word in ['drahé', 'nemám peníze']):
-        namitka = kb['je_to_drahe']
-        context_parts.append(f"NÁMITKA: {namitka['best_response']}")
+    return get_index('sales', tenant).context(msg_lower)
+
+
+def _price_for_speech(cena):
+    """'12 000 Kč' -> '12 tisíc korun' (TTS by '000' přečetl jako 'nula')"""
+    cena = re.sub(r'^.*\((.+)\)$', r'\1', cena)  # 'dle požadavků (od 12 000 Kč)' -> 'od 12 000 Kč'
+    return re.sub(r'(\d+) 000 Kč', r'\1 tisíc korun', cena)
+
+
+def get_fast_path_responses(profile='sales', tenant=None):
+    """
+    Předschválené odpovědi pro fast path v AIEngine (bez LLM)
+    Klíč = intent, hodnota = text odpovědi (předrenderuje TTS cache warmer)
+    Chybí-li v KB tenanta potřebný uzel, intent jde přes LLM
+    """
+    kb = get_kb(profile, tenant)
+    responses = {}
     
-    if any(word in msg_lower for word in ['nemám čas', 'teď ne', 'spěchám']):
-        namitka = kb['nema_cas']
-        context_parts.append(f"NÁMITKA: {namitka['best_response']}")
+    if profile == 'reception':
+        price = kb.get('typicke_dotazy', {}).get('cena_dotaz', {}).get('odpoved')
+        if price:
+            responses['price'] = price
+        return responses
     
-    if any(word in msg_lower for word in ['nemám zájem', 'nechci']):
-        namitka = kb['nema_zajem']
-        context_parts.append(f"HARD REJECTION → Rozluč se!")
+    rejection = kb.get('namitky_a_reseni', {}).get('nema_zajem', {}).get('best_response')
+    if rejection:
+        responses['rejection'] = rejection
     
-    return "\n".join(context_parts) if context_parts else ""
+    cenik = kb.get('cenik', {})
+    if all(key in cenik for key in ('onepage', 'vicestranky', 'personalizovane')):
+        responses['price'] = (
+            f"{cenik['onepage']['nazev']} stojí {_price_for_speech(cenik['onepage']['cena'])}, "
+            f"{cenik['vicestranky']['nazev'].lower()} {_price_for_speech(cenik['vicestranky']['cena'])} "
+            f"a řešení na míru {_price_for_speech(cenik['personalizovane']['cena'])}. "
+            f"Co by vám vyhovovalo?"
+        )
+    return responses
+
+
+def _price_lines(section):
+    """Řádky ceníku pro prompt z uzlů KB ('- Název: cena (trvání)')"""
+    lines = []
+    for item in section.values():
+        if not isinstance(item, dict) or 'cena' not in item:
+            continue
+        line = f"- {item.get('nazev', '')}: {item['cena']}"
+        if item.get('trvani'):
+            line += f" ({item['trvani']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def get_kb_digest(profile='sales', tenant=None):
+    """Celá KB jako text pro stabilní prefix promptu (cachuje se u providera)"""
+    return f"[ZNALOSTI Z DATABÁZE]:\n{get_index(profile, tenant).digest()}"
+
+
+def get_sales_call_context(contact_name, company=''):
+    """
+    Proměnná část promptu pro jeden hovor (jméno kontaktu)
+    Drží se mimo system prompt, aby prefix zůstal stejný pro všechny hovory
+    """
+    if company:
+        return f"[AKTUÁLNÍ HOVOR]: Voláš {contact_name} z firmy {company}."
+    return f"[AKTUÁLNÍ HOVOR]: Voláš {contact_name}."
 
 
-def get_sales_prompt_with_kb(product, contact_name):
+def get_sales_prompt_with_kb(product, contact_name=None, tenant=None):
     """
     Sales prompt pro cold calling
+    Bez jména kontaktu - to patří do get_sales_call_context()
     """
+    kb = get_kb('sales', tenant)
+    
     prompt = f"""Jsi Pavel, obchodník z MoravskeWeby.
-Voláš {contact_name} ohledně tvorby moderních webů.
+Voláš potenciálnímu zákazníkovi (jméno je v [AKTUÁLNÍ HOVOR]) ohledně tvorby moderních webů.
 
 INFO:
 - Firma: MoravskeWeby (Lososs Web Development)
 - Majitel: Ondřej Hyža, +420 735 744 433
 
 CENY (říkej jen když se ptají):
-- One-page: 8 000 Kč
-- Vícestránkový: 12 000 Kč
-- Na míru: od 12 000 Kč
+{_price_lines(kb.get('cenik', {}))}
 
 CÍL: Domluvit SCHŮZKU s Ondrou nebo poslat nabídku
 
@@ -409,66 +473,23 @@ Mluv česky, přirozeně, max 1-2 věty!"""
 # ============================================================
 # FUNKCE PRO RECEPCI (příchozí hovory)
 # ============================================================
-def get_reception_context(user_message):
+def get_reception_context(user_message, tenant=None):
     """
     Vyhledá relevantní kontext z BARBER SHOP KB
     """
-    context_parts = []
     msg_lower = user_message.lower().strip()
     
     # Skip krátké
     if len(msg_lower) < 5:
         return ""
     
-    kb = RECEPTION_KB  # ✅ BARBER KB
-    
-    # Typické dotazy
-    for key, dotaz in kb['typicke_dotazy'].items():
-        if any(trigger in msg_lower for trigger in dotaz['trigger']):
-            context_parts.append(f"TYP DOTAZU: {key}")
-            context_parts.append(f"ODPOVĚĎ: {dotaz['odpoved']}")
-    
-    # FAQ
-    for key, faq in kb['faq'].items():
-        if any(word in msg_lower for word in faq['otazka'].lower().split()[:3]):
-            context_parts.append(f"FAQ: {faq['odpoved']}")
-    
-    # Služby a ceny
-    if any(word in msg_lower for word in ['cena', 'kolik', 'stojí', 'služby']):
-        context_parts.append("CENÍK SLUŽEB:")
-        context_parts.append("- Pánský střih: 350 Kč (30 min)")
-        context_parts.append("- Dámský střih: 400 Kč (40 min)")
-        context_parts.append("- Dětský střih: 250 Kč (20 min)")
-        context_parts.append("- Holení: 250 Kč (20 min)")
-        context_parts.append("- Vousy: 200 Kč (15 min)")
-        context_parts.append("- Komplet: 700 Kč (60 min)")
-    
-    # Rezervace/Termín
-    if any(word in msg_lower for word in ['objednat', 'termín', 'rezervace', 'volno']):
-        context_parts.append("REZERVACE:")
-        context_parts.append(f"Telefon: {kb['firma']['kontakt']['telefon']}")
-        context_parts.append("Online: www.barbershop.cz/rezervace")
-        context_parts.append("AKCE: Nabídni konkrétní časy (např. 14:00, 15:30, 17:00)")
-    
-    # Otevírací doba
-    if any(word in msg_lower for word in ['otevřeno', 'otevírací', 'zavřeno']):
-        context_parts.append("OTEVÍRACÍ DOBA:")
-        context_parts.append("Po-Pá: 9:00-19:00")
-        context_parts.append("Sobota: 9:00-15:00")
-        context_parts.append("Neděle: zavřeno")
-    
-    # Adresa/Kde jste
-    if any(word in msg_lower for word in ['kde', 'adresa', 'najdu', 'dostanu']):
-        context_parts.append(f"ADRESA: {kb['firma']['kontakt']['adresa']}")
-        context_parts.append("Parkoviště: za rohem nebo Hlavní ulice")
-    
-    return "\n".join(context_parts) if context_parts else ""
+    return get_index('reception', tenant).context(msg_lower)
 
-def get_receptionist_prompt():
+def get_receptionist_prompt(tenant=None):
     """
     Prompt pro BARBER SHOP recepčního
     """
-    kb = RECEPTION_KB  # ✅ Tady se bere BARBER KB!
+    kb = get_kb('reception', tenant)  # ✅ Aktuální verze KB z DB
     
     prompt = f"""Jsi recepční barber shopu "{kb['firma']['nazev']}".
 Přijímáš objednávky a zodpovídáš dotazy po telefonu.
@@ -480,12 +501,7 @@ INFO O SALONU:
 - Otevírací doba: Po-Pá 9-19h, So 9-15h, Ne zavřeno
 
 SLUŽBY A CENY:
-- Pánský střih: 350 Kč (30 min)
-- Dámský střih: 400 Kč (40 min)
-- Dětský střih: 250 Kč (20 min)
-- Holení břitvou: 250 Kč (20 min)
-- Úprava vousů: 200 Kč (15 min)
-- Kompletní péče: 700 Kč (60 min)
+{_price_lines(kb.get('sluzby', {}))}
 
 JAK KOMUNIKOVAT:
 ✅ Přátelský a profesionální tón
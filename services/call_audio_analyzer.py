@@ -0,0 +1,304 @@
+# services/call_audio_analyzer.py
+"""
+Audio metriky hovorů z nahrávek - pro korelaci latence a mluvení s výsledkem hovoru
+- talk time a podíl mluvení per mluvčí (kanál dual-channel nahrávky = mluvčí)
+- ticho: celkové, nejdelší pauza uvnitř hovoru, ticho před první řečí
+- mezery mezi tahy per směr (customer->ai = jak dlouho zákazník čeká na odpověď), překryvy
+- hlasitost řeči, šum pozadí, SNR, clipping
+
+Vše vektorově nad dB po 20ms framech (stejný práh -40 dB jako VAD STTEngine),
+žádná smyčka přes framy - hodina stereo nahrávky za zlomek sekundy.
+Výsledek do call_analytics.db (call_audio_features) per nahrávka, s call_sid hovoru.
+
+Použití:
+    python -m services.call_audio_analyzer data/recordings
+    python -m services.call_audio_analyzer data/recordings --processes 4 --force
+    python -m services.call_audio_analyzer --report
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from config import Config
+from services.recording_transcriber import AUDIO_EXTENSIONS, RecordingTranscriber, load_recording
+
+FRAME_SECONDS = 0.02
+
+
+def frame_levels(channel, frame, block_frames=15000):
+    """
+    Úroveň (dB) po framech přes strided view - neúplný frame na konci se zahodí
+    Po blocích (5 min při 20 ms), float kopie celé nahrávky by u hodinového hovoru měla stovky MB
+    """
+    n_frames = len(channel) // frame
+    frames = np.lib.stride_tricks.as_strided(
+        channel, shape=(n_frames, frame),
+        strides=(channel.strides[0] * frame, channel.strides[0]),
+        writeable=False,
+    )
+    power = np.empty(n_frames, dtype=np.float32)
+    for start in range(0, n_frames, block_frames):
+        block = frames[start:start + block_frames].astype(np.float32)
+        power[start:start + block_frames] = np.einsum('ij,ij->i', block, block)
+    return 10 * np.log10(power / (frame * 32768.0 ** 2) + 1e-10)
+
+
+def speech_runs(is_speech, bridge_frames=0, min_frames=1):
+    """
+    Souvislé úseky řeči z masky po framech
+
+    Mezery kratší než bridge_frames se slijí (pauza mezi slovy),
+    úseky kratší než min_frames se zahodí (klik, šum)
+
+    Returns:
+        (starty, konce) - indexy framů, konec exkluzivně
+    """
+    padded = np.concatenate(([False], is_speech, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, ends = edges[::2], edges[1::2]
+    if len(starts) > 1:
+        keep = (starts[1:] - ends[:-1]) >= bridge_frames
+        starts = np.concatenate((starts[:1], starts[1:][keep]))
+        ends = np.concatenate((ends[:-1][keep], ends[-1:]))
+    long_enough = (ends - starts) >= min_frames
+    return starts[long_enough], ends[long_enough]
+
+
+def _distribution(values):
+    """count/mean/p50/p90/max (s)"""
+    if not len(values):
+        return {'count': 0}
+    return {
+        'count': int(len(values)),
+        'mean': round(float(np.mean(values)), 3),
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p90': round(float(np.percentile(values, 90)), 3),
+        'max': round(float(np.max(values)), 3),
+    }
+
+
+def _speaker_names(channels):
+    if channels == 1:
+        return ['mixed']
+    if channels == len(Config.CALL_AUDIO_SPEAKERS):
+        return list(Config.CALL_AUDIO_SPEAKERS)
+    return [f'channel_{i}' for i in range(channels)]
+
+
+def analyze_audio(samples, rate, speakers=None, threshold_db=None, bridge=0.3, min_speech=0.1):
+    """
+    Metriky jednoho hovoru
+
+    Args:
+        samples: int16 pole (vzorky, kanály) - kanál = mluvčí
+        rate: Vzorkovací frekvence
+        speakers: Jména kanálů (default Config.CALL_AUDIO_SPEAKERS, mono = 'mixed')
+        threshold_db: Práh řeči (default Config.CALL_AUDIO_VAD_DB)
+        bridge: Kratší pauza uvnitř řeči (s) se nepočítá jako ticho
+        min_speech: Kratší zvuk (s) není řeč
+
+    Returns:
+        dict {'duration', 'speakers', 'silence', 'overlap_time', 'turn_gaps'}
+    """
+    threshold_db = Config.CALL_AUDIO_VAD_DB if threshold_db is None else threshold_db
+    speakers = speakers or _speaker_names(samples.shape[1])
+    frame = int(rate * FRAME_SECONDS)
+    bridge_frames = int(round(bridge / FRAME_SECONDS))
+    min_frames = max(1, int(round(min_speech / FRAME_SECONDS)))
+
+    channels = [np.ascontiguousarray(samples[:, i]) for i in range(samples.shape[1])]
+    levels = np.stack([frame_levels(channel, frame) for channel in channels])
+    n_channels, n_frames = levels.shape
+    runs = [speech_runs(levels[i] > threshold_db, bridge_frames, min_frames) for i in range(n_channels)]
+
+    # Vyhlazená aktivita zpět do masky (kanály, framy) - +1 na startu, -1 na konci, cumsum
+    marks = np.zeros((n_channels, n_frames + 1), dtype=np.int32)
+    for i, (starts, ends) in enumerate(runs):
+        np.add.at(marks[i], starts, 1)
+        np.add.at(marks[i], ends, -1)
+    active = np.cumsum(marks, axis=1)[:, :n_frames] > 0
+
+    talk_frames = active.sum(axis=1)
+    total_talk = max(int(talk_frames.sum()), 1)
+
+    result = {'duration': round(len(samples) / rate, 3), 'speakers': {}}
+    for i, name in enumerate(speakers):
+        channel = channels[i]
+        peak = max(int(channel.max()), -int(channel.min()), 1) if len(channel) else 1
+        clipped = np.count_nonzero((channel >= 32767) | (channel <= -32767)) / max(len(channel), 1)
+        speech_levels = levels[i][active[i]]
+        background = levels[i][~active[i]]
+        stats = {
+            'talk_time': round(talk_frames[i] * FRAME_SECONDS, 3),
+            'talk_ratio': round(talk_frames[i] / total_talk, 3),
+            'segments': int(len(runs[i][0])),
+            'peak_db': round(20 * np.log10(peak / 32768.0), 1),
+            'clipping': round(clipped, 5),
+        }
+        if len(speech_levels):
+            # Průměr energie (ne průměr dB) + rozsah p10-p90
+            stats['level_db'] = round(float(10 * np.log10(np.mean(10 ** (speech_levels / 10)))), 1)
+            stats['level_p10_db'] = round(float(np.percentile(speech_levels, 10)), 1)
+            stats['level_p90_db'] = round(float(np.percentile(speech_levels, 90)), 1)
+        if len(background):
+            stats['noise_floor_db'] = round(float(np.median(background)), 1)
+        if 'level_db' in stats and 'noise_floor_db' in stats:
+            stats['snr_db'] = round(stats['level_db'] - stats['noise_floor_db'], 1)
+        result['speakers'][name] = stats
+
+    # Ticho = nikdo nemluví; nejdelší pauza jen mezi řečí (ne před první / po poslední)
+    anyone = active.any(axis=0)
+    quiet_starts, quiet_ends = speech_runs(~anyone)
+    internal = (quiet_starts > 0) & (quiet_ends < n_frames)
+    quiet = (quiet_ends - quiet_starts)[internal] * FRAME_SECONDS
+    speaking = np.flatnonzero(anyone)
+    result['silence'] = {
+        'total': round(float((~anyone).sum() * FRAME_SECONDS), 3),
+        'ratio': round(float((~anyone).mean()), 3) if n_frames else 0.0,
+        'longest': round(float(quiet.max()), 3) if len(quiet) else 0.0,
+        'leading': round(float(speaking[0] * FRAME_SECONDS), 3) if len(speaking) else round(n_frames * FRAME_SECONDS, 3),
+        'pauses': _distribution(quiet),
+    }
+    result['overlap_time'] = round(float((active.sum(axis=0) >= 2).sum() * FRAME_SECONDS), 3)
+    result['turn_gaps'] = _turn_gaps(runs, speakers, result['speakers']) if n_channels > 1 else {}
+    return result
+
+
+def _turn_gaps(runs, speakers, speaker_stats):
+    """
+    Mezery mezi tahy per směr (záporná = skočil do řeči)
+    Úseky všech kanálů podle startu, po sobě jdoucí úseky stejného mluvčího = jeden tah
+    """
+    starts = np.concatenate([s for s, _ in runs])
+    if not len(starts):
+        return {}
+    ends = np.concatenate([e for _, e in runs])
+    owner = np.concatenate([np.full(len(s), i) for i, (s, _) in enumerate(runs)])
+    order = np.argsort(starts, kind='stable')
+    starts, ends, owner = starts[order], ends[order], owner[order]
+
+    first = np.flatnonzero(np.concatenate(([True], owner[1:] != owner[:-1])))
+    turn_start, turn_end, turn_owner = starts[first], np.maximum.reduceat(ends, first), owner[first]
+    lengths = (turn_end - turn_start) * FRAME_SECONDS
+    for i, name in enumerate(speakers):
+        mine = lengths[turn_owner == i]
+        speaker_stats[name]['turns'] = int(len(mine))
+        speaker_stats[name]['longest_turn'] = round(float(mine.max()), 3) if len(mine) else 0.0
+
+    gaps = (turn_start[1:] - turn_end[:-1]) * FRAME_SECONDS
+    previous, following = turn_owner[:-1], turn_owner[1:]
+    turn_gaps = {}
+    for a, b in ((a, b) for a in range(len(speakers)) for b in range(len(speakers)) if a != b):
+        direction = gaps[(previous == a) & (following == b)]
+        if len(direction):
+            stats = _distribution(np.maximum(direction, 0.0))
+            stats['overlaps'] = int((direction < 0).sum())
+            turn_gaps[f"{speakers[a]}->{speakers[b]}"] = stats
+    return turn_gaps
+
+
+def analyze_file(path):
+    """Worker process poolu: (metriky, None) nebo (None, chyba)"""
+    try:
+        samples, rate = load_recording(path)
+        return analyze_audio(samples, rate), None
+    except Exception as e:
+        return None, str(e) or type(e).__name__
+
+
+class CallAudioAnalyzer:
+    """Dávková analýza adresáře nahrávek -> call_audio_features"""
+
+    def __init__(self, analytics=None, processes=None):
+        if analytics is None:
+            from database.call_analytics import CallAnalytics
+            analytics = CallAnalytics()
+        self.analytics = analytics
+        self.processes = processes or Config.RECORDING_DECODE_PROCESSES
+        self.stats = {'found': 0, 'skipped': 0, 'done': 0, 'failed': 0, 'audio_seconds': 0.0}
+
+    def find_pending(self, directory, force=False):
+        """Nahrávky bez analýzy (nebo se změněným souborem)"""
+        pending = []
+        for path in sorted(Path(directory).rglob('*')):
+            if path.suffix.lower() not in AUDIO_EXTENSIONS or not path.is_file():
+                continue
+            self.stats['found'] += 1
+            call_sid = RecordingTranscriber.call_sid_for(path)
+            fingerprint = RecordingTranscriber.fingerprint(path)
+            stored = self.analytics.get_recording_audio_features(path)
+            if not force and stored and stored['fingerprint'] == fingerprint:
+                self.stats['skipped'] += 1
+                continue
+            pending.append((path, call_sid, fingerprint))
+        return pending
+
+    def run(self, directory, limit=None, force=False):
+        pending = self.find_pending(directory, force=force)
+        if limit:
+            pending = pending[:limit]
+        print(f"\n[CallAudioAnalyzer] {len(pending)} nahrávek k analýze "
+              f"({self.stats['skipped']} hotových přeskočeno)")
+        if not pending:
+            return self.stats
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            results = pool.map(analyze_file, [str(path) for path, _, _ in pending], chunksize=4)
+            for (path, call_sid, fingerprint), (features, error) in zip(pending, results):
+                if error:
+                    self.stats['failed'] += 1
+                    print(f"  ❌ {path.name}: {error}")
+                    continue
+                self.analytics.save_audio_features(call_sid, path, fingerprint, features)
+                self.stats['done'] += 1
+                self.stats['audio_seconds'] += features['duration']
+
+        elapsed = time.perf_counter() - started
+        print(f"  ✅ Hotovo: {self.stats['done']} nahrávek, {self.stats['audio_seconds']:.0f}s audia "
+              f"za {elapsed:.1f}s, {self.stats['failed']} chyb")
+        return self.stats
+
+    def report(self):
+        """Průměrné metriky hovorů podle výsledku hovoru (outcome z AI reportu, každý hovor jednou)"""
+        groups = defaultdict(list)
+        for row in self.analytics.get_audio_features_with_outcomes():
+            groups[row['outcome'] or 'bez reportu'].append(row)
+
+        columns = ['customer_talk_ratio', 'response_gap_p50', 'response_gap_p90', 'longest_silence', 'overlap_time']
+        print(f"\n{'outcome':<22}{'hovorů':>10}{'nahrávek':>10}" + ''.join(f"{c:>22}" for c in columns))
+        summary = {}
+        for outcome, rows in sorted(groups.items(), key=lambda item: -len(item[1])):
+            means = {}
+            for column in columns:
+                values = [row[column] for row in rows if row[column] is not None]
+                means[column] = round(sum(values) / len(values), 3) if values else None
+            recordings = sum(row['recordings'] for row in rows)
+            summary[outcome] = {'calls': len(rows), 'recordings': recordings, **means}
+            print(f"{outcome:<22}{len(rows):>10}{recordings:>10}" + ''.join(
+                f"{'-' if means[c] is None else means[c]:>22}" for c in columns))
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Audio metriky hovorů z nahrávek')
+    parser.add_argument('directory', nargs='?', default=Config.RECORDINGS_DIR)
+    parser.add_argument('--processes', type=int, default=None, help='Procesů pro dekódování + analýzu')
+    parser.add_argument('--limit', type=int, default=None, help='Max nahrávek v tomto běhu')
+    parser.add_argument('--force', action='store_true', help='Analyzovat i hotové nahrávky')
+    parser.add_argument('--report', action='store_true', help='Jen vypsat metriky podle výsledku hovoru')
+    args = parser.parse_args()
+
+    analyzer = CallAudioAnalyzer(processes=args.processes)
+    if not args.report:
+        analyzer.run(args.directory, limit=args.limit, force=args.force)
+    analyzer.report()
+
+
+if __name__ == '__main__':
+    main()
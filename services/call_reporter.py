@@ -4,16 +4,17 @@ AI Reporter - vyhodnocuje hovory pomocí GPT
 Analyzuje úspěšnost, generuje skóre a shrnutí
 """
 
-from openai import OpenAI
 from config import Config
+from core.llm_client import get_llm_client
 import json
 
 
 class CallReporter:
     """AI služba pro vyhodnocení hovorů"""
     
-    def __init__(self):
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+    def __init__(self, llm=None):
+        # Sdílený LLM klient - žádné nové spojení na každý status callback
+        self.llm = llm or get_llm_client()
         self.model = "gpt-4o-mini"  # Levnější a rychlejší
     
     def analyze_call(self, call_sid, conversation):
@@ -91,9 +92,8 @@ VRAŤ JSON:
 ODPOVĚĎ (POUZE JSON):"""
 
             # Zavolej GPT
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
+            response = self.llm.complete_sync(
+                [
                     {
                         "role": "system",
                         "content": "Jsi AI analytik prodejních hovorů. Analyzuješ cold calling a vracíš JSON."
@@ -103,6 +103,8 @@ ODPOVĚĎ (POUZE JSON):"""
                         "content": prompt
                     }
                 ],
+                timeout=Config.LLM_BACKGROUND_TIMEOUT,
+                model=self.model,
                 temperature=0.3,
                 max_tokens=500
             )
@@ -0,0 +1,193 @@
+# services/first_turn.py
+"""
+Předgenerovaný první tah odchozího hovoru
+První reakce oslovovaného je skoro vždy jedna z mála frází ("ano?", "kdo volá?",
+"nemám čas", "nemáme zájem"). Odpověď AI i audio se proto spočítají předem
+pro KB každé kampaně (tenant) a /outbound je předá AIEngine - nejdůležitější
+tah cold callu pak odpoví bez čekání na LLM a TTS.
+
+Očekávané reakce = Prompts.FIRST_REPLIES + nejčastější skutečné první
+repliky z call_analytics.db, top N podle četnosti.
+Cache je per (tenant, verze KB) - po změně KB se přegeneruje na pozadí.
+"""
+
+import threading
+from collections import Counter, defaultdict
+
+from config import Config, Prompts
+
+# Pomocný hovor pro předpočítání - bez jména, odpověď musí sedět na každý kontakt
+GENERIC_GREETING = "Dobrý den, volám z MoravskéWeby."
+GENERIC_CALL_CONTEXT = "[AKTUÁLNÍ HOVOR]: Voláš potenciálnímu zákazníkovi. Jméno neuváděj."
+
+
+class FirstTurnCache:
+    """Předpočítané odpovědi (a audio) na první reakci, per KB kampaně"""
+
+    def __init__(self, ai, tts=None, prompt_builder=None, analytics=None, top_n=None):
+        """
+        ai: AIEngine (stejný, který pak hovor vede)
+        prompt_builder: tenant -> system prompt odchozího hovoru
+        """
+        self.ai = ai
+        self.tts = tts
+        self.prompt_builder = prompt_builder
+        self.analytics = analytics
+        self.top_n = top_n or Config.FIRST_TURN_TOP_N
+        self._entries = {}  # tenant -> {'version', 'replies': {klíč přepisu: odpověď}, 'phrases'}
+        self._preparing = set()
+        self._lock = threading.Lock()
+
+    def mine_first_replies(self):
+        """
+        Nejčastější první repliky oslovených z uložených hovorů
+
+        Returns:
+            Counter {utterance_key: počet}, {utterance_key: nejčastější znění}
+        """
+        counts = Counter()
+        surface_forms = defaultdict(Counter)
+        try:
+            if self.analytics is None:
+                from database.call_analytics import CallAnalytics
+                self.analytics = CallAnalytics()
+            calls = self.analytics.get_all_calls()
+        except Exception as e:
+            print(f"  ⚠️  Nelze načíst call_analytics.db: {e}")
+            return counts, {}
+
+        for call in calls:
+            messages = [m for m in call.get('conversation') or [] if m.get('role') != 'system']
+            # Odchozí hovor = začíná pozdravem AI, první replika zákazníka hned po něm
+            if len(messages) < 2 or messages[0].get('role') != 'assistant' or messages[1].get('role') != 'user':
+                continue
+            # Starší hovory mají před replikou [INTENT]/[INFO Z DATABÁZE]
+            text = (messages[1].get('content') or '').split('\n')[-1].strip()
+            key = self.ai.utterance_key(text)
+            if not key or len(key.split()) > Config.FIRST_TURN_MAX_WORDS:
+                continue
+            counts[key] += 1
+            surface_forms[key][text] += 1
+
+        return counts, {key: forms.most_common(1)[0][0] for key, forms in surface_forms.items()}
+
+    def expected_replies(self):
+        """
+        Top N očekávaných reakcí
+
+        Returns:
+            [(kanonická fráze, [klíče variant])] seřazené podle četnosti v hovorech
+        """
+        counts, surface_forms = self.mine_first_replies()
+
+        patterns = []
+        known = set()
+        for canonical, variants in Prompts.FIRST_REPLIES.items():
+            keys = list(dict.fromkeys(self.ai.utterance_key(v) for v in [canonical] + variants))
+            known.update(keys)
+            patterns.append((sum(counts[k] for k in keys), canonical, keys))
+
+        # Časté reakce, které výchozí seznam nezná
+        for key, count in counts.items():
+            if key not in known and count >= Config.FIRST_TURN_MIN_COUNT:
+                patterns.append((count, surface_forms[key], [key]))
+
+        # Stabilní řazení - při shodě zůstává pořadí z Prompts.FIRST_REPLIES
+        patterns.sort(key=lambda item: item[0], reverse=True)
+        return [(canonical, keys) for _, canonical, keys in patterns[:self.top_n]]
+
+    def _kb_version(self, tenant):
+        from database.kb_store import get_kb_registry
+        return get_kb_registry().get('sales', tenant)['version']
+
+    def prepare(self, tenant):
+        """Vygeneruje odpovědi (LLM) a audio (TTS) pro KB tenanta - blokující"""
+        version = self._kb_version(tenant)
+        system_prompt = self.prompt_builder(tenant)
+        print(f"\n[FirstTurnCache] Předgeneruji první tah pro {tenant} (KB v{version})...")
+
+        replies = {}
+        phrases = []
+        for i, (canonical, keys) in enumerate(self.expected_replies()):
+            call_sid = f"_first_turn:{tenant}:{i}"
+            try:
+                self.ai.start_conversation(call_sid, system_prompt, tenant=tenant,
+                                           call_context=GENERIC_CALL_CONTEXT)
+                self.ai.conversations[call_sid].append({'role': 'assistant', 'content': GENERIC_GREETING})
+                reply = self.ai.pregenerate_reply(call_sid, canonical)
+            except Exception as e:
+                print(f"  ⚠️  '{canonical}': {e}")
+                continue
+            finally:
+                self.ai.discard_conversation(call_sid)
+
+            if not reply:
+                continue
+            for key in keys:
+                replies[key] = reply
+            phrases.append(reply)
+            print(f"  ✓ '{canonical}' -> '{reply}'")
+
+        # Audio předem - první tah pak jde z cache
+        phrases = list(dict.fromkeys(phrases))
+        if self.tts is not None and phrases:
+            try:
+                self.tts.generate_many(phrases, use_cache=True)
+            except Exception as e:
+                print(f"  ⚠️  TTS předrenderování selhalo: {e}")
+
+        with self._lock:
+            self._entries[tenant] = {'version': version, 'replies': replies, 'phrases': phrases}
+        print(f"  ✅ První tah {tenant}: {len(phrases)} odpovědí, {len(replies)} variant reakcí")
+        return replies
+
+    def prepare_async(self, tenant):
+        """Spustí prepare na pozadí (jednou pro tenanta naráz)"""
+        with self._lock:
+            if tenant in self._preparing:
+                return
+            self._preparing.add(tenant)
+
+        def run():
+            try:
+                self.prepare(tenant)
+            except Exception as e:
+                print(f"  ❌ Předgenerování prvního tahu {tenant} selhalo: {e}")
+            finally:
+                with self._lock:
+                    self._preparing.discard(tenant)
+
+        threading.Thread(target=run, name=f'first-turn-{tenant}', daemon=True).start()
+
+    def get(self, tenant):
+        """
+        Odpovědi pro aktuální verzi KB tenanta
+        Chybí-li (nebo je KB novější), vrátí None a připraví je na pozadí
+        """
+        entry = self._entries.get(tenant)
+        try:
+            current = self._kb_version(tenant)
+        except Exception:
+            current = entry['version'] if entry else None
+        if entry and entry['version'] == current:
+            return entry['replies']
+        self.prepare_async(tenant)
+        return None
+
+    def phrases(self):
+        """Texty všech předgenerovaných odpovědí (pro pinning v TTS cache)"""
+        return [phrase for entry in list(self._entries.values()) for phrase in entry['phrases']]
+
+
+_cache = None
+
+
+def set_first_turn_cache(cache):
+    """Zaregistruje cache procesu (server) - čte ji TTS cache warmer"""
+    global _cache
+    _cache = cache
+
+
+def pregenerated_phrases():
+    """Odpovědi předgenerované v tomto procesu ([] když cache neběží)"""
+    return _cache.phrases() if _cache is not None else []
@@ -0,0 +1,393 @@
+# services/media_stream.py
+"""
+Hovor přes Twilio Media Streams (<Connect><Stream>) s barge-in
+S <Gather><Play> musí zákazník dohrát celý klip - když mluví do něj, část řeči
+se ztratí a tah se natáhne. Tady běží VAD nad příchozím audiem i během přehrávání:
+- zákazník začne mluvit do odpovědi AI -> "clear" (Twilio zahodí zbytek audia) do ~100 ms
+- jeho řeč se nahrává od nástupu (pre-roll endpointeru) -> STT -> AIEngine -> TTS zpět do streamu
+
+Audio: 8 kHz G.711 mu-law po 20 ms v obou směrech.
+TTS jde přímo z ElevenLabs jako ulaw_8000 (bez převodu, přes breaker failoveru),
+jinak přes TTS cache + převod; bez audia lokální TTS nebo předrenderovaná omluva.
+
+Server: WebSocket /media-stream přes flask-sock (volitelný, Config.MEDIA_STREAM_ENABLED)
+"""
+
+import asyncio
+import base64
+import io
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+import wave
+
+import numpy as np
+
+from config import Config, Prompts
+from core.async_loop import get_background_loop
+from core.audio_encoding import ulaw_decode, ulaw_encode
+from core.stt_engine import SpeechEndpointer
+from core.stt_filters import apply_text_filters, gate_utterance
+from core.tts_providers import LocalTTSProvider
+
+RATE = 8000
+CHUNK_BYTES = 320  # 40 ms mu-law na zprávu - barge-in utne odesílání nejpozději po jednom kousku
+GOODBYE_PHRASES = ['hezký den', 'nashledanou', 'děkuji za volání']
+
+
+def wav_to_ulaw(source):
+    """16-bit WAV (cesta nebo file-like) -> mu-law 8 kHz"""
+    with wave.open(source, 'rb') as wf:
+        rate, channels = wf.getframerate(), wf.getnchannels()
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+    samples = samples.reshape(-1, channels)[:, 0]
+    if rate != RATE:
+        target = np.arange(int(len(samples) * RATE / rate)) * (rate / RATE)
+        samples = np.interp(target, np.arange(len(samples)), samples).astype(np.int16)
+    return ulaw_encode(samples.tobytes())
+
+
+def file_to_ulaw(path):
+    """Audio z TTS cache -> mu-law 8 kHz (WAV přes numpy, ostatní přes ffmpeg)"""
+    if path.endswith('.wav'):
+        return wav_to_ulaw(path)
+
+    if not shutil.which('ffmpeg'):
+        raise RuntimeError(f"{os.path.basename(path)}: bez ffmpeg nejde převést do mu-law")
+    result = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', path, '-f', 'mulaw', '-ar', str(RATE), '-ac', '1', '-'],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors='ignore').strip() or 'ffmpeg selhal')
+    return result.stdout
+
+
+class MediaStreamCall:
+    """Jeden hovor na WebSocketu Twilio Media Streams"""
+
+    def __init__(self, send, receptionist, tts, backend=None):
+        """
+        send: funkce(str) - odešle zprávu do WebSocketu (volá se z více vláken)
+        receptionist: ReceptionistService (AIEngine hovoru)
+        backend: STT backend sdílený všemi hovory (None = vlastní podle Config.STT_BACKEND)
+        """
+        if backend is None:
+            from core.stt_backends import build_backend
+            backend = build_backend()
+
+        self._send_raw = send
+        self._send_lock = threading.Lock()
+        self.receptionist = receptionist
+        self.tts = tts
+        self.backend = backend
+
+        self.vad_threshold_db = Config.MEDIA_STREAM_VAD_DB
+        self.barge_in_enabled = Config.BARGE_IN_ENABLED
+        self.barge_in_threshold_db = Config.BARGE_IN_THRESHOLD_DB
+        self.barge_in_min_speech = Config.BARGE_IN_MIN_SPEECH
+        self.endpointer = SpeechEndpointer(rate=RATE, min_speech=0.3, trailing_silence=0.6,
+                                           pre_roll=0.3, max_duration=30)
+
+        self.stream_sid = None
+        self.call_sid = None
+        self.started_at = None
+        self.speaking = False  # Audio AI odeslané a (podle Twilia) ještě nedohrané
+        self.closed = False
+        self._cancel = threading.Event()  # Barge-in -> přestat posílat rozpracovanou odpověď
+        self._barge_run = 0.0  # Souvislá hlasitá řeč během přehrávání (s)
+        self._marks = 0
+        self._playing_mark = None
+        self._hangup_pending = False
+        self._work = queue.Queue()  # ('say', text) | ('utterance', pcm)
+        self._worker = None
+        self.stats = {'utterances': 0, 'gated': 0, 'filtered': 0, 'ignored': 0,
+                      'replies': 0, 'barge_ins': 0}
+
+    @classmethod
+    def serve(cls, ws, receptionist, tts, backend=None):
+        """Obslouží WebSocket (flask-sock) do konce hovoru"""
+        call = cls(ws.send, receptionist, tts, backend=backend)
+        try:
+            while not call.closed:
+                message = ws.receive()
+                if message is None:
+                    break
+                call.handle(json.loads(message))
+        finally:
+            call.close()
+        return call
+
+    # ============================================================
+    # PŘÍCHOZÍ ZPRÁVY
+    # ============================================================
+
+    def handle(self, message):
+        """Jedna zpráva od Twilia (connected / start / media / mark / stop)"""
+        event = message.get('event')
+        if event == 'media':
+            media = message['media']
+            if media.get('track', 'inbound') == 'inbound':
+                self.feed(ulaw_decode(base64.b64decode(media['payload'])))
+        elif event == 'start':
+            start = message['start']
+            self.stream_sid = start['streamSid']
+            self.call_sid = start['callSid']
+            self.started_at = time.monotonic()
+            print(f"\n📡 Media stream {self.stream_sid} (hovor {self.call_sid})")
+            self._worker = threading.Thread(target=self._work_loop, name=f'media-{self.call_sid}', daemon=True)
+            self._worker.start()
+            greeting = start.get('customParameters', {}).get('greeting')
+            if greeting:
+                self._work.put(('say', greeting))
+        elif event == 'mark':
+            self._on_mark(message['mark']['name'])
+        elif event == 'stop':
+            self.closed = True
+
+    def feed(self, pcm):
+        """Příchozí audio zákazníka (16-bit PCM 8 kHz) - VAD, barge-in, konec repliky"""
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        if not len(samples):
+            return
+        duration = len(samples) / RATE
+        level = 10 * np.log10(np.mean(samples ** 2) + 1e-10)
+
+        if self.speaking and self.barge_in_enabled:
+            self._barge_run = self._barge_run + duration if level > self.barge_in_threshold_db else 0.0
+            if self._barge_run >= self.barge_in_min_speech:
+                self.barge_in()
+
+        if self.endpointer.feed(pcm, level > self.vad_threshold_db) != SpeechEndpointer.DONE:
+            return
+
+        if self.speaking:
+            # Replika celá pod hlasem AI bez barge-in = ozvěna / hluk linky
+            self.stats['ignored'] += 1
+        elif gate_utterance(self.endpointer) is not None:
+            self.stats['gated'] += 1
+        else:
+            self.stats['utterances'] += 1
+            self._work.put(('utterance', self.endpointer.audio))
+        self.endpointer.reset()
+
+    def barge_in(self):
+        """Zákazník mluví do odpovědi - Twilio zahodí zbytek audia, posílání se zastaví"""
+        with self._send_lock:
+            # Pod zámkem odesílání - po "clear" už žádné audio ani značka rozpracované odpovědi
+            self._cancel.set()
+            self.speaking = False
+            self._playing_mark = None
+            self._hangup_pending = False
+            self._barge_run = 0.0
+            self.stats['barge_ins'] += 1
+            if not self.closed:
+                self._send_raw(json.dumps({'event': 'clear', 'streamSid': self.stream_sid}))
+        print("  ✋ Barge-in - přehrávání zastaveno")
+
+    def _on_mark(self, name):
+        """Twilio dohrál audio až po značku"""
+        if name != self._playing_mark:
+            return  # Značka odpovědi přerušené barge-inem
+        self.speaking = False
+        self._playing_mark = None
+        if self._hangup_pending:
+            print("  👋 ROZLOUČENÍ - zavírám stream")
+            self.closed = True  # Po <Connect> následuje <Hangup>
+
+    # ============================================================
+    # ODPOVĚDI (vlákno hovoru)
+    # ============================================================
+
+    def _work_loop(self):
+        while True:
+            item = self._work.get()
+            if item is None:
+                return
+            kind, payload = item
+            try:
+                if kind == 'say':
+                    self.speak(payload)
+                else:
+                    self._respond(payload)
+            except Exception as e:
+                print(f"  ❌ Media stream chyba: {e}")
+
+    def _respond(self, pcm):
+        """Replika zákazníka -> přepis -> AIEngine -> odpověď do streamu"""
+        started = time.perf_counter()
+        # Telefonní filtry - "Ano." / "No, ano." jsou nejčastější odpovědi, ne halucinace
+        text, reason = apply_text_filters(self.backend.transcribe(pcm, RATE), Config.STT_PHONE_TEXT_FILTERS)
+        if reason:
+            self.stats['filtered'] += 1
+            print(f"  ⏭️  {reason}")
+            return
+        print(f"\n🎤 '{text}' (STT {(time.perf_counter() - started) * 1000:.0f}ms)")
+
+        reply = self.receptionist.process_message(self.call_sid, text)
+        if len(reply) > 200:
+            reply = reply.split('.')[0] + '.'
+        print(f"  AI: {reply}")
+        self.stats['replies'] += 1
+        is_goodbye = any(phrase in reply.lower() for phrase in GOODBYE_PHRASES)
+        self.speak(reply, hangup=is_goodbye)
+        if is_goodbye:
+            # Stejně jako <Gather> cesta - hovor se uzavře a uloží hned po rozloučení
+            print("  👋 ROZLOUČENÍ")
+            self.receptionist.end_call(self.call_sid, int(time.monotonic() - self.started_at))
+
+    def speak(self, text, hangup=False):
+        """Pošle odpověď do streamu; značka na konci ohlásí dohrání"""
+        self._cancel.clear()
+        self._barge_run = 0.0
+        self.speaking = True
+
+        sent = 0
+        for chunk in self._tts_chunks(text):
+            if not self._send({'event': 'media', 'streamSid': self.stream_sid,
+                               'media': {'payload': base64.b64encode(chunk).decode('ascii')}},
+                              cancellable=True):
+                return
+            sent += len(chunk)
+
+        with self._send_lock:
+            if self._cancel.is_set() or self.closed:
+                return
+            if not sent:
+                self.speaking = False
+                self.closed = hangup
+                return
+            self._marks += 1
+            self._playing_mark = f"reply-{self._marks}"
+            self._hangup_pending = hangup
+            self._send_raw(json.dumps({'event': 'mark', 'streamSid': self.stream_sid,
+                                       'mark': {'name': self._playing_mark}}))
+
+    def _tts_chunks(self, text, chunk_bytes=CHUNK_BYTES):
+        """
+        Audio odpovědi jako mu-law 8 kHz po kouscích
+        ElevenLabs streamuje ulaw_8000 rovnou (první kousek po prvním bytu providera),
+        jinak TTSEngine.generate (cache, failover) a převod souboru.
+        Bez audia z TTS (vyhrál twilio_say / deadline) -> lokální TTS, nebo omluva z cache
+        """
+        if self.tts.failover.providers[0].name == 'elevenlabs':
+            streamed = yield from self._stream_elevenlabs(text, chunk_bytes)
+            if streamed:
+                return
+
+        url = self.tts.generate(text, use_cache=True)
+        if url:
+            audio = file_to_ulaw(os.path.join(Config.AUDIO_CACHE_DIR, url.rsplit('/', 1)[-1]))
+        else:
+            audio = self._fallback_audio(text)
+        for i in range(0, len(audio), chunk_bytes):
+            yield audio[i:i + chunk_bytes]
+
+    def _stream_elevenlabs(self, text, chunk_bytes):
+        """
+        ElevenLabs stream přes breaker failoveru - otevřený breaker = rovnou TTS cache,
+        čekání na kousek omezuje provider_timeout (ne celý TTS_TIMEOUT)
+        Returns (přes yield from): True pokud stream odpověď vyřídil
+        """
+        failover = self.tts.failover
+        breaker = failover.breakers['elevenlabs']
+        if not breaker.allow_request():
+            failover.stats['fast_fails'] += 1
+            return False
+
+        chunks = queue.Queue()
+        future = get_background_loop().submit(self._pump_elevenlabs(text, chunks))
+        sent = False
+        try:
+            while True:
+                try:
+                    chunk = chunks.get(timeout=failover.provider_timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"elevenlabs: timeout {failover.provider_timeout}s")
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                sent = True
+                for i in range(0, len(chunk), chunk_bytes):
+                    yield chunk[i:i + chunk_bytes]
+        except GeneratorExit:
+            breaker.release()  # Odpověď zrušená barge-inem / koncem hovoru - provider za to nemůže
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            failover.stats['failures'] += 1
+            if sent:
+                print(f"  ❌ TTS stream přerušen: {e}")
+                return True
+            print(f"  ⚠️  TTS stream selhal ({e or type(e).__name__}) - zkouším TTS cache")
+            return False
+        finally:
+            future.cancel()
+
+        if not sent:
+            breaker.record_failure()
+            failover.stats['failures'] += 1
+            print("  ⚠️  TTS stream bez audia - zkouším TTS cache")
+            return False
+        breaker.record_success()
+        return True
+
+    def _fallback_audio(self, text):
+        """Odpověď bez audia z TTS: lokální render textu, jinak předrenderovaná omluva"""
+        if LocalTTSProvider.is_available():
+            try:
+                audio = get_background_loop().run(self._render_local(text), timeout=Config.TTS_TIMEOUT)
+                print("  Degraded: odpověď z lokálního TTS")
+                return wav_to_ulaw(io.BytesIO(audio))
+            except Exception as e:
+                print(f"  ⚠️  Lokální TTS selhal: {e or type(e).__name__}")
+
+        filename = self.tts.cache_filename(Prompts.ERROR_MESSAGE)
+        if filename:
+            print("  ⚠️  TTS bez audia - přehrávám omluvu")
+            return file_to_ulaw(os.path.join(Config.AUDIO_CACHE_DIR, filename))
+        print("  ❌ TTS bez audia - odpověď nezazní")
+        return b''
+
+    async def _render_local(self, text):
+        normalized = self.tts._normalize_czech_text(text)
+        return b''.join([chunk async for chunk in LocalTTSProvider().stream(normalized)])
+
+    async def _pump_elevenlabs(self, text, chunks):
+        """Na sdílené smyčce: ElevenLabs stream -> fronta vlákna hovoru"""
+        try:
+            normalized = self.tts._normalize_czech_text(text)
+            async for chunk in self.tts.client.stream(normalized, output_format='ulaw_8000'):
+                if self._cancel.is_set():
+                    break
+                chunks.put(chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            chunks.put(e)
+        chunks.put(None)
+
+    # ============================================================
+
+    def _send(self, message, cancellable=False):
+        """
+        Odešle zprávu; cancellable = audio odpovědi, které barge-in zahodil
+        Returns: False pokud se neodeslalo (hovor skončil / barge-in)
+        """
+        with self._send_lock:
+            if self.closed or (cancellable and self._cancel.is_set()):
+                return False
+            self._send_raw(json.dumps(message))
+            return True
+
+    def close(self):
+        """Konec hovoru - zastaví vlákno odpovědí"""
+        self.closed = True
+        self._cancel.set()
+        self._work.put(None)
+        print(f"  📡 Stream {self.stream_sid} ukončen: {self.stats}")
@@ -1,7 +1,7 @@
 # services/receptionist.py - OPRAVENO
 
 from core import AIEngine, TTSEngine
-from config import Prompts
+from config import Config, Prompts
 
 # ✅ IMPORT S FALLBACKEM
 try:
@@ -16,12 +16,12 @@ except:
 class ReceptionistService:
     """Recepcni sluzba pro prichozi hovory"""
     
-    def __init__(self):
+    def __init__(self, tts=None):
         print("Inicializuji ReceptionistService...")
         
         # ✅ IMPORT RECEPČNÍ KB
         try:
-            from database.knowledge_base import get_receptionist_prompt, RECEPTION_KB
+            from database.knowledge_base import get_receptionist_prompt
             self.kb_available = True
             print("  ✅ Knowledge Base načtena")
         except Exception as e:
@@ -36,7 +36,7 @@ class ReceptionistService:
             raise
         
         try:
-            self.tts = TTSEngine()
+            self.tts = tts or TTSEngine()
             print("  ✓ TTSEngine OK")
         except Exception as e:
             print(f"  ✗ TTSEngine chyba: {e}")
@@ -56,10 +56,12 @@ class ReceptionistService:
         
         print("ReceptionistService ready!")
     
-    def handle_call(self, call_sid, caller_number):
+    def handle_call(self, call_sid, caller_number, tenant=None):
         """
         Zpracuje prichozi hovor
+        tenant: cí KB pouzit (None = Config.RECEPTION_TENANT)
         """
+        tenant = tenant or Config.RECEPTION_TENANT
         print(f"\n[ReceptionistService] handle_call({call_sid})")
         
         # Ulozeni do DB (pouze pokud je DB dostupná)
@@ -79,12 +81,12 @@ class ReceptionistService:
         try:
             # ✅ POUŽIJ RECEPČNÍ PROMPT Z KB
             if self.kb_available:
-                from database.knowledge_base import get_receptionist_prompt, RECEPTION_KB
-                receptionist_prompt = get_receptionist_prompt()
+                from database.knowledge_base import get_receptionist_prompt, get_kb
+                receptionist_prompt = get_receptionist_prompt(tenant)
                 print("  ✅ Použit RECEPČNÍ prompt z KB")
                 
-                # Dynamický pozdrav z KB
-                firma_nazev = RECEPTION_KB['firma']['nazev']
+                # Dynamický pozdrav z KB (aktuální verze tenanta)
+                firma_nazev = get_kb('reception', tenant)['firma']['nazev']
                 greeting = f"Dobrý den, {firma_nazev}, recepce. Jak vám mohu pomoci?"
             else:
                 # Fallback
@@ -95,7 +97,7 @@ class ReceptionistService:
             
             # Zahajeni konverzace
             print("  Zahajuji konverzaci...")
-            self.ai.start_conversation(call_sid, receptionist_prompt)
+            self.ai.start_conversation(call_sid, receptionist_prompt, profile='reception', tenant=tenant)
             print("  ✓ Konverzace zahajena")
             
         except Exception as e:
@@ -116,7 +118,7 @@ class ReceptionistService:
             return reply
         except Exception as e:
             print(f"  ✗ AI chyba: {e}")
-            return "Omlouvam se, nastala chyba."
+            return Prompts.ERROR_MESSAGE_AI
     
     def end_call(self, call_sid, duration):
         """Ukonci hovor"""
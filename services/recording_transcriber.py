@@ -0,0 +1,288 @@
+# services/recording_transcriber.py
+"""
+Offline přepis nahrávek hovorů do call_analytics.db
+Živé přepisy máme jen z Twilio SpeechResult - tohle zpětně přepíše uložené nahrávky:
+1. dekódování + VAD segmentace v process poolu (CPU, paralelně přes soubory)
+2. přepis segmentů přes STT backend s omezenou paralelitou (Config.RECORDING_STT_WORKERS)
+3. repliky s časy do recording_turns vedle hovoru (call_sid)
+
+Resumable a idempotentní - hotová nahrávka se stejným otiskem (velikost + mtime)
+se přeskočí, chybná se zkusí znovu, opakovaný přepis nahradí staré repliky.
+
+Použití:
+    python -m services.recording_transcriber data/recordings
+    python -m services.recording_transcriber data/recordings --backend local --processes 4 --workers 4
+    python -m services.recording_transcriber data/recordings --force --limit 100
+"""
+
+import argparse
+import re
+import shutil
+import subprocess
+import time
+import wave
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from config import Config
+
+TARGET_RATE = 16000
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.flac', '.ogg', '.m4a'}
+CALL_SID_PATTERN = re.compile(r'CA[0-9a-fA-F]{32}')
+
+
+def _read_wav(path):
+    """WAV -> int16 pole (vzorky, kanály) + frekvence"""
+    with wave.open(str(path), 'rb') as wf:
+        width, channels, rate = wf.getsampwidth(), wf.getnchannels(), wf.getframerate()
+        data = wf.readframes(wf.getnframes())
+    if width == 2:
+        samples = np.frombuffer(data, dtype=np.int16)
+    elif width == 1:
+        samples = ((np.frombuffer(data, dtype=np.uint8).astype(np.int16) - 128) << 8)
+    elif width == 4:
+        samples = (np.frombuffer(data, dtype=np.int32) >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"nepodporovaná šířka vzorku {width} B")
+    return samples.reshape(-1, channels), rate
+
+
+def _read_ffmpeg(path):
+    """Ostatní formáty (Twilio mp3) přes ffmpeg -> 16 kHz int16, kanály zachované"""
+    if not shutil.which('ffmpeg'):
+        raise RuntimeError("ffmpeg není nainstalovaný - umím jen WAV")
+    probe = subprocess.run(['ffmpeg', '-i', str(path)], capture_output=True, text=True)
+    channels = 2 if re.search(r'Audio:.*\bstereo\b', probe.stderr) else 1
+    result = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', str(path), '-f', 's16le', '-ac', str(channels),
+         '-ar', str(TARGET_RATE), '-'],
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors='ignore').strip() or 'ffmpeg selhal')
+    return np.frombuffer(result.stdout, dtype=np.int16).reshape(-1, channels), TARGET_RATE
+
+
+def _resample(channel, rate):
+    if rate == TARGET_RATE:
+        return channel
+    target = np.arange(int(len(channel) * TARGET_RATE / rate)) * (rate / TARGET_RATE)
+    return np.interp(target, np.arange(len(channel)), channel).astype(np.int16)
+
+
+def _segment_channel(pcm, params):
+    """
+    VAD segmentace jednoho kanálu - SpeechEndpointer jako u živého STT, jen opakovaně
+    Returns: [(start s, end s, pcm)] segmenty, které projdou VAD gatingem
+    """
+    from core.stt_engine import SpeechEndpointer
+    from core.stt_filters import gate_utterance
+
+    chunk = params['chunk']
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    n_frames = -(-len(samples) // chunk)
+    padded = np.zeros(n_frames * chunk, dtype=np.float32)
+    padded[:len(samples)] = samples / 32768.0
+    rms = np.sqrt(np.mean(padded.reshape(n_frames, chunk) ** 2, axis=1))
+    with np.errstate(divide='ignore'):
+        is_speech = 20 * np.log10(rms) > params['threshold_db']
+
+    segments = []
+    endpointer = SpeechEndpointer(rate=TARGET_RATE, min_speech=params['min_speech'],
+                                  trailing_silence=params['trailing_silence'],
+                                  pre_roll=params['pre_roll'], max_duration=params['max_duration'])
+    position = 0.0  # Konec audia předaného do endpointeru (s)
+
+    def flush():
+        # Čas repliky = od nástupu řeči po poslední řeč (audio má navíc pre-roll a koncové ticho)
+        if endpointer.has_speech and gate_utterance(endpointer) is None:
+            start = position - endpointer.duration + endpointer.lead_in
+            segments.append((start, start + endpointer.voiced_span, endpointer.audio))
+
+    for i in range(n_frames):
+        frame = pcm[i * chunk * 2:(i + 1) * chunk * 2]
+        position += len(frame) / (2.0 * TARGET_RATE)
+        if endpointer.feed(frame, bool(is_speech[i])) == SpeechEndpointer.DONE:
+            flush()
+            endpointer.reset()
+    flush()
+    return segments
+
+
+def load_recording(path):
+    """
+    Nahrávka -> int16 pole (vzorky, kanály) + frekvence
+    WAV přímo, ostatní formáty přes ffmpeg (16 kHz)
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.wav':
+        return _read_wav(path)
+    return _read_ffmpeg(path)
+
+
+def decode_and_segment(path, params):
+    """
+    Worker process poolu: dekóduje nahrávku a rozdělí ji na segmenty řeči
+
+    Returns:
+        dict {'duration', 'channels', 'segments': [(kanál, start, end, pcm)]}
+    """
+    samples, rate = load_recording(path)
+
+    segments = []
+    for channel in range(samples.shape[1]):
+        pcm = _resample(np.ascontiguousarray(samples[:, channel]), rate).tobytes()
+        for start, end, audio in _segment_channel(pcm, params):
+            segments.append((channel if samples.shape[1] > 1 else None, start, end, audio))
+    segments.sort(key=lambda segment: segment[1])
+    return {'duration': len(samples) / rate, 'channels': samples.shape[1], 'segments': segments}
+
+
+class RecordingTranscriber:
+    """Dávkový, obnovitelný přepis adresáře nahrávek"""
+
+    def __init__(self, analytics=None, backend=None, processes=None, workers=None):
+        if analytics is None:
+            from database.call_analytics import CallAnalytics
+            analytics = CallAnalytics()
+        if backend is None:
+            from core.stt_backends import build_backend
+            backend = build_backend()
+
+        self.analytics = analytics
+        self.backend = backend
+        self.processes = processes or Config.RECORDING_DECODE_PROCESSES
+        self.backend.batch_concurrency = workers or Config.RECORDING_STT_WORKERS
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {'found': 0, 'skipped': 0, 'done': 0, 'failed': 0,
+                      'segments': 0, 'filtered': 0, 'audio_seconds': 0.0}
+
+    @staticmethod
+    def segment_params():
+        """Parametry VAD - stejné jako živé STTEngine (picklovatelné pro process pool)"""
+        return {
+            'chunk': 320,  # 20 ms - jemnější časy replik než mikrofonní 1024
+            'threshold_db': -40,
+            'min_speech': 0.3,
+            'trailing_silence': 0.5,
+            'pre_roll': 0.2,
+            'max_duration': 28.0,  # Whisper zpracuje max 30 s najednou
+        }
+
+    @staticmethod
+    def call_sid_for(path):
+        """Twilio CallSid z názvu souboru (CA + 32 hex), jinak název bez přípony"""
+        match = CALL_SID_PATTERN.search(path.name)
+        return match.group(0) if match else path.stem
+
+    @staticmethod
+    def fingerprint(path):
+        stat = path.stat()
+        return f"{stat.st_size}:{int(stat.st_mtime)}"
+
+    def find_pending(self, directory, force=False):
+        """Nahrávky k přepisu - hotové se stejným otiskem se přeskočí (resume)"""
+        pending = []
+        for path in sorted(Path(directory).rglob('*')):
+            if path.suffix.lower() not in AUDIO_EXTENSIONS or not path.is_file():
+                continue
+            self.stats['found'] += 1
+            fingerprint = self.fingerprint(path)
+            status = self.analytics.get_recording(path)
+            if not force and status and status['status'] == 'done' and status['fingerprint'] == fingerprint:
+                self.stats['skipped'] += 1
+                continue
+            pending.append((path, fingerprint))
+        return pending
+
+    def _transcribe(self, path, call_sid, fingerprint, decoded):
+        """Přepis segmentů jedné nahrávky + uložení (jedna transakce)"""
+        from core.stt_filters import apply_text_filters
+
+        segments = decoded['segments']
+        texts = self.backend.transcribe_batch([audio for _, _, _, audio in segments], TARGET_RATE)
+
+        turns = []
+        for (channel, start, end, _), text in zip(segments, texts):
+            text, reason = apply_text_filters(text, Config.STT_PHONE_TEXT_FILTERS)
+            if reason:
+                self.stats['filtered'] += 1
+                continue
+            turns.append({'channel': channel, 'start': round(start, 2), 'end': round(end, 2), 'text': text})
+
+        self.analytics.save_recording_transcript(path, call_sid, fingerprint, decoded['duration'],
+                                                 turns, self.backend.name)
+        self.stats['segments'] += len(segments)
+        self.stats['audio_seconds'] += decoded['duration']
+        return turns
+
+    def run(self, directory, limit=None, force=False):
+        """
+        Přepíše všechny nezpracované nahrávky v adresáři
+
+        Dekódování běží v process poolu napřed (max 2x processes souborů v paměti),
+        přepis hotových souborů mezitím v hlavním procesu přes backend.transcribe_batch
+        """
+        self.reset_stats()
+        pending = self.find_pending(directory, force=force)
+        if limit:
+            pending = pending[:limit]
+        print(f"\n[RecordingTranscriber] {len(pending)} nahrávek k přepisu "
+              f"({self.stats['skipped']} hotových přeskočeno), backend {self.backend.name}")
+        if not pending:
+            return self.stats
+
+        started = time.perf_counter()
+        params = self.segment_params()
+        queue = deque(pending)
+        in_flight = deque()
+
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            while queue or in_flight:
+                while queue and len(in_flight) < self.processes * 2:
+                    path, fingerprint = queue.popleft()
+                    in_flight.append((path, fingerprint, pool.submit(decode_and_segment, str(path), params)))
+
+                path, fingerprint, future = in_flight.popleft()
+                call_sid = self.call_sid_for(path)
+                try:
+                    turns = self._transcribe(path, call_sid, fingerprint, future.result())
+                    self.stats['done'] += 1
+                    print(f"  ✓ {path.name}: {len(turns)} replik")
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                    self.stats['failed'] += 1
+                    self.analytics.save_recording_failure(path, call_sid, fingerprint, error)
+                    print(f"  ❌ {path.name}: {error}")
+
+        elapsed = time.perf_counter() - started
+        print(f"  ✅ Hotovo: {self.stats['done']} nahrávek, {self.stats['segments']} segmentů, "
+              f"{self.stats['audio_seconds']:.0f}s audia za {elapsed:.1f}s "
+              f"({self.stats['audio_seconds'] / max(elapsed, 1e-9):.1f}x realtime), "
+              f"{self.stats['failed']} chyb")
+        return self.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline přepis nahrávek hovorů')
+    parser.add_argument('directory', nargs='?', default=Config.RECORDINGS_DIR)
+    parser.add_argument('--backend', default=None, help='openai | local | stand_in (default Config.STT_BACKEND)')
+    parser.add_argument('--processes', type=int, default=None, help='Procesů pro dekódování + VAD')
+    parser.add_argument('--workers', type=int, default=None, help='Paralelních přepisů')
+    parser.add_argument('--limit', type=int, default=None, help='Max nahrávek v tomto běhu')
+    parser.add_argument('--force', action='store_true', help='Přepsat i hotové nahrávky')
+    args = parser.parse_args()
+
+    from core.stt_backends import build_backend
+    transcriber = RecordingTranscriber(backend=build_backend(args.backend),
+                                       processes=args.processes, workers=args.workers)
+    transcriber.run(args.directory, limit=args.limit, force=args.force)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# services/tts_cache_warmer.py
+"""
+TTS Cache Warmer
+Predrenderuje audio odpovedi, ktere se opakuji:
+- nejcastejsi AI odpovedi z call_analytics.db (normalizovane)
+- best_response namitek a fast path odpovedi z KB vsech tenantu (KBRegistry)
+- predgenerovane odpovedi prvniho tahu (services/first_turn.py)
+- pevne hlasky (Prompts.CANNED)
+Vyrenderovane soubory pinne, takze je prune_cache nesmaze.
+
+Pouziti:
+    python -m services.tts_cache_warmer          # jeden beh
+    TTSCacheWarmer(tts).start()                  # na pozadi v serveru
+"""
+
+import threading
+from collections import Counter, defaultdict
+
+from config import Config, Prompts
+
+
+class TTSCacheWarmer:
+    """Background job - drzi nejcastejsi odpovedi predrenderovane"""
+
+    def __init__(self, tts=None, analytics=None, top_n=None, min_count=None):
+        if tts is None:
+            from core import TTSEngine
+            tts = TTSEngine()
+        if analytics is None:
+            from database.call_analytics import CallAnalytics
+            analytics = CallAnalytics()
+
+        self.tts = tts
+        self.analytics = analytics
+        self.top_n = top_n or Config.TTS_WARMER_TOP_N
+        self.min_count = min_count or Config.TTS_WARMER_MIN_COUNT
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run = {}
+
+    def mine_frequent_replies(self):
+        """
+        Spocita nejcastejsi AI odpovedi ze vsech ulozenych hovoru
+
+        Returns:
+            [(text, pocet), ...] serazene sestupne
+        """
+        counts = Counter()
+        surface_forms = defaultdict(Counter)
+
+        for call in self.analytics.get_all_calls():
+            for msg in call.get('conversation') or []:
+                if msg.get('role') != 'assistant':
+                    continue
+                text = ' '.join((msg.get('content') or '').split())
+                if not text:
+                    continue
+                # Klic = text po TTS normalizaci -> stejny klic = stejny soubor v cache
+                key = self.tts._normalize_czech_text(text)
+                counts[key] += 1
+                surface_forms[key][text] += 1
+
+        frequent = []
+        for key, count in counts.most_common(self.top_n):
+            if count < self.min_count:
+                break
+            frequent.append((surface_forms[key].most_common(1)[0][0], count))
+        return frequent
+
+    def kb_phrases(self):
+        """best_response vsech namitek + fast path pro kazdeho tenanta z KB registru, prvni tah AIEngine"""
+        try:
+            from database.kb_store import get_kb_registry
+            from database.knowledge_base import get_fast_path_responses
+            registry = get_kb_registry()
+        except Exception as e:
+            print(f"  ⚠️  KB nedostupná: {e}")
+            return []
+
+        phrases = []
+        for tenant, profile in registry.keys():
+            kb = registry.get(profile, tenant)['kb']
+            phrases += [
+                namitka['best_response']
+                for namitka in kb.get('namitky_a_reseni', {}).values()
+                if isinstance(namitka, dict) and namitka.get('best_response')
+            ]
+            phrases += list(get_fast_path_responses(profile, tenant).values())
+
+        # Předgenerované odpovědi na první reakci (jinak by je prune_cache smazal)
+        from services.first_turn import pregenerated_phrases
+        phrases += pregenerated_phrases()
+        return phrases
+
+    def warm(self, extra_phrases=None):
+        """
+        Jeden beh: vytezi fraze, vyrenderuje chybejici audio, pinne je
+
+        Returns:
+            dict se statistikou behu
+        """
+        print(f"\n[TTSCacheWarmer] Spoustim warm-up...")
+
+        mined = self.mine_frequent_replies()
+        phrases = list(extra_phrases or []) + list(Prompts.CANNED) + self.kb_phrases()
+        phrases += [text for text, _ in mined]
+
+        # Deduplikace se zachovanim poradi
+        phrases = list(dict.fromkeys(phrases))
+
+        missing = [p for p in phrases if not self.tts.cache_filename(p)]
+        print(f"  📊 Frází: {len(phrases)} (z hovorů: {len(mined)}), chybí audio: {len(missing)}")
+
+        if missing:
+            self.tts.generate_many(missing, use_cache=True)
+
+        pinned = set()
+        for phrase in phrases:
+            filename = self.tts.cache_filename(phrase)
+            if filename:
+                pinned.add(filename)
+        self.tts.save_pinned(pinned)
+        pruned = self.tts.prune_cache()
+
+        self.last_run = {
+            'phrases': len(phrases),
+            'mined': len(mined),
+            'rendered': len(missing),
+            'pinned': len(pinned),
+            'pruned': pruned,
+            'hit_rate': self.tts.hit_rate(),
+        }
+        print(f"  ✅ Pinned: {len(pinned)}, hit rate: {self.tts.hit_rate()}%")
+        return self.last_run
+
+    def _loop(self, interval):
+        while not self._stop.is_set():
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"  ❌ TTSCacheWarmer chyba: {e}")
+            self._stop.wait(interval)
+
+    def start(self, interval=None):
+        """Spusti periodicky warm-up ve vlakne na pozadi"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop,
+            args=(interval or Config.TTS_WARMER_INTERVAL,),
+            name='tts-cache-warmer',
+            daemon=True,
+        )
+        self._thread.start()
+        print(f"  ✓ TTSCacheWarmer běží (každých {interval or Config.TTS_WARMER_INTERVAL}s)")
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == '__main__':
+    result = TTSCacheWarmer().warm()
+    print(result)
@@ -89,6 +89,32 @@ def test_enhancement_pipeline():
     print("  2. Noise reduction: ✅")
     print("  3. Amplification: ✅")
 
+def test_buffer_enhancement():
+    """Testuj enhancement cele nahravky (_enhance_buffer) proti puvodni ceste po framech"""
+    print("\n" + "="*70)
+    print("TEST 4: Whole-Buffer Enhancement vs Per-Frame")
+    print("="*70)
+    
+    stt = STTEngine()
+    
+    # 2s: ticho se sumem, pak hlasitejsi rec
+    quiet = np.random.randn(16000) * 30
+    speech = np.random.randn(16000) * 3000
+    audio = np.concatenate([quiet, speech]).astype(np.int16).tobytes()
+    
+    step = stt.chunk * 2
+    legacy = b''.join(stt._enhance_audio(audio[i:i + step]) for i in range(0, len(audio), step))
+    enhanced = stt._enhance_buffer(audio)
+    
+    print(f"\nPer-frame output: {stt._get_audio_level(legacy):.1f} dB")
+    print(f"Whole-buffer output: {stt._get_audio_level(enhanced):.1f} dB")
+    
+    if len(enhanced) == len(audio) and abs(stt._get_audio_level(enhanced) - stt._get_audio_level(legacy)) < 3:
+        print("✅ Whole-buffer enhancement OK")
+        return True
+    print("❌ Whole-buffer enhancement differs from per-frame pipeline")
+    return False
+
 def print_recommendations():
     """Tisky doporučení"""
     print("\n" + "="*70)
@@ -130,8 +156,15 @@ def main():
         test_noise_gate()
         test_amplification()
         test_enhancement_pipeline()
+        buffer_ok = test_buffer_enhancement()
         print_recommendations()
         
+        if not buffer_ok:
+            print("\n" + "="*70)
+            print("❌ TESTS FAILED")
+            print("="*70 + "\n")
+            return 1
+        
         print("\n" + "="*70)
         print("✅ ALL TESTS PASSED")
         print("="*70 + "\n")
@@ -0,0 +1,130 @@
+"""
+BENCHMARK: Audio enhancement STTEngine - po framech (_enhance_audio) vs cely buffer (_enhance_buffer)
+(cely buffer bez a se spektralnim potlacenim sumu). Meri cas zpracovani a "pumpovani" (skoky zesileni mezi 10ms bloky).
+Vstup: nahravky hovoru (WAV 16-bit mono), bez nich synteticky hovor (rec + sum linky)
+
+Pouziti:
+    python -m utils.bench_audio_enhancement --wav recordings/*.wav
+    python -m utils.bench_audio_enhancement --seconds 30 --repeat 5
+"""
+
+import argparse
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.stt_engine import STTEngine
+
+RATE = 16000
+
+
+def load_wav(path):
+    """WAV 16-bit mono -> raw PCM (jina vzorkovaci frekvence se jen oznami)"""
+    with wave.open(str(path), 'rb') as wf:
+        if wf.getsampwidth() != 2 or wf.getnchannels() != 1:
+            raise ValueError(f"{path}: ocekavan 16-bit mono WAV")
+        if wf.getframerate() != RATE:
+            print(f"  ⚠️  {path}: {wf.getframerate()} Hz (STTEngine pocita s {RATE} Hz)")
+        return wf.readframes(wf.getnframes())
+
+
+def synth_call(seconds, seed):
+    """Synteticky hovor: slova ruzne hlasitosti, pauzy, sum telefonni linky"""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 10 ** (-50 / 20), RATE * seconds)
+    pos = int(RATE * 0.5)
+    while pos < len(audio) - RATE:
+        length = int(RATE * rng.uniform(0.2, 0.7))
+        t = np.arange(length) / RATE
+        pitch = rng.uniform(100, 220)
+        word = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+        word *= np.hanning(length) * 10 ** (rng.uniform(-38, -12) / 20) / np.abs(word).max()
+        audio[pos:pos + length] += word
+        pos += length + int(RATE * rng.uniform(0.05, 0.6))
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes()
+
+
+def legacy(stt, audio_bytes):
+    """Puvodni cesta z listen(): _enhance_audio na kazdy 1024-vzorkovy frame"""
+    step = stt.chunk * 2
+    return b''.join(stt._enhance_audio(audio_bytes[i:i + step]) for i in range(0, len(audio_bytes), step))
+
+
+def gain_steps_db(original, enhanced, block=160):
+    """Skoky aplikovaneho zesileni mezi sousednimi 10ms bloky (dB) - jen bloky se signalem"""
+    x = np.frombuffer(original, dtype=np.int16).astype(np.float64)
+    y = np.frombuffer(enhanced, dtype=np.int16).astype(np.float64)
+    n = len(x) // block
+    rms_x = np.sqrt(np.mean(x[:n * block].reshape(n, block) ** 2, axis=1))
+    rms_y = np.sqrt(np.mean(y[:n * block].reshape(n, block) ** 2, axis=1))
+    valid = (rms_x > 10) & (rms_y > 0)
+    gain = np.full(n, np.nan)
+    gain[valid] = 20 * np.log10(rms_y[valid] / rms_x[valid])
+    steps = np.abs(np.diff(gain))
+    return steps[~np.isnan(steps)]
+
+
+def measure(fn, stt, clips, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        outputs = [fn(stt, clip) for clip in clips]
+        best = min(best, time.perf_counter() - started)
+    return best, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark audio enhancement')
+    parser.add_argument('--wav', nargs='*', default=[], help='Nahravky hovoru (16-bit mono WAV)')
+    parser.add_argument('--seconds', type=int, default=20, help='Delka syntetickeho hovoru')
+    parser.add_argument('--clips', type=int, default=5, help='Pocet syntetickych hovoru')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--jump-db', type=float, default=3.0, help='Skok zesileni mezi 10ms bloky, ktery je slyset')
+    args = parser.parse_args()
+
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or 'fake'  # Whisper se nevola
+    stt = STTEngine()
+
+    if args.wav:
+        clips = [load_wav(path) for path in args.wav]
+        source = f"{len(clips)} nahravek"
+    else:
+        clips = [synth_call(args.seconds, seed) for seed in range(args.clips)]
+        source = f"{len(clips)}x synteticky hovor {args.seconds}s"
+    audio_seconds = sum(len(c) for c in clips) / 2 / RATE
+
+    print("=" * 60)
+    print(f"AUDIO ENHANCEMENT BENCHMARK ({source}, {audio_seconds:.0f}s audia)")
+    print("=" * 60)
+
+    def buffer_without_suppression(stt, clip):
+        stt.noise_suppression = False
+        try:
+            return stt._enhance_buffer(clip)
+        finally:
+            stt.noise_suppression = True
+
+    results = {}
+    for name, fn in (("Po framech", legacy), ("Cely buffer", buffer_without_suppression),
+                     ("+ STFT sum", lambda s, c: s._enhance_buffer(c))):
+        elapsed, outputs = measure(fn, stt, clips, args.repeat)
+        steps = np.concatenate([gain_steps_db(c, o) for c, o in zip(clips, outputs)])
+        levels = [stt._get_audio_level(o) for o in outputs]
+        results[name] = elapsed
+        print(f"{name:<12} {elapsed * 1000:>8.1f} ms ({audio_seconds / elapsed:>6.0f}x realtime) | "
+              f"skoku zesileni > {args.jump_db:g} dB: {np.sum(steps > args.jump_db)}, max {steps.max():.1f} dB | "
+              f"vystup {np.mean(levels):.1f} dB")
+
+    print(f"\nZrychleni: {results['Po framech'] / results['Cely buffer']:.1f}x bez potlaceni sumu, "
+          f"{results['Po framech'] / results['+ STFT sum']:.1f}x s nim "
+          f"({(results['+ STFT sum'] - results['Cely buffer']) * 1000 / audio_seconds:.2f} ms / s audia navic)")
+
+
+if __name__ == '__main__':
+    main()
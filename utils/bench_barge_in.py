@@ -0,0 +1,197 @@
+"""
+BENCHMARK: Barge-in na Media Streams (services/media_stream.py)
+Simuluje Twilio: prehravac odchozeho audia (buffer, mark, clear) a zakaznika, ktery
+mluvi do odpovedi AI. Meri:
+- reakce barge-in = od nastupu reci zakaznika po "clear" (zastaveni prehravani)
+- kolik audia AI zakaznik prekrikuje (vs. <Gather><Play>: zbytek klipu)
+- ozvena AI na lince (pod BARGE_IN_THRESHOLD_DB) nesmi AI prerusit
+
+Bez site: STT stand_in, receptionist vraci pevnou odpoved, TTS = synteticke mu-law audio
+
+Pouziti:
+    python -m utils.bench_barge_in --turns 10
+    python -m utils.bench_barge_in --turns 5 --speed 1   # realny cas
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.audio_encoding import ulaw_encode
+from core.stt_backends import StandInBackend
+from services.media_stream import CHUNK_BYTES, RATE, MediaStreamCall
+
+FRAME = 160  # 20 ms mu-law od Twilia
+FRAME_SECONDS = FRAME / RATE
+
+
+def synth_speech(rng, seconds, level_db):
+    """Rec-like signal: ton s obalkou slabik + sum"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    envelope = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 3.5 * t))
+    signal = np.sin(2 * np.pi * 180 * t) * envelope + 0.2 * rng.standard_normal(len(t))
+    signal *= 10 ** (level_db / 20) / np.sqrt(np.mean(signal ** 2))
+    return signal
+
+
+class BenchCall(MediaStreamCall):
+    """MediaStreamCall s TTS nahrazenym syntetickym audiem odpovedi"""
+
+    def __init__(self, send, receptionist, reply_seconds, rng):
+        super().__init__(send, receptionist, tts=None, backend=StandInBackend(text='Počkejte, mám dotaz.'))
+        self.reply_seconds = reply_seconds
+        self.rng = rng
+
+    def _tts_chunks(self, text, chunk_bytes=CHUNK_BYTES):
+        pcm = (synth_speech(self.rng, self.reply_seconds, -12) * 32767).astype(np.int16)
+        audio = ulaw_encode(pcm.tobytes())
+        for i in range(0, len(audio), chunk_bytes):
+            yield audio[i:i + chunk_bytes]
+
+
+class FakeReceptionist:
+    def __init__(self, turns):
+        self.turns = turns
+        self.calls = 0
+        self.ended = None
+
+    def process_message(self, call_sid, text):
+        self.calls += 1
+        if self.calls >= self.turns:
+            return 'Děkuji za volání, hezký den.'
+        return 'Rozumím, tak to vám rád vysvětlím podrobněji.'
+
+    def end_call(self, call_sid, duration):
+        self.ended = (call_sid, duration)
+
+
+class TwilioPlayer:
+    """Strana Twilia: odchozi audio se prehrava 1 frame za tick, mark po dohrani, clear = zahodit"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.marks = []  # (pozice v bufferu, jmeno)
+        self.clears = []
+        self.played = 0
+        self.discarded = 0
+
+    def send(self, raw):
+        message = json.loads(raw)
+        if message['event'] == 'media':
+            self.buffer += base64.b64decode(message['media']['payload'])
+        elif message['event'] == 'mark':
+            self.marks.append((len(self.buffer), message['mark']['name']))
+        elif message['event'] == 'clear':
+            self.clears.append(time.perf_counter())
+            self.discarded += len(self.buffer)
+            self.buffer.clear()
+
+    def tick(self):
+        """Prehraje 20 ms; vraci (hraje, dohrane marky)"""
+        playing = bool(self.buffer)
+        played = min(FRAME, len(self.buffer))
+        del self.buffer[:played]
+        self.played += played
+        done = [name for position, name in self.marks if position <= played]
+        self.marks = [(position - played, name) for position, name in self.marks if position > played]
+        if not self.buffer and self.marks:
+            done += [name for _, name in self.marks]  # clear -> Twilio vrati zbyle marky
+            self.marks = []
+        return playing, done
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    player = TwilioPlayer()
+    receptionist = FakeReceptionist(args.turns)
+    call = BenchCall(player.send, receptionist, args.reply, rng)
+    tick = FRAME_SECONDS / args.speed
+
+    call.handle({'event': 'start', 'start': {'streamSid': 'MZbench', 'callSid': 'CAbench',
+                                             'customParameters': {'greeting': 'Dobrý den.'}}})
+
+    caller = np.zeros(0)
+    reactions, talk_over, gather_talk_over = [], [], []
+    onset = None  # Tick nastupu reci zakaznika do hrajici odpovedi
+    ai_started = None
+    false_barge_ins = 0
+    ticks = 0
+    started = time.perf_counter()
+
+    while not call.closed and ticks < args.turns * 20 / FRAME_SECONDS:
+        next_tick = started + (ticks + 1) * tick
+        playing, marks = player.tick()
+        for name in marks:
+            call.handle({'event': 'mark', 'mark': {'name': name}})
+
+        if playing and ai_started is None:
+            ai_started = ticks
+            interrupt_at = rng.uniform(0.8, args.reply - 1.0)
+            last_turn = call.stats['replies'] >= args.turns
+            if not last_turn:
+                caller = np.concatenate([np.zeros(int(interrupt_at * RATE)),
+                                         synth_speech(rng, rng.uniform(1.0, 1.8), -15)])
+        if not playing and not call.speaking:
+            ai_started = None
+
+        # Prichozi audio = zakaznik + ozvena AI + sum linky
+        inbound = 10 ** (-60 / 20) * rng.standard_normal(FRAME)
+        if playing:
+            inbound += synth_speech(rng, FRAME_SECONDS, args.echo_db)
+        if len(caller):
+            frame, caller = caller[:FRAME], caller[FRAME:]
+            inbound[:len(frame)] += frame
+            if onset is None and np.any(frame) and playing:
+                onset = ticks
+                clip_left = (len(player.buffer) + FRAME) / RATE
+        clears = len(player.clears)
+        pcm = (np.clip(inbound, -1, 1) * 32767).astype(np.int16).tobytes()
+        call.handle({'event': 'media', 'media': {'track': 'inbound',
+                                                 'payload': base64.b64encode(ulaw_encode(pcm)).decode('ascii')}})
+
+        if len(player.clears) > clears:
+            if onset is None:
+                false_barge_ins += 1
+            else:
+                reactions.append((ticks - onset + 1) * FRAME_SECONDS * 1000)
+                talk_over.append((ticks - onset + 1) * FRAME_SECONDS)
+                gather_talk_over.append(clip_left)
+                onset = None
+        ticks += 1
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    call.close()
+    print(f"\nBarge-in ({len(reactions)} preruseni, odpoved AI {args.reply:.1f}s, ozvena {args.echo_db:.0f} dB, "
+          f"prah {call.barge_in_threshold_db:.0f} dB / {call.barge_in_min_speech * 1000:.0f} ms)")
+    if reactions:
+        print(f"  reakce (nastup reci -> clear): p50 {np.percentile(reactions, 50):.0f} ms, "
+              f"max {max(reactions):.0f} ms")
+        print(f"  prekrikovani AI: media stream {np.mean(talk_over):.2f}s / tah, "
+              f"<Gather><Play> {np.mean(gather_talk_over):.2f}s / tah (zbytek klipu)")
+    print(f"  falesna preruseni (ozvena/sum): {false_barge_ins}")
+    print(f"  repliky: {call.stats}")
+    print(f"  zaveseno po rozlouceni: {'ano' if call.closed else 'ne'}, "
+          f"end_call: {'ano' if receptionist.ended else 'ne'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark barge-in na Media Streams')
+    parser.add_argument('--turns', type=int, default=10)
+    parser.add_argument('--reply', type=float, default=4.0, help='Delka odpovedi AI (s)')
+    parser.add_argument('--echo-db', type=float, default=-40.0, help='Uroven ozveny AI v prichozim audiu')
+    parser.add_argument('--speed', type=float, default=5.0, help='Zrychleni simulace (1 = realny cas)')
+    parser.add_argument('--seed', type=int, default=1)
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+BENCHMARK: Capture session STTEngine (ring buffer + zdroj otevreny po celou dobu)
+- headless: WAV s N replikami (synteticky nebo --wav) -> WavFileSource -> STTEngine.record_utterance
+  pro kazdou repliku; meri zpozdeni predani po konci reci, pocet replik a overruny bufferu
+- --mic: porovna otevreni PyAudio + streamu pri kazdem tahu (puvodni listen) s persistentni session
+
+Pouziti:
+    python -m utils.bench_capture_session --turns 20
+    python -m utils.bench_capture_session --realtime --turns 5
+    python -m utils.bench_capture_session --mic
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.audio_capture import CaptureSession, MicrophoneSource, WavFileSource, pyaudio
+from core.stt_engine import STTEngine
+from utils.bench_endpointing import RATE, synth_turn
+
+
+def write_call(path, turns, rng, args):
+    """WAV se za sebou jdoucimi replikami - vraci konce reci (s od zacatku souboru)"""
+    parts, speech_ends, offset = [], [], 0.0
+    for _ in range(turns):
+        audio, speech_end = synth_turn(rng, args)
+        audio = audio[:int(RATE * (speech_end + 1.5))]  # Pauza mezi replikami
+        speech_ends.append(offset + speech_end)
+        offset += len(audio) / RATE
+        parts.append(audio)
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(np.concatenate(parts).tobytes())
+    return speech_ends
+
+
+def bench_headless(args):
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'call.wav'
+        speech_ends = write_call(path, args.turns, rng, args)
+
+        stt = STTEngine(source=WavFileSource(path, realtime=args.realtime))
+        stt.show_progress = False
+        lags, detected = [], 0
+        started = time.perf_counter()
+        position = 0.0  # Audio cas precteny session (s)
+        while True:
+            endpointer = stt.record_utterance(max_duration=15, max_wait=10)
+            if not endpointer.has_speech:
+                break
+            position += endpointer.consumed
+            ended = [end for end in speech_ends if end <= position]
+            if ended:
+                lags.append(position - ended[-1])
+            detected += 1
+        elapsed = time.perf_counter() - started
+        overruns = stt.session.buffer.overruns
+        stt.close()
+
+    audio_seconds = speech_ends[-1] + 1.5
+    print(f"Headless ({'realtime' if args.realtime else 'co nejrychleji'}): {detected}/{args.turns} replik, "
+          f"{audio_seconds:.1f}s audia za {elapsed:.2f}s ({audio_seconds / elapsed:.0f}x realtime)")
+    print(f"  Predani po konci reci: prumer {np.mean(lags) * 1000:.0f} ms, max {np.max(lags) * 1000:.0f} ms "
+          f"| overruny bufferu: {overruns}")
+
+
+def bench_mic(args):
+    if pyaudio is None:
+        print("--mic: pyaudio neni nainstalovany - preskakuji")
+        return
+
+    per_turn = []
+    for _ in range(args.mic_turns):
+        started = time.perf_counter()
+        source = MicrophoneSource(RATE, 1024)
+        source.open()
+        source.read()
+        source.close()
+        per_turn.append(time.perf_counter() - started)
+
+    session = CaptureSession(MicrophoneSource(RATE, 1024)).start()
+    session.read(timeout=2.0)
+    persistent = []
+    for _ in range(args.mic_turns):
+        started = time.perf_counter()
+        session.flush()
+        session.read(timeout=2.0)
+        persistent.append(time.perf_counter() - started)
+    session.stop()
+
+    print(f"Mikrofon: otevreni pri kazdem tahu {np.mean(per_turn) * 1000:.0f} ms "
+          f"vs persistentni session {np.mean(persistent) * 1000:.0f} ms do prvniho framu")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark capture session STT')
+    parser.add_argument('--turns', type=int, default=20)
+    parser.add_argument('--realtime', action='store_true', help='Cist WAV tempem mikrofonu')
+    parser.add_argument('--max-words', type=int, default=6)
+    parser.add_argument('--noise-db', type=float, default=-55.0)
+    parser.add_argument('--mic', action='store_true', help='Zmerit i otevirani mikrofonu')
+    parser.add_argument('--mic-turns', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or 'fake'  # Whisper se nevola
+
+    print("=" * 60)
+    print("CAPTURE SESSION BENCHMARK")
+    print("=" * 60)
+    bench_headless(args)
+    if args.mic:
+        bench_mic(args)
+
+
+if __name__ == '__main__':
+    main()
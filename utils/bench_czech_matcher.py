@@ -0,0 +1,124 @@
+"""
+BENCHMARK: cleanup ceskeho vstupu + detekce intentu
+Puvodni smycka (substring replace + any() pres klicova slova) vs. predkompilovany matcher
+Korpus = repliky zakazniku z data/call_analytics.db (+ vzorove vety)
+
+Pouziti:
+    python -m utils.bench_czech_matcher
+    python -m utils.bench_czech_matcher --repeat 2000
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.ai_engine import AIEngine
+from core.czech_matcher import IntentMatcher, PhraseReplacer
+
+SAMPLE_UTTERANCES = [
+    "Dobrý den dobrý den, no jo jo, kolik to stojí?",
+    "Ne ne, nemám zájem, nevolejte mi prosím",
+    "Ano, to by mě zajímalo, kdy se můžeme sejít?",
+    "No to nevím, musím se zeptat kolegy, jak se mate",
+    "Nosit to tam nebudu, ale ten ceník bych viděl",
+    "Hmm, počkej chvíli, email je jan tečka novak at seznam tečka cz",
+    "Jó jó, super, pošlete nabídku",
+]
+
+
+def load_corpus():
+    """Repliky zakazniku (role=user) ze vsech ulozenych hovoru"""
+    utterances = []
+    try:
+        from database.call_analytics import CallAnalytics
+        for call in CallAnalytics().get_all_calls():
+            for msg in call.get('conversation') or []:
+                if msg.get('role') == 'user' and msg.get('content'):
+                    # Bez [INTENT]/[INFO Z DATABÁZE] prefixu
+                    text = msg['content'].split('\n')[-1].strip()
+                    if text:
+                        utterances.append(text)
+    except Exception as e:
+        print(f"⚠️  Nelze načíst call_analytics.db: {e}")
+    return utterances + SAMPLE_UTTERANCES
+
+
+def legacy_cleanup(text):
+    cleaned = text.lower().strip()
+    for wrong, correct in AIEngine.CZECH_REPLACEMENTS.items():
+        if wrong in cleaned:
+            cleaned = cleaned.replace(wrong, correct)
+    return re.sub(r'\s+', ' ', cleaned).strip()
+
+
+def legacy_intent(text):
+    text_lower = text.lower()
+    detected = []
+    for intent, keywords in AIEngine.INTENT_KEYWORDS.items():
+        if any(keyword in text_lower for keyword in keywords):
+            detected.append(intent)
+    return detected[0] if detected else 'unknown'
+
+
+def compiled_pipeline():
+    replacer = PhraseReplacer(AIEngine.CZECH_REPLACEMENTS)
+    matcher = IntentMatcher(AIEngine.INTENT_KEYWORDS)
+
+    def run(text):
+        cleaned = re.sub(r'\s+', ' ', replacer.replace(text.lower().strip())).strip()
+        scores = matcher.score(cleaned)
+        return cleaned, max(scores, key=scores.get) if scores else 'unknown'
+    return run
+
+
+def legacy_pipeline(text):
+    cleaned = legacy_cleanup(text)
+    return cleaned, legacy_intent(cleaned)
+
+
+def measure(func, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            func(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (repeat * len(corpus)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ceskeho matcheru')
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print("=" * 60)
+    print(f"CZECH MATCHER BENCHMARK ({len(corpus)} replik x {args.repeat})")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    compiled = compiled_pipeline()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    legacy_us = measure(legacy_pipeline, corpus, args.repeat)
+    compiled_us = measure(compiled, corpus, args.repeat)
+
+    print(f"\nPůvodní smyčka:   {legacy_us:.1f} µs / replika")
+    print(f"Kompilovaný:      {compiled_us:.1f} µs / replika (build {build_ms:.1f} ms jednou)")
+    print(f"Zrychlení:        {legacy_us / compiled_us:.1f}x")
+
+    # Kde se vysledky lisi (substring vs. cela slova)
+    diffs = [(text, legacy_pipeline(text), compiled(text))
+             for text in corpus if legacy_pipeline(text) != compiled(text)]
+    print(f"\nRozdílné výsledky: {len(diffs)}/{len(corpus)}")
+    for text, old, new in diffs[:10]:
+        print(f"  '{text}'")
+        print(f"    původní:    {old}")
+        print(f"    kompilovaný: {new}")
+
+
+if __name__ == '__main__':
+    main()
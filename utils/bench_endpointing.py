@@ -0,0 +1,100 @@
+"""
+BENCHMARK: Endpointing nahravani vs pevna delka (STTEngine.listen)
+Syntetické repliky (sum + useky "reci" s pauzami mezi slovy) se posilaji po framech
+jako z mikrofonu. Porovna, za jak dlouho je audio predano k prepisu
+a jestli endpointing neorizne rec.
+
+Pouziti:
+    python -m utils.bench_endpointing --turns 200
+    python -m utils.bench_endpointing --fixed 5 --silence 0.7
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.stt_engine import STTEngine, SpeechEndpointer
+
+RATE = 16000
+CHUNK = 1024
+
+
+def synth_turn(rng, args):
+    """
+    Jedna replika: ticho pred nastupem, slova s pauzami, ticho po konci
+
+    Returns:
+        (int16 audio, konec reci v s)
+    """
+    parts = [rng.normal(0, 10 ** (args.noise_db / 20), int(RATE * rng.uniform(0.2, 1.5)))]
+    for _ in range(rng.integers(1, args.max_words + 1)):
+        word = rng.normal(0, 10 ** (-18 / 20), int(RATE * rng.uniform(0.25, 0.6)))
+        word *= np.hanning(len(word)) ** 0.3  # Nabeh/dobeh slova
+        parts.append(word)
+        parts.append(rng.normal(0, 10 ** (args.noise_db / 20), int(RATE * rng.uniform(0.05, 0.25))))
+    speech_end = sum(len(p) for p in parts[:-1]) / RATE
+    parts.append(rng.normal(0, 10 ** (args.noise_db / 20), int(RATE * 6)))
+    audio = np.concatenate(parts)
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16), speech_end
+
+
+def endpoint(stt, audio):
+    """Vrati (cas predani k prepisu v s, konec nahravky v s)"""
+    endpointer = SpeechEndpointer(rate=RATE, min_speech=stt.min_speech_duration,
+                                  trailing_silence=stt.silence_threshold, pre_roll=stt.pre_roll,
+                                  max_duration=15, max_wait=10)
+    data = audio.tobytes()
+    elapsed = 0.0
+    for offset in range(0, len(data), CHUNK * 2):
+        frame = data[offset:offset + CHUNK * 2]
+        elapsed += len(frame) / (2.0 * RATE)
+        if endpointer.feed(frame, stt._detect_voice_activity(frame)) == SpeechEndpointer.DONE:
+            break
+    return elapsed, endpointer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark endpointingu STT')
+    parser.add_argument('--turns', type=int, default=200)
+    parser.add_argument('--fixed', type=float, default=5.0, help='Puvodni pevna delka nahravky (s)')
+    parser.add_argument('--silence', type=float, default=None, help='Koncove ticho (s), default STTEngine')
+    parser.add_argument('--max-words', type=int, default=6)
+    parser.add_argument('--noise-db', type=float, default=-55.0, help='Hladina sumu v pozadi (dBFS)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    Config.OPENAI_API_KEY = Config.OPENAI_API_KEY or 'fake'  # Whisper se nevola
+    stt = STTEngine()
+    if args.silence is not None:
+        stt.silence_threshold = args.silence
+
+    rng = np.random.default_rng(args.seed)
+
+    fixed_handoff, endpoint_handoff, clipped, truncated = [], [], 0, 0
+    for _ in range(args.turns):
+        audio, speech_end = synth_turn(rng, args)
+        handoff, endpointer = endpoint(stt, audio)
+        endpoint_handoff.append(handoff)
+        fixed_handoff.append(args.fixed)
+        if handoff < speech_end:
+            clipped += 1  # Konec reci nestihl do nahravky
+        if speech_end > args.fixed:
+            truncated += 1  # Pevna delka by rec urizla
+
+    print("=" * 60)
+    print(f"ENDPOINTING BENCHMARK ({args.turns} replik, ticho {stt.silence_threshold}s)")
+    print("=" * 60)
+    print(f"Pevna delka:  predani po {np.mean(fixed_handoff):.2f} s | urizlych replik {truncated}")
+    print(f"Endpointing:  predani po {np.mean(endpoint_handoff):.2f} s (p95 "
+          f"{np.percentile(endpoint_handoff, 95):.2f} s) | urizlych replik {clipped}")
+    print(f"Usetreno na tah: {np.mean(fixed_handoff) - np.mean(endpoint_handoff):.2f} s "
+          f"(+ mensi upload do Whisperu)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+BENCHMARK: vyhledávání v Knowledge Base (BM25 index)
+Latence dotazu nad skutečnou KB a nad KB nafouknutou na tisíce uzlů
+
+Pouziti:
+    python -m utils.bench_kb_index
+    python -m utils.bench_kb_index --entries 20000
+"""
+
+import argparse
+import copy
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.kb_index import KBIndex
+from database.knowledge_base import KNOWLEDGE_BASE, RECEPTION_KB
+
+QUERIES = [
+    "kolik to stojí?",
+    "nemáme web, ale uvažujeme o tom",
+    "nemám zájem, děkuji",
+    "kdy máte otevřeno v sobotu?",
+    "chtěl bych se objednat na zítra",
+    "můžu zaplatit kartou?",
+]
+
+
+def inflate(kb, entries):
+    """Kopie KB s 'entries' umělými FAQ uzly"""
+    kb = copy.deepcopy(kb)
+    faq = kb.setdefault('faq', {})
+    for i in range(entries):
+        faq[f"dotaz_{i}"] = {
+            'otazka': f"Nabízíte službu číslo {i} pro zákazníky v oblasti {i % 97}?",
+            'odpoved': f"Ano, služba {i} stojí {100 + i % 50} Kč a trvá {10 + i % 40} minut.",
+        }
+    return kb
+
+
+def measure(title, kb, repeat):
+    start = time.perf_counter()
+    index = KBIndex(kb)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            index.search(query)
+    per_query = (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1e6
+
+    print(f"{title:<28} {len(index.docs):>6} uzlů  build {build_ms:>8.1f} ms  dotaz {per_query:>8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark KB indexu')
+    parser.add_argument('--entries', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("KB INDEX BENCHMARK")
+    print("=" * 60)
+    measure("Sales KB", KNOWLEDGE_BASE, args.repeat)
+    measure("Reception KB", RECEPTION_KB, args.repeat)
+    measure(f"Reception KB + {args.entries} FAQ", inflate(RECEPTION_KB, args.entries), max(1, args.repeat // 10))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+BENCHMARK: Sdileny async LLM klient proti lokalnimu fake serveru
+Porovna sekvencni volani se soubeznym, overi retry a deadline (bez API kreditu)
+
+Pouziti:
+    python -m utils.bench_llm_client --requests 32 --delay 0.3
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.llm_client import LLMClient, LLMTimeoutError
+from core.async_loop import get_background_loop
+from utils.fake_llm_server import start_fake_llm_server
+
+
+def make_messages(i):
+    return [
+        {'role': 'system', 'content': 'Jsi Pavel, prodejce webových stránek.'},
+        {'role': 'user', 'content': f'Kolik to stojí? ({i})'},
+    ]
+
+
+async def run_concurrent(client, count):
+    return await asyncio.gather(
+        *(client.complete(make_messages(i), max_tokens=45) for i in range(count)),
+        return_exceptions=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM client benchmark')
+    parser.add_argument('--requests', type=int, default=32)
+    parser.add_argument('--delay', type=float, default=0.3)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--timeout', type=float, default=2.0)
+    parser.add_argument('--fail-rate', type=float, default=0.3)
+    args = parser.parse_args()
+
+    server, url = start_fake_llm_server(delay=args.delay)
+    client = LLMClient(api_key='fake', base_url=url, timeout=args.timeout,
+                       max_concurrency=args.concurrency, pool_size=args.concurrency)
+
+    print("=" * 60)
+    print(f"LLM CLIENT BENCHMARK ({args.requests} requestu, latence {args.delay}s)")
+    print("=" * 60)
+
+    # Sekvencne (jako puvodni blokujici openai.chat.completions.create)
+    start = time.perf_counter()
+    for i in range(args.requests):
+        client.complete_sync(make_messages(i), max_tokens=45)
+    sequential = time.perf_counter() - start
+    print(f"Sekvencne:  {sequential:.2f}s ({args.requests / sequential:.1f} req/s)")
+
+    # Soubezne na jednom event loopu a jednom poolu spojeni
+    start = time.perf_counter()
+    results = get_background_loop().run(run_concurrent(client, args.requests))
+    concurrent = time.perf_counter() - start
+    errors = [r for r in results if isinstance(r, Exception)]
+    print(f"Soubezne:   {concurrent:.2f}s ({args.requests / concurrent:.1f} req/s), chyb: {len(errors)}")
+    print(f"Zrychleni:  {sequential / concurrent:.1f}x")
+
+    # Retry - cast requestu vrati 429/5xx
+    server.fail_rate = args.fail_rate
+    retries_before = client.stats['retries']
+    results = get_background_loop().run(run_concurrent(client, args.requests))
+    errors = [r for r in results if isinstance(r, Exception)]
+    print(f"Retry:      {client.stats['retries'] - retries_before} opakovani pri fail-rate "
+          f"{args.fail_rate:.0%}, neuspesnych {len(errors)}/{args.requests}")
+    server.fail_rate = 0.0
+
+    # Deadline - server pomalejsi nez timeout
+    server.delay = args.timeout + 0.5
+    start = time.perf_counter()
+    try:
+        client.complete_sync(make_messages(0), max_tokens=45)
+        print("Deadline:   ❌ request nedostal timeout")
+    except LLMTimeoutError:
+        print(f"Deadline:   ✅ timeout po {time.perf_counter() - start:.2f}s")
+
+    print(f"Requestu na serveru: {server.stats['requests']}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+BENCHMARK: Hedging LLM requestu proti pomalemu "ocasu" latence
+Fake server obcas (slow-rate) odpovi o slow-delay pozdeji - porovna p50/p95/p99
+tahu bez hedgingu a s hedgingem + kolik requestu navic to stoji
+
+Pouziti:
+    python -m utils.bench_llm_hedging --turns 200 --hedge-after 600
+    python -m utils.bench_llm_hedging --hedge-model gpt-4o-mini
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.llm_client import LLMClient, latency_percentiles
+from core.async_loop import get_background_loop
+from utils.fake_llm_server import start_fake_llm_server
+
+MESSAGES = [
+    {'role': 'system', 'content': 'Jsi Pavel, prodejce webových stránek.'},
+    {'role': 'user', 'content': 'A kolik by to stálo?'},
+]
+
+
+async def run_turns(client, turns, concurrency, hedge_after, hedge_model):
+    """Tahy po 'concurrency' hovorech zaroven - vraci latence (s) a vysledky"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    results = []
+
+    async def turn():
+        async with semaphore:
+            started = time.perf_counter()
+            result = await client.complete_hedged(MESSAGES, hedge_after, hedge_model=hedge_model,
+                                                  max_tokens=45)
+            latencies.append(time.perf_counter() - started)
+            results.append(result)
+
+    await asyncio.gather(*(turn() for _ in range(turns)))
+    return latencies, results
+
+
+def report(name, latencies, results, requests):
+    stats = latency_percentiles(latencies)
+    hedged = sum(1 for r in results if r['hedged'])
+    wins = sum(1 for r in results if r['winner'] == 'hedge')
+    print(f"{name:<12} p50 {stats['p50']:>7.1f} ms | p95 {stats['p95']:>7.1f} ms | "
+          f"p99 {stats['p99']:>7.1f} ms | hedge {hedged / len(results):.1%} "
+          f"(vyhral {wins}x) | requestu {requests} (+{requests / len(results) - 1:.1%})")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM hedging benchmark')
+    parser.add_argument('--turns', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--delay', type=float, default=0.3, help='Zakladni latence prvniho tokenu (s)')
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--slow-rate', type=float, default=0.05, help='Podil pomalych odpovedi')
+    parser.add_argument('--slow-delay', type=float, default=2.0)
+    parser.add_argument('--hedge-after', type=int, default=600, help='ms bez prvniho tokenu -> duplikat')
+    parser.add_argument('--hedge-model', default=None)
+    args = parser.parse_args()
+
+    server, url = start_fake_llm_server(delay=args.delay, jitter=args.jitter,
+                                        slow_rate=args.slow_rate, slow_delay=args.slow_delay,
+                                        token_delay=0.01)
+    client = LLMClient(api_key='fake', base_url=url, timeout=10.0,
+                       max_concurrency=args.concurrency * 2, pool_size=args.concurrency * 2)
+    loop = get_background_loop()
+
+    print("=" * 60)
+    print(f"LLM HEDGING BENCHMARK ({args.turns} tahu, {args.slow_rate:.0%} pomalych +{args.slow_delay}s)")
+    print("=" * 60)
+
+    # Bez hedgingu - duplikat by prisel az po deadline, tj. nikdy
+    before = server.stats['requests']
+    latencies, results = loop.run(run_turns(client, args.turns, args.concurrency, 3600.0, None))
+    baseline = report("Bez hedge:", latencies, results, server.stats['requests'] - before)
+
+    before = server.stats['requests']
+    latencies, results = loop.run(run_turns(client, args.turns, args.concurrency,
+                                            args.hedge_after / 1000.0, args.hedge_model))
+    hedged = report(f"Hedge {args.hedge_after}ms:", latencies, results, server.stats['requests'] - before)
+
+    print(f"\nUsetreno:    p50 {baseline['p50'] - hedged['p50']:.1f} ms | "
+          f"p95 {baseline['p95'] - hedged['p95']:.1f} ms | p99 {baseline['p99'] - hedged['p99']:.1f} ms")
+    time.sleep(0.2)
+    print(f"Zrusenych streamu na serveru: {server.stats['cancelled']}, modely: {server.stats['models']}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+BENCHMARK: Spekulativni odpoved z prubeznych prepisu (Twilio partial results)
+Simuluje hovory: prubezny prepis roste po slovech, po posledním slove Twilio
+jeste ceka (speech_timeout='auto') a az pak posle finalni SpeechResult.
+Porovna latenci od finalniho prepisu do odpovedi bez a se spekulaci
++ kolik prompt tokenu navic spekulace stoji (zmeny prepisu, jiny finalni text) - meri fake server
+
+Pouziti:
+    python -m utils.bench_speculative --calls 40 --llm-delay 0.6
+    python -m utils.bench_speculative --diverge 0.3 --flicker 0.3
+"""
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.llm_client import LLMClient, latency_percentiles
+from utils.fake_llm_server import start_fake_llm_server
+
+UTTERANCES = [
+    "A co všechno by ten web uměl",
+    "No my máme jenom facebook a to nám zatím stačí",
+    "Jak dlouho by trvalo než by to bylo hotové",
+    "A dělali jste už něco pro nějakou restauraci",
+    "Musím se na to podívat s kolegou a ozvu se",
+    "Mohli byste mi poslat nějaké ukázky na email",
+    "A co kdybychom se potkali příští týden ve čtvrtek",
+    "To zní zajímavě ale nevím jestli na to máme čas",
+]
+
+# Typicke zameny rozpoznavace (prubezny prepis se pak opravi)
+CONFUSIONS = {'web': 'wep', 'týden': 'den', 'email': 'mail', 'čas': 'čaj', 'restauraci': 'restaurace'}
+
+
+def simulate_call(ai, call_id, text, args, speculative):
+    """Jedna replika zakaznika - vrati latenci od finalniho prepisu do odpovedi (s)"""
+    call_sid = f"bench-{'spec' if speculative else 'base'}-{call_id}"
+    ai.start_conversation(call_sid, "Jsi Pavel z MoravskéWeby. Voláš ohledně tvorby webů.")
+
+    words = text.split()
+    final_words = list(words)
+    if random.random() < args.diverge:
+        # Finalni prepis se lisi od posledniho prubezneho (rozpoznavac si to rozmyslel)
+        final_words[-1] = CONFUSIONS.get(final_words[-1], final_words[-1] + 'ho')
+
+    for i in range(1, len(words) + 1):
+        time.sleep(args.word_interval)
+        partial = words[:i]
+        if random.random() < args.flicker:
+            partial = partial[:-1] + [CONFUSIONS.get(partial[-1], partial[-1] + 'm')]
+        if speculative:
+            ai.speculate(call_sid, ' '.join(partial))
+
+    # Twilio ceka na konec reci (speech_timeout='auto')
+    time.sleep(args.endpoint_delay)
+    started = time.perf_counter()
+    ai.get_response(call_sid, ' '.join(final_words))
+    return time.perf_counter() - started
+
+
+def run(ai, args, speculative):
+    Config.SPECULATIVE_ENABLED = speculative
+    random.seed(args.seed)
+    jobs = [(i, UTTERANCES[i % len(UTTERANCES)]) for i in range(args.calls)]
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        return list(pool.map(lambda job: simulate_call(ai, job[0], job[1], args, speculative), jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark spekulativni odpovedi')
+    parser.add_argument('--calls', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--llm-delay', type=float, default=0.6, help='Latence LLM (s)')
+    parser.add_argument('--word-interval', type=float, default=0.3, help='Prubezny prepis po slovech (s)')
+    parser.add_argument('--endpoint-delay', type=float, default=0.8, help='Ticho nez Twilio posle final (s)')
+    parser.add_argument('--diverge', type=float, default=0.15, help='Podil finalnich prepisu jinych nez prubezny')
+    parser.add_argument('--flicker', type=float, default=0.2, help='Podil prubeznych prepisu s chybou')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    server, url = start_fake_llm_server(delay=args.llm_delay, jitter=0.1)
+    Config.FAST_PATH_ENABLED = False  # Meri se jen LLM tahy
+
+    from core.ai_engine import AIEngine
+    ai = AIEngine(llm=LLMClient(api_key='fake', base_url=url))
+
+    print("=" * 60)
+    print(f"SPECULATIVE BENCHMARK ({args.calls} replik, LLM {args.llm_delay}s, "
+          f"konec reci +{args.endpoint_delay}s)")
+    print("=" * 60)
+
+    baseline = latency_percentiles(run(ai, args, speculative=False))
+    requests_base = server.stats['requests']
+    tokens_base = server.stats['prompt_tokens']
+
+    speculative = latency_percentiles(run(ai, args, speculative=True))
+    requests_spec = server.stats['requests'] - requests_base
+    tokens_spec = server.stats['prompt_tokens'] - tokens_base
+    spec = ai.stats['speculative']
+
+    print(f"\nBez spekulace:  p50 {baseline['p50']:.1f} ms | p95 {baseline['p95']:.1f} ms | "
+          f"p99 {baseline['p99']:.1f} ms | LLM requestu {requests_base}, prompt tokenu {tokens_base}")
+    print(f"Se spekulaci:   p50 {speculative['p50']:.1f} ms | p95 {speculative['p95']:.1f} ms | "
+          f"p99 {speculative['p99']:.1f} ms | LLM requestu {requests_spec}, prompt tokenu {tokens_spec}")
+    print(f"\nSpekulace: spusteno {spec['started']}, trefa {spec['hits']}, "
+          f"jiny final {spec['misses']}, zahozeno {spec['discarded']}")
+    print(f"Promarnene prompt tokeny: {tokens_spec - tokens_base} na serveru "
+          f"(+{tokens_spec / tokens_base - 1:.1%}), odhad AIEngine (horni mez) {spec['wasted_tokens']}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+BENCHMARK: STT backendy - jednotlive vs batch prepis + streaming
+Repliky: nahravky (--wav, 16-bit mono) nebo synteticke. Backend:
+- local: faster-whisper na CPU (offline) - skutecna rychlost modelu
+- stand_in: simulovana latence (--delay, --per-second) - rezie pipeline bez modelu
+- openai: Whisper API (sit, plati se)
+
+Pouziti:
+    python -m utils.bench_stt_backends --backend local --wav recordings/*.wav
+    python -m utils.bench_stt_backends --backend stand_in --clips 32 --per-second 0.15
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.stt_backends import StandInBackend, build_backend
+from utils.bench_audio_enhancement import load_wav
+from utils.bench_endpointing import RATE, synth_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark STT backendu')
+    parser.add_argument('--backend', default='stand_in', help='local | stand_in | openai')
+    parser.add_argument('--wav', nargs='*', default=[], help='Nahravky replik (16-bit mono WAV)')
+    parser.add_argument('--clips', type=int, default=16, help='Pocet syntetickych replik')
+    parser.add_argument('--concurrency', type=int, default=None, help='Paralelnich prepisu v batchi')
+    parser.add_argument('--delay', type=float, default=0.05, help='stand_in: latence na request (s)')
+    parser.add_argument('--per-second', type=float, default=0.1, help='stand_in: s prepisu na s audia')
+    parser.add_argument('--max-words', type=int, default=6)
+    parser.add_argument('--noise-db', type=float, default=-55.0)
+    args = parser.parse_args()
+
+    if args.concurrency:
+        Config.STT_BATCH_CONCURRENCY = args.concurrency
+    if args.backend == 'stand_in':
+        backend = StandInBackend(delay=args.delay, per_second=args.per_second)
+    else:
+        backend = build_backend(args.backend)
+
+    if args.wav:
+        clips = [load_wav(path) for path in args.wav]
+    else:
+        rng = np.random.default_rng(5)
+        clips = [synth_turn(rng, args)[0][:RATE * 4].tobytes() for _ in range(args.clips)]
+    audio_seconds = sum(len(c) for c in clips) / 2 / RATE
+
+    print("=" * 60)
+    print(f"STT BACKEND BENCHMARK ({backend.name}, {len(clips)} replik, {audio_seconds:.0f}s audia)")
+    print("=" * 60)
+
+    if hasattr(backend, '_get_model'):
+        backend._get_model()  # Nacteni modelu nepocitat do mereni
+
+    started = time.perf_counter()
+    sequential = [backend.transcribe(clip, RATE) for clip in clips]
+    seq_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = backend.transcribe_batch(clips, RATE)
+    batch_elapsed = time.perf_counter() - started
+
+    print(f"Po jedne:  {seq_elapsed:.2f}s ({audio_seconds / seq_elapsed:.1f}x realtime)")
+    print(f"Batch x{backend.batch_concurrency}:  {batch_elapsed:.2f}s ({audio_seconds / batch_elapsed:.1f}x realtime) "
+          f"| zrychleni {seq_elapsed / batch_elapsed:.1f}x | shodnych prepisu "
+          f"{sum(a == b for a, b in zip(sequential, batched))}/{len(clips)}")
+
+    # Streaming - audio po 64ms framech, prubezny prepis kazdou sekundu audia
+    clip = max(clips, key=len)
+    frames = (clip[i:i + 2048] for i in range(0, len(clip), 2048))
+    started = time.perf_counter()
+    partials = 0
+    for text, is_final in backend.stream(frames, RATE):
+        if is_final:
+            print(f"Stream:    {len(clip) / 2 / RATE:.1f}s replika, {partials} prubeznych prepisu, "
+                  f"celkem {time.perf_counter() - started:.2f}s -> '{text[:50]}'")
+        else:
+            partials += 1
+    print(f"\nUkazka: '{sequential[0][:70]}'")
+
+
+if __name__ == '__main__':
+    main()
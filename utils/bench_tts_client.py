@@ -0,0 +1,72 @@
+"""
+BENCHMARK: Sdileny async TTS klient proti lokalnimu fake serveru
+Porovna sekvencni generovani se soubeznym (bez API kreditu)
+
+Pouziti:
+    python -m utils.bench_tts_client --requests 32 --delay 0.3
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.tts_client import TTSClient, TTSTimeoutError
+from core.async_loop import get_background_loop
+from utils.fake_tts_server import start_fake_tts_server
+
+
+async def run_concurrent(client, texts):
+    return await asyncio.gather(*(client.synthesize(t) for t in texts), return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TTS client benchmark')
+    parser.add_argument('--requests', type=int, default=32)
+    parser.add_argument('--delay', type=float, default=0.3)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--timeout', type=float, default=2.0)
+    args = parser.parse_args()
+
+    server, url = start_fake_tts_server(delay=args.delay)
+    client = TTSClient(api_key='fake', base_url=url, timeout=args.timeout,
+                       max_concurrency=args.concurrency, pool_size=args.concurrency)
+    texts = [f"Testovací věta číslo {i}, dobrý den." for i in range(args.requests)]
+
+    print("=" * 60)
+    print(f"TTS CLIENT BENCHMARK ({args.requests} requestu, latence {args.delay}s)")
+    print("=" * 60)
+
+    # Sekvencne (jako puvodni synchronni TTSEngine)
+    start = time.perf_counter()
+    for text in texts:
+        client.synthesize_sync(text)
+    sequential = time.perf_counter() - start
+    print(f"Sekvencne:  {sequential:.2f}s ({args.requests / sequential:.1f} req/s)")
+
+    # Soubezne na jednom event loopu
+    start = time.perf_counter()
+    results = get_background_loop().run(run_concurrent(client, texts))
+    concurrent = time.perf_counter() - start
+    errors = [r for r in results if isinstance(r, Exception)]
+    print(f"Soubezne:   {concurrent:.2f}s ({args.requests / concurrent:.1f} req/s), chyb: {len(errors)}")
+    print(f"Zrychleni:  {sequential / concurrent:.1f}x")
+    print(f"Requestu na serveru: {server.stats['requests']}")
+
+    # Deadline - server pomalejsi nez timeout
+    server.delay = args.timeout + 0.5
+    start = time.perf_counter()
+    try:
+        client.synthesize_sync("Pomalá odpověď")
+        print("Deadline:   ❌ request nedostal timeout")
+    except TTSTimeoutError:
+        print(f"Deadline:   ✅ timeout po {time.perf_counter() - start:.2f}s")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
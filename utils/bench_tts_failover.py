@@ -0,0 +1,58 @@
+"""
+BENCHMARK: TTS failover s lokalnimi stand-in providery
+Ukaze latenci pri pomalem / padajicim primarnim provideru s a bez hedgingu
+
+Pouziti:
+    python -m utils.bench_tts_failover
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.tts_providers import FailoverTTS, StandInProvider, TwilioSayProvider
+
+
+async def measure(failover, turns=10):
+    latencies = []
+    winners = {}
+    for i in range(turns):
+        start = time.perf_counter()
+        provider, _ = await failover.synthesize(f"Věta {i}")
+        latencies.append((time.perf_counter() - start) * 1000)
+        winners[provider] = winners.get(provider, 0) + 1
+    return sum(latencies) / len(latencies), max(latencies), winners
+
+
+async def scenario(title, primary, secondary, hedge_after_ms, provider_timeout=None):
+    failover = FailoverTTS([primary, secondary], hedge_after_ms=hedge_after_ms,
+                           failure_threshold=3, reset_timeout=60, provider_timeout=provider_timeout)
+    avg, worst, winners = await measure(failover)
+    hedge = f"hedge {hedge_after_ms} ms" if hedge_after_ms else "bez hedge"
+    print(f"\n{title} ({hedge})")
+    print(f"  prumer {avg:.0f} ms, max {worst:.0f} ms, vitezove {winners}")
+    print(f"  stats {failover.stats}, primarni volan {primary.calls}x")
+
+
+async def main():
+    print("=" * 60)
+    print("TTS FAILOVER BENCHMARK (stand-in provideri)")
+    print("=" * 60)
+
+    await scenario("Zdravy primar (150 ms)",
+                   StandInProvider('primary', 0.15), TwilioSayProvider(), None)
+    await scenario("Pomaly primar (1500 ms)",
+                   StandInProvider('primary', 1.5), StandInProvider('local', 0.05), None)
+    await scenario("Pomaly primar (1500 ms)",
+                   StandInProvider('primary', 1.5), StandInProvider('local', 0.05), 300)
+    await scenario("Padajici primar (chyba po 800 ms)",
+                   StandInProvider('primary', 0.8, fail=True), TwilioSayProvider(), None)
+    await scenario("Zaseknuty primar (60 s, timeout providera 1 s)",
+                   StandInProvider('primary', 60), StandInProvider('local', 0.05), None, provider_timeout=1.0)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,229 @@
+"""
+Lokalni fake OpenAI server pro testy a benchmarky
+Napodobuje POST /v1/chat/completions (i stream=true jako SSE) - vraci kratkou ceskou odpoved
+
+Pouziti:
+    python -m utils.fake_llm_server --port 8098 --delay 0.4 --jitter 0.2
+    OPENAI_BASE_URL=http://127.0.0.1:8098/v1 OPENAI_API_KEY=fake python -m api.server
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_REPLIES = [
+    "Rozumím, a kolik zákazníků k vám dnes chodí přes internet?",
+    "To dává smysl. Můžu vám poslat pár ukázek, co jsme dělali?",
+    "Jasně, hodil by se vám krátký hovor příští týden?",
+]
+
+FAKE_REPORT = {
+    'outcome': 'interested',
+    'sales_score': 60,
+    'ai_summary': 'Zákazník projevil zájem, chce poslat nabídku e-mailem.',
+    'key_points': ['Zájem o web', 'Poslat nabídku'],
+    'next_action': 'Poslat e-mail s nabídkou',
+}
+
+# Provider cachuje prefix promptu po blocich
+CACHE_BLOCK_TOKENS = 128
+
+
+def _tokens(text):
+    return math.ceil(len(text or '') / 3)
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """Handler napodobujici OpenAI chat completions endpoint"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive jako skutecne API
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+
+        with server.stats_lock:
+            server.stats['requests'] += 1
+            server.stats['models'][body.get('model')] = server.stats['models'].get(body.get('model'), 0) + 1
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_error(404, 'not found')
+            return
+
+        # Simulace pretizeni / chyby providera
+        if random.random() < server.fail_rate:
+            self._send_error(random.choice((429, 500, 503)), 'simulated failure')
+            return
+
+        # Latence do prvniho tokenu (obcas pomaly "ocas" rozdeleni)
+        delay = server.delay
+        if server.jitter:
+            delay += random.uniform(0, server.jitter)
+        if server.slow_rate and random.random() < server.slow_rate:
+            delay += server.slow_delay
+            with server.stats_lock:
+                server.stats['slow'] += 1
+        time.sleep(delay)
+
+        messages = body.get('messages') or []
+        content = self._reply(messages)
+        usage = self._usage(messages, content)
+        with server.stats_lock:
+            server.stats['prompt_tokens'] += usage['prompt_tokens']
+
+        if body.get('stream'):
+            self._send_stream(body, content, usage)
+        else:
+            self._send_result({
+                'id': f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop',
+                }],
+                'usage': usage,
+            })
+
+    def _send_result(self, payload):
+        try:
+            self._send_json(200, payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # Klient request zrusil (zahozena spekulace, deadline)
+            with self.server.stats_lock:
+                self.server.stats['cancelled'] += 1
+
+    def _reply(self, messages):
+        text = ' '.join(str(m.get('content') or '') for m in messages)
+        if 'JSON' in text:
+            return json.dumps(FAKE_REPORT, ensure_ascii=False)
+        return random.choice(FAKE_REPLIES)
+
+    def _usage(self, messages, content):
+        """Prompt tokeny + kolik z nich by provider vzal z cache (stejny system prompt jako minule)"""
+        prompt_tokens = sum(_tokens(m.get('content')) + 4 for m in messages)
+        system = messages[0].get('content', '') if messages else ''
+        with self.server.stats_lock:
+            seen = system in self.server.seen_prefixes
+            self.server.seen_prefixes.add(system)
+        cached = (_tokens(system) // CACHE_BLOCK_TOKENS) * CACHE_BLOCK_TOKENS if seen else 0
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': _tokens(content),
+            'total_tokens': prompt_tokens + _tokens(content),
+            'prompt_tokens_details': {'cached_tokens': cached},
+        }
+
+    def _send_stream(self, body, content, usage):
+        """SSE chunky po slovech jako skutecne API"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        words = content.split(' ')
+        try:
+            for i, word in enumerate(words):
+                delta = {'content': word if i == 0 else ' ' + word}
+                if i == 0:
+                    delta['role'] = 'assistant'
+                self._write_event({
+                    'id': completion_id, 'object': 'chat.completion.chunk',
+                    'created': int(time.time()), 'model': body.get('model'),
+                    'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}],
+                })
+                if self.server.token_delay:
+                    time.sleep(self.server.token_delay)
+            self._write_event({
+                'id': completion_id, 'object': 'chat.completion.chunk',
+                'created': int(time.time()), 'model': body.get('model'),
+                'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}],
+                'usage': usage if (body.get('stream_options') or {}).get('include_usage') else None,
+            })
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Klient request zrusil (hedging) - zbytek tokenu se negeneruje
+            with self.server.stats_lock:
+                self.server.stats['cancelled'] += 1
+
+    def _write_event(self, payload):
+        self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode())
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {'error': {'message': message, 'type': 'fake_error', 'code': None}})
+
+    def log_message(self, format, *args):
+        pass  # Ticho - benchmarky by jinak zahltil vypis
+
+
+def start_fake_llm_server(port=0, delay=0.3, jitter=0.0, fail_rate=0.0,
+                          slow_rate=0.0, slow_delay=2.0, token_delay=0.0):
+    """
+    Spusti fake server ve vlakne na pozadi
+
+    Args:
+        slow_rate: Podil requestu s pridanou latenci slow_delay (ocas rozdeleni)
+        token_delay: Pauza mezi tokeny pri stream=true
+
+    Returns:
+        (server, base_url) - base_url vcetne /v1, server.shutdown() pro ukonceni
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeLLMHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.jitter = jitter
+    server.fail_rate = fail_rate
+    server.slow_rate = slow_rate
+    server.slow_delay = slow_delay
+    server.token_delay = token_delay
+    server.seen_prefixes = set()
+    server.stats = {'requests': 0, 'slow': 0, 'cancelled': 0, 'prompt_tokens': 0, 'models': {}}
+    server.stats_lock = threading.Lock()
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host, real_port = server.server_address
+    return server, f"http://{host}:{real_port}/v1"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake OpenAI chat completions server')
+    parser.add_argument('--port', type=int, default=8098)
+    parser.add_argument('--delay', type=float, default=0.3, help='Latence prvniho tokenu (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Nahodna prirazka k latenci (s)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Podil requestu s HTTP 429/5xx')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='Podil pomalych requestu')
+    parser.add_argument('--slow-delay', type=float, default=2.0, help='Prirazka pomalych requestu (s)')
+    args = parser.parse_args()
+
+    server, url = start_fake_llm_server(args.port, args.delay, args.jitter, args.fail_rate,
+                                        args.slow_rate, args.slow_delay)
+    print(f"Fake LLM server bezi na {url} (Ctrl+C pro ukonceni)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
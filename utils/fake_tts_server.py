@@ -0,0 +1,112 @@
+"""
+Lokalni fake ElevenLabs server pro testy a benchmarky
+Napodobuje POST /v1/text-to-speech/<voice_id>[/stream] - vraci falesne MP3 po chuncich
+
+Pouziti:
+    python -m utils.fake_tts_server --port 8099 --delay 0.3
+    ELEVENLABS_BASE_URL=http://127.0.0.1:8099 python -m api.server
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Falesny MP3 frame (MPEG1 Layer3 128kbps 44.1kHz hlavicka + ticho)
+FAKE_MP3_FRAME = b'\xff\xfb\x90\x64' + b'\x00' * 413
+
+
+class FakeTTSHandler(BaseHTTPRequestHandler):
+    """Handler napodobujici ElevenLabs TTS endpoint"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive jako skutecne API
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        server = self.server
+
+        with server.stats_lock:
+            server.stats['requests'] += 1
+
+        if not self.path.startswith('/v1/text-to-speech/'):
+            self._send_error(404, 'not found')
+            return
+
+        # Simulace chyby providera
+        if random.random() < server.fail_rate:
+            self._send_error(500, 'simulated failure')
+            return
+
+        # Latence do prvniho bytu
+        delay = server.delay
+        if server.jitter:
+            delay += random.uniform(0, server.jitter)
+        time.sleep(delay)
+
+        # Delka audia umerna delce textu
+        frames = max(4, len(body.get('text', '')) // 2)
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/mpeg')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        chunk = FAKE_MP3_FRAME * 4
+        for _ in range(0, frames, 4):
+            self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+            if server.chunk_delay:
+                time.sleep(server.chunk_delay)
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _send_error(self, status, message):
+        payload = json.dumps({'detail': message}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Ticho - benchmarky by jinak zahltil vypis
+
+
+def start_fake_tts_server(port=0, delay=0.2, jitter=0.0, fail_rate=0.0, chunk_delay=0.0):
+    """
+    Spusti fake server ve vlakne na pozadi
+
+    Returns:
+        (server, base_url) - server.shutdown() pro ukonceni
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeTTSHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.jitter = jitter
+    server.fail_rate = fail_rate
+    server.chunk_delay = chunk_delay
+    server.stats = {'requests': 0}
+    server.stats_lock = threading.Lock()
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    host, real_port = server.server_address
+    return server, f"http://{host}:{real_port}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake ElevenLabs TTS server')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--delay', type=float, default=0.2, help='Latence prvniho bytu (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Nahodna prirazka k latenci (s)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Podil requestu s HTTP 500')
+    args = parser.parse_args()
+
+    server, url = start_fake_tts_server(args.port, args.delay, args.jitter, args.fail_rate)
+    print(f"Fake TTS server bezi na {url} (Ctrl+C pro ukonceni)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -20,7 +20,6 @@ from core.tts_engine import TTSEngine
 from core.ai_engine import AIEngine
 from database.cold_calling_db import ColdCallingDB
 from config import Config, CallConfig
-import time
 
 
 class PreCampaignOptimizer:
@@ -63,6 +62,7 @@ class PreCampaignOptimizer:
         """
         Cachuje běžné TTS výstupy kterých se bude používat
         Ušetří čas a API kredity
+        Základní fráze níže + nejčastější odpovědi z hovorů a KB (TTSCacheWarmer)
         """
         print("\n" + "="*60)
         print("🎙️  CACHING COMMON PHRASES")
@@ -83,22 +83,18 @@ class PreCampaignOptimizer:
             "Skvele, kontaktuji se na vami brzy.",
         ]
         
-        for i, phrase in enumerate(phrases, 1):
-            try:
-                print(f"\n[{i}/{len(phrases)}] '{phrase[:40]}...'")
-                url = self.tts.generate(phrase, use_cache=True)
-                if url:
-                    self.stats['tts_cached'] += 1
-                    print(f"  ✅ Cached: {url}")
-                else:
-                    self.stats['tts_errors'] += 1
-                    print(f"  ❌ Failed to cache")
-            except Exception as e:
-                self.stats['tts_errors'] += 1
-                print(f"  ❌ Error: {e}")
-            
-            # Krátká pauza mezi requesty
-            time.sleep(0.5)
+        # Fráze z hovorů (call_analytics.db) + KB námitky doplní warmer sám
+        from services.tts_cache_warmer import TTSCacheWarmer
+        
+        try:
+            result = TTSCacheWarmer(tts=self.tts).warm(extra_phrases=phrases)
+            self.stats['tts_cached'] = result['pinned']
+            self.stats['tts_errors'] = result['phrases'] - result['pinned']
+            print(f"\n  ✅ Cached: {result['pinned']}/{result['phrases']} "
+                  f"(z hovorů: {result['mined']}, nově vyrenderováno: {result['rendered']})")
+        except Exception as e:
+            self.stats['tts_errors'] += 1
+            print(f"  ❌ Error: {e}")
     
     def verify_contacts(self, campaign_id):
         """Ověří, že je připraveno 30+ kontaktů pro kampaň"""
@@ -0,0 +1,77 @@
+"""
+KB INDEX REGRESSION TESTER
+Dotazy s klicovymi slovy puvodnich if-chainu v get_context_for_query musi
+v BM25 indexu najit stejne sekce (cenik, realizace, sluzby, namitky)
+
+Pouziti:
+    python -m utils.test_kb_index
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.kb_index import KBIndex
+from database.knowledge_base import KNOWLEDGE_BASE
+
+PRICES = {('cenik', 'onepage'), ('cenik', 'vicestranky'), ('cenik', 'personalizovane')}
+SERVICES = {('sluzby', 'webove_stranky_na_miru'), ('sluzby', 'seo_optimalizace'),
+            ('sluzby', 'rychlost_a_vykon')}
+
+# Dotaz -> uzly, ktere musi byt ve vysledku (klicova slova puvodniho kodu)
+OLD_KEYWORDS = {
+    "kolik stojí web?": PRICES,
+    "kolik to je?": PRICES,
+    "za kolik to děláte?": PRICES,
+    "jaká je cena?": PRICES,
+    "kolik bych musel platit?": PRICES,
+    "platit": PRICES,
+    "kolik to stojí web na míru": PRICES,
+    "jak dlouho to trvá?": {('realizace', 'doba')},
+    "jaký je termín dodání?": {('realizace', 'doba')},
+    "co nabízíte?": SERVICES,
+    "co děláte?": SERVICES,
+    "jaké máte služby?": SERVICES,
+    "my nemáme web": {('namitky_a_reseni', 'nemame_web')},
+    "nemám web": {('namitky_a_reseni', 'nemame_web')},
+    "máme starý web": {('namitky_a_reseni', 'stary_web')},
+    "je zastaralý": {('namitky_a_reseni', 'stary_web')},
+    "to je drahé": {('namitky_a_reseni', 'je_to_drahe')},
+    "nemám peníze": {('namitky_a_reseni', 'je_to_drahe')},
+    "nemám čas": {('namitky_a_reseni', 'nema_cas')},
+    "teď ne, spěchám": {('namitky_a_reseni', 'nema_cas')},
+    "nemám zájem": {('namitky_a_reseni', 'nema_zajem')},
+    "nechci": {('namitky_a_reseni', 'nema_zajem')},
+}
+
+
+def test_old_keywords():
+    """Kazdy dotaz najde vsechny ocekavane uzly"""
+    print("\n" + "="*70)
+    print("TEST: Old keyword set -> KB index")
+    print("="*70)
+
+    index = KBIndex(KNOWLEDGE_BASE)
+    failed = 0
+    for query, expected in OLD_KEYWORDS.items():
+        found = {doc['path'] for _, doc in index.search(query)}
+        missing = expected - found
+        if missing:
+            failed += 1
+            print(f"❌ '{query}': chybí {sorted(missing)} (nalezeno {sorted(found)})")
+    if not failed:
+        print(f"✅ Vsech {len(OLD_KEYWORDS)} dotazu nalezlo ocekavane uzly")
+    return not failed
+
+
+def main():
+    ok = test_old_keywords()
+    print("\n" + "="*70)
+    print("✅ ALL TESTS PASSED" if ok else "❌ TESTS FAILED")
+    print("="*70 + "\n")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
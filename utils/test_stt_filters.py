@@ -0,0 +1,87 @@
+"""
+STT FILTER TESTER
+Kratke ceske odpovedi z telefonu ("Ano.", "Ne.", "No, ano.") musi projit telefonnimi
+filtry (media stream, offline prepis), halucinace Whisperu na sumu ne
+
+Pouziti:
+    python -m utils.test_stt_filters
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import Config
+from core.stt_backends import StandInBackend
+from core.stt_filters import apply_text_filters
+from services.media_stream import MediaStreamCall
+
+CONFIRMATIONS = ['Ano.', 'Ne.', 'Jo.', 'Jo jo.', 'Ano, no jo.', 'No, ano.', 'No jasně.', 'Nee.']
+VALID_PHRASES = ['Máme web www.kadernictvi-brno.cz', 'Děkuji za pozornost, nashledanou']
+HALLUCINATIONS = ['Titulky vytvořil JohnyX', 'www.amara.org', 'Subtitles by the Amara.org community']
+
+
+def test_phone_filters():
+    """Potvrzeni a bezne fraze projdou, titulkove artefakty ne"""
+    print("\n" + "="*70)
+    print("TEST 1: Phone text filters")
+    print("="*70)
+
+    ok = True
+    for text in CONFIRMATIONS + VALID_PHRASES:
+        kept, reason = apply_text_filters(text, Config.STT_PHONE_TEXT_FILTERS)
+        if kept != text:
+            print(f"❌ '{text}' zahozeno: {reason}")
+            ok = False
+    for text in HALLUCINATIONS:
+        kept, _ = apply_text_filters(text, Config.STT_PHONE_TEXT_FILTERS)
+        if kept is not None:
+            print(f"❌ Halucinace '{text}' prosla")
+            ok = False
+    if ok:
+        print(f"✅ {len(CONFIRMATIONS + VALID_PHRASES)} odpovedi proslo, "
+              f"{len(HALLUCINATIONS)} halucinaci zahozeno")
+    return ok
+
+
+class RecordingReceptionist:
+    def __init__(self):
+        self.messages = []
+
+    def process_message(self, call_sid, text):
+        self.messages.append(text)
+        return ''
+
+
+def test_media_stream_confirmations():
+    """Media stream preda kratke potvrzeni AIEngine (neskonci jako 'filtered')"""
+    print("\n" + "="*70)
+    print("TEST 2: Media stream keeps short confirmations")
+    print("="*70)
+
+    ok = True
+    for text in CONFIRMATIONS:
+        receptionist = RecordingReceptionist()
+        call = MediaStreamCall(lambda message: None, receptionist, tts=None,
+                               backend=StandInBackend(text=text))
+        call.speak = lambda reply, hangup=False: None
+        call._respond(b'\x00\x00' * 800)
+        if receptionist.messages != [text] or call.stats['filtered']:
+            print(f"❌ '{text}' nedoslo do AIEngine ({call.stats})")
+            ok = False
+    if ok:
+        print(f"✅ Vsech {len(CONFIRMATIONS)} potvrzeni doslo do AIEngine")
+    return ok
+
+
+def main():
+    results = [test_phone_filters(), test_media_stream_confirmations()]
+    print("\n" + "="*70)
+    print("✅ ALL TESTS PASSED" if all(results) else "❌ TESTS FAILED")
+    print("="*70 + "\n")
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())